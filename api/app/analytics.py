@@ -0,0 +1,72 @@
+"""Feedback analytics from incrementally maintained rollups.
+
+`feedback_rollup` holds one count per (domain, model of the revised plan, signal type, day).
+Both revise flows bump it with `count_feedback` in the transaction that stores the feedback,
+as its last statement, so the row lock on a busy counter is held only until the commit.
+`GET /analytics/feedback` then reads at most a few thousand counter rows instead of joining
+`feedback` to `roadmap`. Counts survive archival of the versions they are about.
+
+Versions stored before rollups existed have no model and are counted as "unknown".
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import date
+
+from sqlalchemy import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+UNKNOWN_MODEL = "unknown"
+
+_COUNT_FEEDBACK = text(
+    """
+    INSERT INTO feedback_rollup (domain, model, signal_type, day, count)
+    VALUES (:domain, :model, :signal_type, :day, 1)
+    ON CONFLICT (domain, model, signal_type, day) DO UPDATE SET count = feedback_rollup.count + 1
+    """
+)
+
+_SUMMARY = text(
+    """
+    SELECT domain, model, signal_type, SUM(count) FROM feedback_rollup
+    WHERE (CAST(:domain AS VARCHAR) IS NULL OR domain = :domain)
+      AND (CAST(:model AS VARCHAR) IS NULL OR model = :model)
+      AND (CAST(:since AS DATE) IS NULL OR day >= :since)
+      AND (CAST(:until AS DATE) IS NULL OR day <= :until)
+    GROUP BY domain, model, signal_type
+    """
+)
+
+
+async def count_feedback(session: AsyncSession, domain: str, model: Optional[str], signal_type: str, day: date) -> None:
+    """Count one feedback on a version of `domain` produced by `model`; caller commits."""
+    await session.execute(_COUNT_FEEDBACK, {
+        "domain": domain, "model": model or UNKNOWN_MODEL, "signal_type": signal_type, "day": day,
+    })
+
+
+async def feedback_summary(
+    session: AsyncSession,
+    domain: Optional[str] = None,
+    model: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    """Signal counts and shares per (domain, model), busiest first, with the dominant signal."""
+    rows = (await session.execute(_SUMMARY, {"domain": domain, "model": model, "since": since, "until": until})).all()
+    groups: Dict[Tuple[str, str], Dict[str, int]] = {}
+    for row_domain, row_model, signal_type, count in rows:
+        groups.setdefault((row_domain, row_model), {})[signal_type] = int(count)
+
+    out = []
+    for (row_domain, row_model), signals in groups.items():
+        total = sum(signals.values())
+        ordered = dict(sorted(signals.items(), key=lambda kv: (-kv[1], kv[0])))
+        out.append({
+            "domain": row_domain,
+            "model": row_model,
+            "total": total,
+            "dominant": next(iter(ordered)),
+            "signals": ordered,
+            "shares": {k: round(v / total, 4) for k, v in ordered.items()},
+        })
+    out.sort(key=lambda g: (-g["total"], g["domain"], g["model"]))
+    return out
@@ -0,0 +1,207 @@
+"""Cold archive of old roadmap versions.
+
+Every revision adds a `roadmap` row and old versions are rarely read again, yet they make up
+most of `roadmap`, `feedback` and their indexes. The archiver moves versions that are more than
+ARCHIVE_KEEP_VERSIONS behind the latest of their chain and older than ARCHIVE_MIN_AGE_DAYS,
+except pinned ones, into `roadmap_archive`: runs of up to ARCHIVE_CHUNK_VERSIONS versions per
+row, full plans and their feedback as compressed JSON, hash-partitioned by user. The latest
+version always stays. `GET /roadmap/{id}`, history and patch replay read archived versions
+transparently (see `archived_versions` / `archived_roadmap` in core.database); revising one
+answers 409.
+
+Each chain is archived in one transaction holding its `roadmap_version_counter` row, so
+concurrent archivers (several workers) never move a version twice. Runs in the API process
+every ARCHIVE_INTERVAL_SECONDS when ARCHIVE_ENABLED, or once (e.g. from cron) with:
+
+    python -m app.archive
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import defaultdict
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import time
+
+import orjson
+from sqlalchemy import delete, text
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .core.config import settings
+from .core.database import async_engine, pack_versions, Feedback, Roadmap
+from .roadmaps import reconstruct_plans
+
+# chains with at least one archivable version
+_CANDIDATES = text(
+    """
+    SELECT r.user_id, r.domain FROM roadmap r
+    JOIN roadmap_version_counter c ON c.user_id = r.user_id AND c.domain = r.domain
+    WHERE r.version <= c.last_version - :keep AND r.created_at < :cutoff AND NOT r.pinned
+    GROUP BY r.user_id, r.domain
+    LIMIT :limit
+    """
+)
+
+_LOCK_CHAIN = text(
+    "SELECT last_version FROM roadmap_version_counter WHERE user_id = :user_id AND domain = :domain FOR UPDATE"
+)
+
+_INSERT_ARCHIVE = text(
+    """
+    INSERT INTO roadmap_archive (user_id, domain, first_version, last_version, ids, payload)
+    VALUES (:user_id, :domain, :first_version, :last_version, CAST(:ids AS INTEGER[]), :payload)
+    """
+)
+
+_COUNT_ARCHIVED = text(
+    """
+    UPDATE roadmap_version_counter SET archived_versions = archived_versions + :n
+    WHERE user_id = :user_id AND domain = :domain
+    """
+)
+
+
+async def archive_chain(
+    session: AsyncSession, user_id: int, domain: str, keep: int, cutoff: datetime, limit: int
+) -> int:
+    """Move up to `limit` archivable versions of one chain to roadmap_archive and commit.
+    Returns the number of versions moved."""
+    last_version = (await session.execute(_LOCK_CHAIN, {"user_id": user_id, "domain": domain})).scalar()
+    if last_version is None:
+        await session.commit()
+        return 0
+    scope = (Roadmap.user_id == user_id) & (Roadmap.domain == domain)
+    cold = (await session.exec(
+        select(Roadmap)
+        .where(scope & (Roadmap.version <= last_version - max(1, keep)) & (Roadmap.created_at < cutoff)
+               & ~Roadmap.pinned)
+        .order_by(Roadmap.version)
+        .limit(limit)
+    )).all()
+    if not cold:
+        await session.commit()
+        return 0
+    versions = [r.version for r in cold]
+    ids = [r.id for r in cold]
+
+    # hot patches based on a version being archived become snapshots, so hot reads never
+    # need the archive to replay a chain
+    dependents = (await session.exec(
+        select(Roadmap).where(scope & Roadmap.base_version.in_(versions) & Roadmap.id.not_in(ids))
+    )).all()
+    plans = await reconstruct_plans(session, user_id, domain, versions + [d.version for d in dependents])
+
+    feedback: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    for fb in (await session.exec(select(Feedback).where(Feedback.roadmap_id.in_(ids)).order_by(Feedback.id))).all():
+        feedback[fb.roadmap_id].append({
+            "id": fb.id, "signal_type": fb.signal_type, "notes": fb.notes, "created_at": fb.created_at.isoformat(),
+        })
+    entries = [
+        {"id": r.id, "version": r.version, "created_at": r.created_at.isoformat(), "model": r.model,
+         "plan": plans[r.version], "feedback": feedback.get(r.id, [])}
+        for r in cold
+    ]
+
+    for d in dependents:
+        d.plan_json, d.patch_json, d.base_version, d.chain_length = plans[d.version], None, None, 0
+        session.add(d)
+    for i in range(0, len(entries), settings.ARCHIVE_CHUNK_VERSIONS):
+        chunk = entries[i:i + settings.ARCHIVE_CHUNK_VERSIONS]
+        await session.execute(_INSERT_ARCHIVE, {
+            "user_id": user_id, "domain": domain, "first_version": chunk[0]["version"],
+            "last_version": chunk[-1]["version"], "ids": [e["id"] for e in chunk], "payload": pack_versions(chunk),
+        })
+    await session.execute(delete(Feedback).where(Feedback.roadmap_id.in_(ids)))
+    await session.execute(delete(Roadmap).where(Roadmap.id.in_(ids)))
+    await session.execute(_COUNT_ARCHIVED, {"n": len(ids), "user_id": user_id, "domain": domain})
+    await session.commit()
+    return len(ids)
+
+
+class Archiver:
+    """Periodic archive passes in the background of a worker process."""
+
+    def __init__(self, keep: int, min_age_days: float, chains_per_pass: int, versions_per_chain: int = 1000):
+        self.keep = keep
+        self.min_age_days = min_age_days
+        self.chains_per_pass = chains_per_pass
+        self.versions_per_chain = versions_per_chain
+        self._task: Optional[asyncio.Task] = None
+        self.passes = 0
+        self.archived = 0
+        self.errors = 0
+
+    async def run_once(self) -> Tuple[int, int]:
+        """One pass over up to `chains_per_pass` chains; returns (chains, versions) archived."""
+        cutoff = datetime.utcnow() - timedelta(days=self.min_age_days)
+        async with AsyncSession(async_engine) as session:
+            chains = (await session.execute(
+                _CANDIDATES, {"keep": max(1, self.keep), "cutoff": cutoff, "limit": self.chains_per_pass}
+            )).all()
+            await session.commit()
+            moved = 0
+            for user_id, domain in chains:
+                moved += await archive_chain(session, user_id, domain, self.keep, cutoff, self.versions_per_chain)
+        self.passes += 1
+        self.archived += moved
+        return len(chains), moved
+
+    async def run_until_done(self) -> Tuple[int, int]:
+        """Passes until nothing is left to archive; returns the totals."""
+        chains = moved = 0
+        while True:
+            c, m = await self.run_once()
+            chains, moved = chains + c, moved + m
+            if m == 0:
+                return chains, moved
+
+    def start(self, interval_seconds: float) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(interval_seconds), name="roadmap-archiver")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _loop(self, interval_seconds: float) -> None:
+        while True:
+            try:
+                t0 = time.perf_counter()
+                chains, moved = await self.run_until_done()
+                if moved:
+                    print(f"[archive] moved {moved} versions of {chains} roadmaps in {time.perf_counter() - t0:.1f}s")
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.errors += 1
+                print(f"[archive] pass failed: {exc}")
+            await asyncio.sleep(interval_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"running": self._task is not None, "passes": self.passes, "archived": self.archived,
+                "errors": self.errors}
+
+
+archiver = Archiver(
+    keep=settings.ARCHIVE_KEEP_VERSIONS,
+    min_age_days=settings.ARCHIVE_MIN_AGE_DAYS,
+    chains_per_pass=settings.ARCHIVE_CHAINS_PER_PASS,
+)
+
+
+async def _once() -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    chains, moved = await archiver.run_until_done()
+    await async_engine.dispose()
+    return {"chains": chains, "versions": moved, "seconds": round(time.perf_counter() - t0, 2)}
+
+
+def main() -> None:
+    argparse.ArgumentParser(description="Archive every eligible roadmap version now, then exit.").parse_args()
+    print(orjson.dumps(asyncio.run(_once())).decode())
+
+
+if __name__ == "__main__":
+    main()
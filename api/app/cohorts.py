@@ -0,0 +1,130 @@
+"""Cohort onboarding: profile upsert and first roadmaps for many users in one request."""
+from typing import Any, AsyncIterator, Dict, List, Tuple
+import asyncio
+import time
+
+import orjson
+from fastapi import HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .core.config import settings
+from .core.database import async_engine, insert_next_versions, upsert_users_with_profiles
+from .llm.provider import generate_roadmap_struct, plan_source, served_paths
+from .llm.schema import ensure_valid
+from .metrics import stage
+from .profiles import publish_profile_changes
+
+
+def _context_key(data: Dict[str, Any]) -> bytes:
+    return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+
+
+async def onboard_cohort(domain: str, members: List[Dict[str, Any]], concurrency: int) -> AsyncIterator[Dict[str, Any]]:
+    """Upsert every member's profile, generate one plan per distinct profile context and store
+    it as the next roadmap version of each member sharing that context.
+
+    Yields a "start" line once profiles are stored, then "roadmap" (or "error") lines per
+    member as their context completes, then "done" with counts. At most `concurrency` LLM
+    calls run at a time; finished plans are buffered briefly and inserted together, so writes
+    take a few transactions rather than one per member.
+    """
+    started = time.perf_counter()
+    emails = [m["email"] for m in members]
+    if len(set(emails)) != len(emails):
+        raise HTTPException(status_code=422, detail="Duplicate emails in cohort")
+
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        user_ids = await upsert_users_with_profiles(session, domain, members)
+        await publish_profile_changes(session, user_ids.values())
+        await session.commit()
+
+    groups: Dict[bytes, List[int]] = {}
+    for i, m in enumerate(members):
+        groups.setdefault(_context_key(m["data"]), []).append(i)
+    yield {"type": "start", "domain": domain, "members": len(members), "unique_contexts": len(groups)}
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def generate(profile: Dict[str, Any]) -> Tuple[bytes, str]:
+        # each context runs in its own task, so it collects its own served path
+        paths = served_paths.collect()
+        async with semaphore:
+            plan = await generate_roadmap_struct(profile=profile, domain=domain)
+        return orjson.dumps(ensure_valid(plan)), plan_source(paths)
+
+    tasks = {asyncio.ensure_future(generate(members[idx[0]]["data"])): idx for idx in groups.values()}
+    pending = set(tasks)
+    roadmaps = errors = 0
+    transactions = 1  # the profile upsert
+
+    def error(i: int, detail: str) -> Dict[str, Any]:
+        return {"type": "error", "index": i, "email": emails[i], "user_id": user_ids[emails[i]], "detail": detail}
+
+    async def write(batch: List[Tuple[List[int], Tuple[bytes, str]]]) -> List[Dict[str, Any]]:
+        nonlocal roadmaps, errors, transactions
+        rows = [(user_ids[emails[i]], plan.decode(), model) for idx, (plan, model) in batch for i in idx]
+        try:
+            async with AsyncSession(async_engine, expire_on_commit=False) as session:
+                with stage("db_write"):
+                    inserted = await insert_next_versions(session, domain, rows)
+                    await session.commit()
+        except Exception:
+            errors += len(rows)
+            return [error(i, "Saving roadmap failed") for idx, _ in batch for i in idx]
+        transactions += 1
+        by_user = {user_id: (roadmap_id, version) for roadmap_id, user_id, version in inserted}
+        lines = []
+        for idx, (plan, _) in batch:
+            fragment = orjson.Fragment(plan)
+            for i in idx:
+                user_id = user_ids[emails[i]]
+                roadmap_id, version = by_user[user_id]
+                lines.append({
+                    "type": "roadmap", "index": i, "email": emails[i], "user_id": user_id,
+                    "roadmap_id": roadmap_id, "version": version, "plan": fragment,
+                })
+        roadmaps += len(lines)
+        return lines
+
+    # completed plans are buffered for up to COHORT_FLUSH_SECONDS (or COHORT_WRITE_BATCH rows)
+    # so a cohort of distinct contexts still writes in a handful of transactions
+    buffer: List[Tuple[List[int], Tuple[bytes, str]]] = []
+    buffered_rows = 0
+    last_flush = time.monotonic()
+    try:
+        while pending or buffer:
+            if pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=settings.COHORT_FLUSH_SECONDS, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is not None:
+                        errors += len(tasks[task])
+                        for i in tasks[task]:
+                            yield error(i, "Roadmap generation failed")
+                    else:
+                        buffer.append((tasks[task], task.result()))
+                        buffered_rows += len(tasks[task])
+            due = (
+                not pending
+                or buffered_rows >= settings.COHORT_WRITE_BATCH
+                or time.monotonic() - last_flush >= settings.COHORT_FLUSH_SECONDS
+            )
+            if buffer and due:
+                for line in await write(buffer):
+                    yield line
+                buffer, buffered_rows, last_flush = [], 0, time.monotonic()
+    finally:
+        # client went away: stop the LLM calls nobody will read
+        for task in pending:
+            task.cancel()
+
+    yield {
+        "type": "done",
+        "members": len(members),
+        "roadmaps": roadmaps,
+        "errors": errors,
+        "unique_contexts": len(groups),
+        "transactions": transactions,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
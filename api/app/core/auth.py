@@ -0,0 +1,47 @@
+"""API token check against the plain API_TOKEN and any number of SHA-256 hashed API keys.
+
+Configured keys are decoded once at import, so a request costs one SHA-256 of the presented
+token and a constant-time comparison against every digest; nothing touches the database.
+Print the digest of a new key for API_KEY_HASHES with:
+
+    python -m app.core.auth <key>
+"""
+from typing import List
+import hashlib
+import hmac
+import sys
+
+from .config import settings
+
+
+def hash_api_key(key: str) -> str:
+    """Hex SHA-256 of an API key, as listed in API_KEY_HASHES."""
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def _key_digests() -> List[bytes]:
+    digests = [bytes.fromhex(h.strip()) for h in settings.API_KEY_HASHES.split(",") if h.strip()]
+    if any(len(d) != 32 for d in digests):
+        raise ValueError("API_KEY_HASHES must be comma-separated hex SHA-256 digests")
+    if settings.API_TOKEN:
+        digests.append(hashlib.sha256(settings.API_TOKEN.encode("utf-8")).digest())
+    return digests
+
+
+_digests = _key_digests()
+
+
+def token_is_valid(token: str) -> bool:
+    """Whether `token` is one of the configured keys. Every digest is compared, so the time
+    taken does not depend on which key matched or how much of it."""
+    presented = hashlib.sha256(token.encode("utf-8")).digest()
+    valid = False
+    for digest in _digests:
+        valid |= hmac.compare_digest(presented, digest)
+    return valid
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python -m app.core.auth <key>")
+    print(hash_api_key(sys.argv[1]))
@@ -5,10 +5,112 @@ class Settings(BaseModel):
     API_NAME: str = "LifeMap.AI"
     API_VERSION: str = "0.4.0-phase4"
     API_TOKEN: str = os.getenv("API_TOKEN", "dev123")
+    # more accepted keys, as comma-separated hex SHA-256 digests (`python -m app.core.auth <key>`);
+    # an empty API_TOKEN leaves only these
+    API_KEY_HASHES: str = os.getenv("API_KEY_HASHES", "")
     ENV: str = os.getenv("ENV", "dev")
 
     OPENAI_API_KEY: str | None = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    OPENAI_BASE_URL: str | None = os.getenv("OPENAI_BASE_URL")
+
+    # "llm" calls the LLM when OPENAI_API_KEY is set; "local" always uses the local plan engine
+    PLAN_ENGINE: str = os.getenv("PLAN_ENGINE", "llm").lower()
+
+    # Shared keep-alive HTTP pool for LLM calls
+    LLM_HTTP2: bool = os.getenv("LLM_HTTP2", "false").lower() == "true"
+    LLM_MAX_CONNECTIONS: int = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+    LLM_MAX_KEEPALIVE: int = int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+    LLM_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("LLM_KEEPALIVE_EXPIRY_SECONDS", "60"))
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+    LLM_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", "5"))
+
+    # Resilience around LLM calls: one deadline per call, a timeout per attempt, retries of
+    # timeouts / connection errors / 429 / 5xx with jittered backoff, and an optional hedged
+    # second request when an attempt is slower than HEDGE_AFTER (0 = off)
+    LLM_DEADLINE_SECONDS: float = float(os.getenv("LLM_DEADLINE_SECONDS", "45"))
+    LLM_ATTEMPT_TIMEOUT_SECONDS: float = float(os.getenv("LLM_ATTEMPT_TIMEOUT_SECONDS", "20"))
+    LLM_MAX_ATTEMPTS: int = int(os.getenv("LLM_MAX_ATTEMPTS", "2"))
+    LLM_RETRY_INITIAL_SECONDS: float = float(os.getenv("LLM_RETRY_INITIAL_SECONDS", "0.2"))
+    LLM_RETRY_MAX_SECONDS: float = float(os.getenv("LLM_RETRY_MAX_SECONDS", "2"))
+    LLM_HEDGE_AFTER_SECONDS: float = float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "0"))
+    # Circuit breaker: opens when FAILURE_RATE of at least MIN_CALLS calls in the window were
+    # provider faults; requests are then served by the local plan engine for OPEN_SECONDS
+    LLM_BREAKER_ENABLED: bool = os.getenv("LLM_BREAKER_ENABLED", "true").lower() == "true"
+    LLM_BREAKER_WINDOW_SECONDS: float = float(os.getenv("LLM_BREAKER_WINDOW_SECONDS", "30"))
+    LLM_BREAKER_MIN_CALLS: int = int(os.getenv("LLM_BREAKER_MIN_CALLS", "10"))
+    LLM_BREAKER_FAILURE_RATE: float = float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5"))
+    LLM_BREAKER_OPEN_SECONDS: float = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "15"))
+
+    # Token budget for the request-specific part of a prompt (0 = unlimited); plans over it
+    # are pruned: resource URLs, then long descriptions, then descriptions and resources
+    LLM_PROMPT_TOKEN_BUDGET: int = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "3000"))
+
+    # Content-addressed cache of generated plans
+    PLAN_CACHE_ENABLED: bool = os.getenv("PLAN_CACHE_ENABLED", "true").lower() == "true"
+    PLAN_CACHE_SIZE: int = int(os.getenv("PLAN_CACHE_SIZE", "1024"))
+    PLAN_CACHE_TTL_SECONDS: float = float(os.getenv("PLAN_CACHE_TTL_SECONDS", "3600"))
+
+    # Similar-profile fast path for generate: reuse (and reschedule) the LLM plan of the nearest
+    # stored profile in the same domain when its similarity is at least THRESHOLD (0..1)
+    PLAN_SIMILARITY_ENABLED: bool = os.getenv("PLAN_SIMILARITY_ENABLED", "false").lower() == "true"
+    PLAN_SIMILARITY_THRESHOLD: float = float(os.getenv("PLAN_SIMILARITY_THRESHOLD", "0.95"))
+    PLAN_SIMILARITY_REFRESH_SECONDS: float = float(os.getenv("PLAN_SIMILARITY_REFRESH_SECONDS", "5"))
+
+    # Revisions: full plan snapshot every N versions, patches against the revised version in
+    # between (1 = always store full plans); PATCH_MODE asks the LLM for a patch, not a plan
+    PLAN_SNAPSHOT_EVERY: int = int(os.getenv("PLAN_SNAPSHOT_EVERY", "1"))
+    REVISE_PATCH_MODE: bool = os.getenv("REVISE_PATCH_MODE", "false").lower() == "true"
+
+    # Single-flight for identical in-flight LLM calls; CROSS_WORKER adds a claim row per call
+    # (held at most LOCK_TIMEOUT, which also bounds the wait of other workers, polling every
+    # POLL seconds) and a shared Postgres tier for the plan cache
+    PLAN_SINGLEFLIGHT_ENABLED: bool = os.getenv("PLAN_SINGLEFLIGHT_ENABLED", "true").lower() == "true"
+    PLAN_SINGLEFLIGHT_CROSS_WORKER: bool = os.getenv("PLAN_SINGLEFLIGHT_CROSS_WORKER", "false").lower() == "true"
+    PLAN_SINGLEFLIGHT_LOCK_TIMEOUT_SECONDS: float = float(os.getenv("PLAN_SINGLEFLIGHT_LOCK_TIMEOUT_SECONDS", "90"))
+    PLAN_SINGLEFLIGHT_POLL_SECONDS: float = float(os.getenv("PLAN_SINGLEFLIGHT_POLL_SECONDS", "0.25"))
+
+    # Per-worker cache of user rows and parsed profiles read by generate, job submit and history;
+    # upserts invalidate it in every worker through Postgres LISTEN/NOTIFY (not available behind
+    # DB_PGBOUNCER, where other workers rely on the TTL)
+    PROFILE_CACHE_ENABLED: bool = os.getenv("PROFILE_CACHE_ENABLED", "true").lower() == "true"
+    PROFILE_CACHE_SIZE: int = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+    PROFILE_CACHE_TTL_SECONDS: float = float(os.getenv("PROFILE_CACHE_TTL_SECONDS", "60"))
+
+    # Prometheus metrics on GET /metrics; false stops per-request recording (the endpoint stays)
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    # Multiprocess mode (several workers): set by uvicorn_start.sh; scrape-time collectors are
+    # copied to it every METRICS_SYNC_SECONDS
+    METRICS_MULTIPROC_DIR: str = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+    METRICS_SYNC_SECONDS: float = float(os.getenv("METRICS_SYNC_SECONDS", "5"))
+
+    # Background LLM jobs (Postgres-backed queue); JOB_WORKERS=0 disables in-process workers
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    JOB_RETRY_INITIAL_SECONDS: float = float(os.getenv("JOB_RETRY_INITIAL_SECONDS", "1"))
+    JOB_RETRY_MAX_SECONDS: float = float(os.getenv("JOB_RETRY_MAX_SECONDS", "30"))
+    JOB_POLL_SECONDS: float = float(os.getenv("JOB_POLL_SECONDS", "1"))
+    JOB_LEASE_SECONDS: float = float(os.getenv("JOB_LEASE_SECONDS", "600"))
+    JOB_SHUTDOWN_GRACE_SECONDS: float = float(os.getenv("JOB_SHUTDOWN_GRACE_SECONDS", "30"))
+
+    # Cold archive of old roadmap versions (app/archive.py): versions more than KEEP_VERSIONS behind
+    # the latest of their chain and older than MIN_AGE_DAYS move to roadmap_archive, unless pinned
+    ARCHIVE_ENABLED: bool = os.getenv("ARCHIVE_ENABLED", "false").lower() == "true"
+    ARCHIVE_KEEP_VERSIONS: int = int(os.getenv("ARCHIVE_KEEP_VERSIONS", "10"))
+    ARCHIVE_MIN_AGE_DAYS: float = float(os.getenv("ARCHIVE_MIN_AGE_DAYS", "30"))
+    ARCHIVE_INTERVAL_SECONDS: float = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+    ARCHIVE_CHAINS_PER_PASS: int = int(os.getenv("ARCHIVE_CHAINS_PER_PASS", "200"))
+    ARCHIVE_CHUNK_VERSIONS: int = int(os.getenv("ARCHIVE_CHUNK_VERSIONS", "100"))
+
+    # Bulk NDJSON export (GET /export/roadmaps): rows per server-side cursor fetch
+    EXPORT_BATCH_ROWS: int = int(os.getenv("EXPORT_BATCH_ROWS", "1000"))
+
+    # Cohort onboarding (/cohort:onboard): members per request, concurrent LLM calls per request
+    COHORT_MAX_MEMBERS: int = int(os.getenv("COHORT_MAX_MEMBERS", "5000"))
+    COHORT_CONCURRENCY: int = int(os.getenv("COHORT_CONCURRENCY", "16"))
+    # finished plans are inserted together every FLUSH_SECONDS or WRITE_BATCH rows
+    COHORT_FLUSH_SECONDS: float = float(os.getenv("COHORT_FLUSH_SECONDS", "0.25"))
+    COHORT_WRITE_BATCH: int = int(os.getenv("COHORT_WRITE_BATCH", "500"))
 
     DB_HOST: str = os.getenv("DB_HOST", "db")
     DB_PORT: int = int(os.getenv("DB_PORT", "5432"))
@@ -16,4 +118,20 @@ class Settings(BaseModel):
     DB_USER: str = os.getenv("DB_USER", "lifemap")
     DB_PASSWORD: str = os.getenv("DB_PASSWORD", "lifemap_pw")
 
+    # Connection pool per engine and worker: POOL_SIZE kept open, up to MAX_OVERFLOW more under
+    # load, POOL_TIMEOUT to wait for a free one; connections older than POOL_RECYCLE are replaced
+    # and PRE_PING checks each one on checkout (survives DB restarts and idle disconnects)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10"))
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # connections each worker opens at startup, before taking traffic (0 = open on demand)
+    DB_POOL_WARMUP: int = int(os.getenv("DB_POOL_WARMUP", "4"))
+    # server-side limit per statement (0 = none); sent as a startup option
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+    # behind PgBouncer in transaction mode: no server-side prepared statements and no startup
+    # options (set statement_timeout on the database role instead)
+    DB_PGBOUNCER: bool = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+
 settings = Settings()
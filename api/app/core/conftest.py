@@ -0,0 +1,26 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from app.core.database import DATABASE_URL
+
+
+@pytest.fixture
+def scratch_url():
+    """URL of an empty database created on the configured server (DB_HOST, DB_USER, ...) and
+    dropped after the test; the test is skipped when the server cannot be reached."""
+    name = f"lifemap_test_{os.getpid()}"
+    admin = create_engine(DATABASE_URL, isolation_level="AUTOCOMMIT", connect_args={"connect_timeout": 3})
+    try:
+        with admin.connect() as conn:
+            conn.execute(text(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)"))
+            conn.execute(text(f"CREATE DATABASE {name}"))
+    except (OperationalError, ProgrammingError) as exc:
+        admin.dispose()
+        pytest.skip(f"needs a Postgres server to create a scratch database: {exc.orig}")
+    yield f"{DATABASE_URL.rsplit('/', 1)[0]}/{name}"
+    with admin.connect() as conn:
+        conn.execute(text(f"DROP DATABASE {name} WITH (FORCE)"))
+    admin.dispose()
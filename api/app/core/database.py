@@ -1,45 +1,381 @@
 from sqlmodel import SQLModel, Field, create_engine, Session, select
-from typing import Optional
+from sqlalchemy import Column, Index, cast, func, literal, text
+from sqlalchemy.dialects.postgresql import JSONB, JSONPATH
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
 from datetime import datetime
 from .config import settings
+from .migrations import run_migrations
 import json
+import zlib
+import orjson
 
 DATABASE_URL = (
     f"postgresql+psycopg://{settings.DB_USER}:{settings.DB_PASSWORD}"
     f"@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
 )
-engine = create_engine(DATABASE_URL, echo=False)
+
+
+def _engine_options() -> Dict[str, Any]:
+    """Pool and connection settings shared by the sync and async engines."""
+    connect_args: Dict[str, Any] = {}
+    if settings.DB_PGBOUNCER:
+        # a transaction-mode pooler hands each transaction to any server connection, so
+        # statements prepared on one are missing on the next
+        connect_args["prepare_threshold"] = None
+    elif settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+    return {
+        "echo": False,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+
+engine = create_engine(DATABASE_URL, **_engine_options())
+# psycopg 3 speaks asyncio natively, so the same URL backs the request-path engine
+async_engine = create_async_engine(DATABASE_URL, **_engine_options())
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """FastAPI dependency: one session and one transaction per request, committed after the
+    handler returns and rolled back if it raises. A connection is only checked out on the
+    first query, so requests rejected before that never touch the pool."""
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+        await session.commit()
+
+
+async def warm_up_pool(connections: int) -> int:
+    """Open up to `connections` pooled connections at startup (at most DB_POOL_SIZE, which
+    the pool keeps idle), so the first requests after a deploy skip connection setup."""
+    n = max(0, min(connections, settings.DB_POOL_SIZE))
+    results = await asyncio.gather(*(async_engine.connect() for _ in range(n)), return_exceptions=True)
+    opened = [r for r in results if not isinstance(r, BaseException)]
+    for conn in opened:
+        await conn.close()
+    if len(opened) < n:
+        # not fatal: the database may still be starting, the pool connects on demand
+        error = next(r for r in results if isinstance(r, BaseException))
+        print(f"[DB] Pool warm-up opened {len(opened)}/{n} connections: {error}")
+    return len(opened)
 
 class User(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
-    email: str
+    email: str = Field(index=True, unique=True)
 
 class Profile(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="user.id")
-    academics_json: Optional[str] = None
-    career_json: Optional[str] = None
-    personal_json: Optional[str] = None
+    user_id: int = Field(foreign_key="user.id", index=True, unique=True)
+    academics_json: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONB))
+    career_json: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONB))
+    personal_json: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONB))
 
 class Roadmap(SQLModel, table=True):
+    __table_args__ = (Index("ix_roadmap_user_domain_version", "user_id", "domain", "version", unique=True),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     domain: str
     version: int = 1
-    plan_json: str
+    # full snapshot, or NULL when the version is stored as patch_json against base_version
+    plan_json: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONB))
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    base_version: Optional[int] = None
+    patch_json: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONB))
+    # patches between this version and its nearest snapshot (0 for snapshots)
+    chain_length: int = 0
+    # kept out of the cold archive (see app/archive.py)
+    pinned: bool = False
+    # LLM model that produced the plan, "local" for the local engine (see provider.plan_source)
+    model: Optional[str] = None
+
+class RoadmapVersionCounter(SQLModel, table=True):
+    __tablename__ = "roadmap_version_counter"
+
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    domain: str = Field(primary_key=True)
+    last_version: int
+    # versions moved to roadmap_archive
+    archived_versions: int = 0
+
 
 class Feedback(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    roadmap_id: int = Field(foreign_key="roadmap.id")
+    roadmap_id: int = Field(foreign_key="roadmap.id", index=True)
     signal_type: str
     notes: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class LLMJob(SQLModel, table=True):
+    __tablename__ = "llm_job"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str
+    payload: Dict[str, Any] = Field(sa_column=Column(JSONB, nullable=False))
+    status: str = "queued"
+    attempts: int = 0
+    result: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONB))
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+# Bumps the per-(user, domain) counter and inserts the roadmap in one statement. The
+# counter row lock serializes concurrent writers for the same user/domain until commit,
+# so versions come out dense and unique without a separate MAX(version) read.
+_INSERT_NEXT_VERSION = text(
+    """
+    WITH next AS (
+        INSERT INTO roadmap_version_counter (user_id, domain, last_version)
+        VALUES (:user_id, :domain, 1)
+        ON CONFLICT (user_id, domain)
+        DO UPDATE SET last_version = roadmap_version_counter.last_version + 1
+        RETURNING last_version
+    )
+    INSERT INTO roadmap (user_id, domain, version, plan_json, base_version, patch_json, chain_length, created_at, model)
+    SELECT :user_id, :domain, next.last_version, CAST(:plan_json AS JSONB),
+           :base_version, CAST(:patch_json AS JSONB), :chain_length, :created_at, :model
+    FROM next
+    RETURNING id, version
+    """
+)
+
+
+async def insert_next_version(
+    session: AsyncSession,
+    user_id: int,
+    domain: str,
+    plan: Dict[str, Any],
+    base_version: Optional[int] = None,
+    patch: Optional[Dict[str, Any]] = None,
+    chain_length: int = 0,
+    model: Optional[str] = None,
+) -> Roadmap:
+    """Insert a roadmap as the next version for (user_id, domain); caller commits.
+
+    With `patch`, only the patch against `base_version` is stored and `plan` is what it
+    reconstructs to; the returned Roadmap always carries the full plan.
+    """
+    created_at = datetime.utcnow()
+    row = (await session.execute(_INSERT_NEXT_VERSION, {
+        "user_id": user_id,
+        "domain": domain,
+        "plan_json": orjson.dumps(plan).decode() if patch is None else None,
+        "base_version": base_version if patch is not None else None,
+        "patch_json": orjson.dumps(patch).decode() if patch is not None else None,
+        "chain_length": chain_length if patch is not None else 0,
+        "created_at": created_at,
+        "model": model,
+    })).one()
+    return Roadmap(id=row.id, user_id=user_id, domain=domain, version=row.version,
+                   plan_json=plan, created_at=created_at,
+                   base_version=base_version if patch is not None else None,
+                   patch_json=patch, chain_length=chain_length if patch is not None else 0, model=model)
+
+
+# Cohort writes: one statement per table for a whole batch, rows passed as parallel arrays.
+# The no-op DO UPDATE makes RETURNING include users that already existed.
+_UPSERT_USERS = text(
+    """
+    INSERT INTO "user" (name, email)
+    SELECT * FROM unnest(CAST(:names AS VARCHAR[]), CAST(:emails AS VARCHAR[]))
+    ON CONFLICT (email) DO UPDATE SET email = EXCLUDED.email
+    RETURNING id, email
+    """
+)
+
+# Same counter bump as _INSERT_NEXT_VERSION, for many users at once (user_ids must be unique)
+_INSERT_NEXT_VERSIONS = text(
+    """
+    WITH rows AS (
+        SELECT * FROM unnest(CAST(:user_ids AS INTEGER[]), CAST(:plans AS JSONB[]), CAST(:models AS VARCHAR[]))
+            AS r(user_id, plan_json, model)
+    ), next AS (
+        INSERT INTO roadmap_version_counter (user_id, domain, last_version)
+        SELECT user_id, :domain, 1 FROM rows
+        ON CONFLICT (user_id, domain)
+        DO UPDATE SET last_version = roadmap_version_counter.last_version + 1
+        RETURNING user_id, last_version
+    )
+    INSERT INTO roadmap (user_id, domain, version, plan_json, chain_length, created_at, model)
+    SELECT rows.user_id, :domain, next.last_version, rows.plan_json, 0, :created_at, rows.model
+    FROM rows JOIN next USING (user_id)
+    RETURNING id, user_id, version
+    """
+)
+
+PROFILE_DOMAINS = ("academics", "career", "personal")
+
+
+async def upsert_users_with_profiles(
+    session: AsyncSession, domain: str, members: List[Dict[str, Any]]
+) -> Dict[str, int]:
+    """Bulk `/profile:upsert`: find or create a user per email and store each member's `data`
+    as their `<domain>_json`. Emails must be unique; caller commits. Returns email -> user id."""
+    if domain not in PROFILE_DOMAINS:
+        raise ValueError(f"unknown domain {domain!r}")
+    rows = (await session.execute(_UPSERT_USERS, {
+        "names": [m["name"] for m in members],
+        "emails": [m["email"] for m in members],
+    })).all()
+    user_ids = {email: user_id for user_id, email in rows}
+    column = f"{domain}_json"
+    await session.execute(text(
+        f"""INSERT INTO profile (user_id, {column})
+            SELECT * FROM unnest(CAST(:user_ids AS INTEGER[]), CAST(:data AS JSONB[]))
+            ON CONFLICT (user_id) DO UPDATE SET {column} = EXCLUDED.{column}"""
+    ), {
+        "user_ids": [user_ids[m["email"]] for m in members],
+        "data": [orjson.dumps(m["data"]).decode() for m in members],
+    })
+    return user_ids
+
+
+async def insert_next_versions(
+    session: AsyncSession, domain: str, plans: List[Tuple[int, str, str]]
+) -> List[Tuple[int, int, int]]:
+    """`insert_next_version` for many users in one statement: `plans` is (user_id, plan JSON
+    text, model) with unique user ids, all stored as snapshots. Caller commits. Returns
+    (roadmap_id, user_id, version) rows."""
+    rows = (await session.execute(_INSERT_NEXT_VERSIONS, {
+        "user_ids": [user_id for user_id, _, _ in plans],
+        "plans": [plan for _, plan, _ in plans],
+        "models": [model for _, _, model in plans],
+        "domain": domain,
+        "created_at": datetime.utcnow(),
+    })).all()
+    return [tuple(row) for row in rows]
+
+
+# Server-side plan projections: each name maps to a JSONB expression evaluated by Postgres,
+# so list/history reads ship only the requested parts of each plan.
+_plan = Roadmap.plan_json
+PLAN_FIELDS = {
+    "title": _plan["title"],
+    "domain": _plan["domain"],
+    "milestones": _plan["milestones"],
+    "milestone_titles": func.jsonb_path_query_array(_plan, cast(literal("$.milestones[*].title"), JSONPATH)),
+    "timeline": _plan["timeline"],
+    "resources": _plan["resources"],
+    "check_ins": _plan["check_ins"],
+    "constraints": _plan["constraints"],
+    "weeks": func.jsonb_array_length(func.coalesce(_plan["timeline"], func.jsonb_build_array())),
+}
+PLAN_SUMMARY = func.jsonb_build_object(
+    "title", PLAN_FIELDS["title"],
+    "milestones", PLAN_FIELDS["milestone_titles"],
+    "weeks", PLAN_FIELDS["weeks"],
+    "check_ins", func.jsonb_array_length(func.coalesce(_plan["check_ins"], func.jsonb_build_array())),
+)
+
+
+def plan_projection(fields: List[str]):
+    """jsonb_build_object over the requested PLAN_FIELDS (unknown names raise KeyError)."""
+    args: List[Any] = []
+    for name in fields:
+        args.extend([name, PLAN_FIELDS[name]])
+    return func.jsonb_build_object(*args)
+
+
+# The same projections in Python, for plans reconstructed from patches
+PY_PLAN_FIELDS = {
+    "title": lambda p: p.get("title"),
+    "domain": lambda p: p.get("domain"),
+    "milestones": lambda p: p.get("milestones"),
+    "milestone_titles": lambda p: [m.get("title") for m in p.get("milestones") or [] if "title" in m],
+    "timeline": lambda p: p.get("timeline"),
+    "resources": lambda p: p.get("resources"),
+    "check_ins": lambda p: p.get("check_ins"),
+    "constraints": lambda p: p.get("constraints"),
+    "weeks": lambda p: len(p.get("timeline") or []),
+}
+
+
+def project_plan(plan: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    return {name: PY_PLAN_FIELDS[name](plan) for name in fields}
+
+
+def summarize_plan(plan: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "title": plan.get("title"),
+        "milestones": PY_PLAN_FIELDS["milestone_titles"](plan),
+        "weeks": PY_PLAN_FIELDS["weeks"](plan),
+        "check_ins": len(plan.get("check_ins") or []),
+    }
+
+
+# Cold versions (roadmap_archive, written by app/archive.py). Each row holds a run of versions of
+# one chain as zlib-compressed JSON: [{"id", "version", "created_at", "plan", "feedback"}, ...],
+# oldest first, with full plans (patches are resolved before archiving).
+ARCHIVE_MAX_VERSION = 2**31 - 1
+
+_ARCHIVED_RANGE = text(
+    """
+    SELECT first_version, payload FROM roadmap_archive
+    WHERE user_id = :user_id AND domain = :domain AND last_version > :after AND first_version <= :upto
+      AND first_version > :seek
+    ORDER BY first_version
+    LIMIT :runs
+    """
+)
+
+_ARCHIVED_BY_ID = text(
+    "SELECT user_id, domain, payload FROM roadmap_archive WHERE ids @> ARRAY[CAST(:id AS INTEGER)]"
+)
+
+
+def pack_versions(entries: List[Dict[str, Any]]) -> bytes:
+    return zlib.compress(orjson.dumps(entries), 6)
+
+
+def unpack_versions(payload: bytes) -> List[Dict[str, Any]]:
+    return orjson.loads(zlib.decompress(payload))
+
+
+async def archived_versions(
+    session: AsyncSession,
+    user_id: int,
+    domain: str,
+    after: int = 0,
+    upto: int = ARCHIVE_MAX_VERSION,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Archived versions of a chain numbered in (after, upto], oldest first. With `limit`, only
+    the first `limit` of them: runs are read a few at a time and decompression stops once the
+    page is full, so paging through a long archived chain stays linear."""
+    out: List[Dict[str, Any]] = []
+    seek = -1
+    while True:
+        # a run holds up to ARCHIVE_CHUNK_VERSIONS versions (fewer at the edges of the range)
+        runs = None if limit is None else (limit - len(out)) // max(1, settings.ARCHIVE_CHUNK_VERSIONS) + 1
+        rows = (await session.execute(_ARCHIVED_RANGE, {
+            "user_id": user_id, "domain": domain, "after": after, "upto": upto, "seek": seek, "runs": runs,
+        })).all()
+        for seek, payload in rows:
+            out.extend(e for e in unpack_versions(payload) if after < e["version"] <= upto)
+        if limit is None or len(out) >= limit or len(rows) < runs:
+            return out if limit is None else out[:limit]
+
+
+async def archived_roadmap(session: AsyncSession, roadmap_id: int) -> Optional[Dict[str, Any]]:
+    """An archived version by roadmap id, with its `user_id` and `domain`, or None."""
+    row = (await session.execute(_ARCHIVED_BY_ID, {"id": roadmap_id})).first()
+    if row is None:
+        return None
+    entry = next(e for e in unpack_versions(row[2]) if e["id"] == roadmap_id)
+    return {**entry, "user_id": row[0], "domain": row[1]}
+
+
 def init_db():
-    print("[DB] Creating tables if not exist…")
-    SQLModel.metadata.create_all(engine)
+    print("[DB] Applying schema migrations…")
+    run_migrations(engine)
 
 def seed_demo():
     with Session(engine) as session:
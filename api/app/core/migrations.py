@@ -0,0 +1,271 @@
+"""Versioned schema migrations.
+
+Each migration is a list of SQL statements applied once, in order, and recorded in
+`schema_migrations`. All pending migrations run in a single transaction guarded by an
+advisory lock, so concurrent starters (several workers or containers) apply them once.
+Append new migrations to MIGRATIONS; never edit one that has shipped.
+
+    python -m app.core.migrations            # apply pending migrations
+    python -m app.core.migrations --status   # list applied / pending
+"""
+from typing import List, NamedTuple, Set
+import argparse
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    statements: List[str]
+
+
+# arbitrary constant shared by every process that runs migrations
+MIGRATION_LOCK_ID = 4_812_001
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline schema", [
+        # matches what SQLModel.metadata.create_all produced before migrations existed
+        """CREATE TABLE IF NOT EXISTS "user" (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR NOT NULL,
+            email VARCHAR NOT NULL
+        )""",
+        """CREATE TABLE IF NOT EXISTS profile (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES "user" (id),
+            academics_json VARCHAR,
+            career_json VARCHAR,
+            personal_json VARCHAR
+        )""",
+        """CREATE TABLE IF NOT EXISTS roadmap (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES "user" (id),
+            domain VARCHAR NOT NULL,
+            version INTEGER NOT NULL,
+            plan_json VARCHAR NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+        )""",
+        """CREATE TABLE IF NOT EXISTS feedback (
+            id SERIAL PRIMARY KEY,
+            roadmap_id INTEGER NOT NULL REFERENCES roadmap (id),
+            signal_type VARCHAR NOT NULL,
+            notes VARCHAR,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+        )""",
+    ]),
+    Migration(2, "lookup indexes", [
+        # merge accounts sharing an email into the oldest one before the unique indexes: their
+        # profiles and roadmaps move to it (merged chains' clashing versions are renumbered by
+        # migration 3), then the extra accounts go
+        """UPDATE profile AS p SET user_id = k.keep
+           FROM (SELECT id, min(id) OVER (PARTITION BY email) AS keep FROM "user") AS k
+           WHERE p.user_id = k.id AND k.id <> k.keep""",
+        """UPDATE roadmap AS r SET user_id = k.keep
+           FROM (SELECT id, min(id) OVER (PARTITION BY email) AS keep FROM "user") AS k
+           WHERE r.user_id = k.id AND k.id <> k.keep""",
+        'DELETE FROM "user" AS u USING "user" AS k WHERE u.email = k.email AND u.id > k.id',
+        # one profile per user: keep the latest, filling domains it lacks from the latest older
+        # profile that has them
+        *[f"""UPDATE profile AS p SET {col} = (
+                  SELECT o.{col} FROM profile AS o
+                  WHERE o.user_id = p.user_id AND o.{col} IS NOT NULL ORDER BY o.id DESC LIMIT 1)
+              WHERE p.{col} IS NULL
+                AND p.id IN (SELECT max(id) FROM profile GROUP BY user_id HAVING count(*) > 1)"""
+          for col in ("academics_json", "career_json", "personal_json")],
+        "DELETE FROM profile AS p USING profile AS k WHERE p.user_id = k.user_id AND p.id < k.id",
+        # one account per email and one profile per user: upsert_profile relies on both
+        'CREATE UNIQUE INDEX IF NOT EXISTS ix_user_email ON "user" (email)',
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_profile_user_id ON profile (user_id)",
+        # serves MAX(version), history pages and per-user listing; not unique yet because
+        # revise has historically written duplicate version numbers
+        "CREATE INDEX IF NOT EXISTS ix_roadmap_user_domain_version ON roadmap (user_id, domain, version)",
+        "CREATE INDEX IF NOT EXISTS ix_feedback_roadmap_id ON feedback (roadmap_id)",
+    ]),
+    Migration(3, "atomic roadmap version allocation", [
+        # repair duplicate versions left by the old prev.version + 1 logic, keeping creation order
+        """UPDATE roadmap AS r SET version = s.rn
+           FROM (SELECT id, row_number() OVER (PARTITION BY user_id, domain ORDER BY version, id) AS rn
+                 FROM roadmap) AS s
+           WHERE r.id = s.id AND r.version <> s.rn""",
+        "DROP INDEX IF EXISTS ix_roadmap_user_domain_version",
+        "CREATE UNIQUE INDEX ix_roadmap_user_domain_version ON roadmap (user_id, domain, version)",
+        """CREATE TABLE roadmap_version_counter (
+            user_id INTEGER NOT NULL REFERENCES "user" (id),
+            domain VARCHAR NOT NULL,
+            last_version INTEGER NOT NULL,
+            PRIMARY KEY (user_id, domain)
+        )""",
+        """INSERT INTO roadmap_version_counter (user_id, domain, last_version)
+           SELECT user_id, domain, max(version) FROM roadmap GROUP BY user_id, domain""",
+    ]),
+    Migration(4, "plans and profiles as jsonb", [
+        "ALTER TABLE roadmap ALTER COLUMN plan_json TYPE JSONB USING CAST(plan_json AS JSONB)",
+        "ALTER TABLE profile ALTER COLUMN academics_json TYPE JSONB USING CAST(academics_json AS JSONB)",
+        "ALTER TABLE profile ALTER COLUMN career_json TYPE JSONB USING CAST(career_json AS JSONB)",
+        "ALTER TABLE profile ALTER COLUMN personal_json TYPE JSONB USING CAST(personal_json AS JSONB)",
+    ]),
+    Migration(5, "llm job queue", [
+        """CREATE TABLE llm_job (
+            id BIGSERIAL PRIMARY KEY,
+            kind VARCHAR NOT NULL,
+            payload JSONB NOT NULL,
+            status VARCHAR NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            result JSONB,
+            error VARCHAR,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+        )""",
+        # workers only ever scan claimable rows, so keep the index to those
+        "CREATE INDEX ix_llm_job_claimable ON llm_job (id) WHERE status IN ('queued', 'running')",
+    ]),
+    Migration(6, "shared plan cache", [
+        # cross-worker tier of the plan cache (values are plan JSON text, read back verbatim)
+        """CREATE TABLE plan_cache (
+            key VARCHAR PRIMARY KEY,
+            value TEXT NOT NULL,
+            expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+        )""",
+        "CREATE INDEX ix_plan_cache_expires_at ON plan_cache (expires_at)",
+    ]),
+    Migration(7, "delta-stored revisions", [
+        # a revision row holds either a full snapshot (plan_json) or a patch against base_version
+        "ALTER TABLE roadmap ADD COLUMN base_version INTEGER",
+        "ALTER TABLE roadmap ADD COLUMN patch_json JSONB",
+        "ALTER TABLE roadmap ADD COLUMN chain_length INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE roadmap ALTER COLUMN plan_json DROP NOT NULL",
+        """ALTER TABLE roadmap ADD CONSTRAINT ck_roadmap_snapshot_or_patch
+           CHECK (plan_json IS NOT NULL OR (patch_json IS NOT NULL AND base_version IS NOT NULL))""",
+    ]),
+    Migration(8, "profile similarity index", [
+        # one LLM plan per distinct profile encoding; workers load (id, domain, features) into
+        # memory and fetch `plan` by id on a match (see app/llm/similar.py)
+        """CREATE TABLE profile_index (
+            id BIGSERIAL PRIMARY KEY,
+            domain VARCHAR NOT NULL,
+            features BYTEA NOT NULL,
+            signals JSONB NOT NULL,
+            plan JSONB NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+        )""",
+        "CREATE UNIQUE INDEX ix_profile_index_domain_features ON profile_index (domain, features)",
+    ]),
+    Migration(9, "roadmap cold archive", [
+        # pinned versions are never archived
+        "ALTER TABLE roadmap ADD COLUMN pinned BOOLEAN NOT NULL DEFAULT false",
+        # archived versions per chain, so history totals need no archive read
+        "ALTER TABLE roadmap_version_counter ADD COLUMN archived_versions INTEGER NOT NULL DEFAULT 0",
+        # cold versions moved out of roadmap/feedback by app/archive.py: each row is a run of
+        # versions of one chain, as a zlib-compressed JSON array of full plans with their feedback
+        """CREATE TABLE roadmap_archive (
+            user_id INTEGER NOT NULL REFERENCES "user" (id),
+            domain VARCHAR NOT NULL,
+            first_version INTEGER NOT NULL,
+            last_version INTEGER NOT NULL,
+            ids INTEGER[] NOT NULL,
+            payload BYTEA NOT NULL,
+            archived_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            PRIMARY KEY (user_id, domain, first_version)
+        ) PARTITION BY HASH (user_id)""",
+        *[f"CREATE TABLE roadmap_archive_p{i} PARTITION OF roadmap_archive FOR VALUES WITH (MODULUS 8, REMAINDER {i})"
+          for i in range(8)],
+        # GET /roadmap/{id} of an archived version
+        "CREATE INDEX ix_roadmap_archive_ids ON roadmap_archive USING GIN (ids)",
+    ]),
+    Migration(10, "feedback rollups", [
+        # model that produced each version ("local" for the local engine); NULL before this
+        "ALTER TABLE roadmap ADD COLUMN model VARCHAR",
+        # feedback counts kept up to date by the revise flows (see app/analytics.py)
+        """CREATE TABLE feedback_rollup (
+            domain VARCHAR NOT NULL,
+            model VARCHAR NOT NULL,
+            signal_type VARCHAR NOT NULL,
+            day DATE NOT NULL,
+            count BIGINT NOT NULL,
+            PRIMARY KEY (domain, model, signal_type, day)
+        )""",
+        # existing feedback; rows already moved to roadmap_archive are not counted
+        """INSERT INTO feedback_rollup (domain, model, signal_type, day, count)
+           SELECT r.domain, 'unknown', f.signal_type, CAST(f.created_at AS DATE), COUNT(*)
+           FROM feedback f JOIN roadmap r ON r.id = f.roadmap_id
+           GROUP BY r.domain, f.signal_type, CAST(f.created_at AS DATE)""",
+    ]),
+    Migration(11, "roadmap patch base index", [
+        # patches based on a version: counted per row by the export, looked up by archival
+        """CREATE INDEX ix_roadmap_user_domain_base_version ON roadmap (user_id, domain, base_version)
+           WHERE base_version IS NOT NULL""",
+    ]),
+    Migration(12, "single-flight claims", [
+        # cross-worker single-flight: one row per in-flight plan call, held by its leader until
+        # the call ends or `expires_at` passes (see app/llm/singleflight.py)
+        """CREATE TABLE plan_flight (
+            key VARCHAR PRIMARY KEY,
+            expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+        )""",
+    ]),
+]
+
+
+def _ensure_table(conn: Connection) -> None:
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version INTEGER PRIMARY KEY,"
+        " name VARCHAR NOT NULL,"
+        " applied_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+    ))
+
+
+def _applied(conn: Connection) -> Set[int]:
+    return set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """Apply pending migrations; returns the versions applied by this call."""
+    done: List[int] = []
+    with engine.begin() as conn:
+        # migrations rewrite whole tables: lift DB_STATEMENT_TIMEOUT_MS (or a role-level
+        # timeout) for this transaction only; this also covers waiting on another runner's lock
+        conn.execute(text("SET LOCAL statement_timeout = 0"))
+        conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": MIGRATION_LOCK_ID})
+        _ensure_table(conn)
+        applied = _applied(conn)
+        for m in MIGRATIONS:
+            if m.version in applied:
+                continue
+            print(f"[DB] Applying migration {m.version}: {m.name}")
+            for stmt in m.statements:
+                conn.execute(text(stmt))
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name) VALUES (:v, :n)"),
+                {"v": m.version, "n": m.name},
+            )
+            done.append(m.version)
+    return done
+
+
+def pending_migrations(engine: Engine) -> List[Migration]:
+    with engine.begin() as conn:
+        _ensure_table(conn)
+        applied = _applied(conn)
+    return [m for m in MIGRATIONS if m.version not in applied]
+
+
+def main() -> None:
+    from .database import engine
+
+    parser = argparse.ArgumentParser(description="Apply or inspect schema migrations.")
+    parser.add_argument("--status", action="store_true", help="list pending migrations and exit")
+    args = parser.parse_args()
+    if args.status:
+        pending = {m.version for m in pending_migrations(engine)}
+        for m in MIGRATIONS:
+            print(f"{m.version:>4}  {'pending' if m.version in pending else 'applied'}  {m.name}")
+        return
+    applied = run_migrations(engine)
+    print(f"[DB] Applied {len(applied)} migration(s); schema at version {MIGRATIONS[-1].version}.")
+
+
+if __name__ == "__main__":
+    main()
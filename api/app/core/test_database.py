@@ -0,0 +1,63 @@
+import asyncio
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database import insert_next_version
+from app.core.migrations import run_migrations
+
+PLAN = {"domain": "career", "title": "Plan", "milestones": [], "timeline": []}
+
+
+def _migrated(url):
+    engine = create_engine(url)
+    run_migrations(engine)
+    with engine.begin() as conn:
+        user_id = conn.execute(text("""INSERT INTO "user" (name, email) VALUES ('a', 'a@x') RETURNING id""")).scalar()
+    engine.dispose()
+    return user_id
+
+
+async def _insert_concurrently(url, user_id, domains):
+    engine = create_async_engine(url, pool_size=len(domains), max_overflow=0)
+
+    async def insert(domain):
+        async with AsyncSession(engine) as session:
+            rm = await insert_next_version(session, user_id, domain, PLAN)
+            # keep the transaction open so the other inserts queue on the counter row
+            await asyncio.sleep(0.01)
+            await session.commit()
+            return domain, rm.version
+
+    try:
+        inserted = await asyncio.gather(*(insert(d) for d in domains))
+        async with engine.connect() as conn:
+            rows = (await conn.execute(text(
+                "SELECT domain, version FROM roadmap WHERE user_id = :u ORDER BY domain, version"
+            ), {"u": user_id})).all()
+            counters = dict((await conn.execute(text(
+                "SELECT domain, last_version FROM roadmap_version_counter WHERE user_id = :u"
+            ), {"u": user_id})).all())
+    finally:
+        await engine.dispose()
+    return inserted, [tuple(r) for r in rows], counters
+
+
+def test_concurrent_inserts_get_distinct_consecutive_versions(scratch_url):
+    user_id = _migrated(scratch_url)
+    domains = ["career"] * 20 + ["personal"] * 5
+    inserted, rows, counters = asyncio.run(_insert_concurrently(scratch_url, user_id, domains))
+
+    assert sorted(inserted) == rows
+    assert rows == [("career", v) for v in range(1, 21)] + [("personal", v) for v in range(1, 6)]
+    assert counters == {"career": 20, "personal": 5}
+
+
+def test_versions_continue_after_the_latest(scratch_url):
+    user_id = _migrated(scratch_url)
+    asyncio.run(_insert_concurrently(scratch_url, user_id, ["career"] * 3))
+    inserted, rows, counters = asyncio.run(_insert_concurrently(scratch_url, user_id, ["career"]))
+
+    assert inserted == [("career", 4)]
+    assert counters == {"career": 4}
@@ -0,0 +1,127 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError, ProgrammingError
+
+from app.core import migrations
+from app.core.migrations import MIGRATIONS, Migration, pending_migrations, run_migrations
+
+
+@pytest.fixture
+def engine(scratch_url):
+    engine = create_engine(scratch_url)
+    yield engine
+    engine.dispose()
+
+
+def _rows(engine, sql):
+    with engine.connect() as conn:
+        return [tuple(row) for row in conn.execute(text(sql))]
+
+
+def _upto(version):
+    return [m for m in MIGRATIONS if m.version <= version]
+
+
+def _logged(version):
+    return Migration(version, f"log {version}", [f"INSERT INTO log (version) VALUES ({version})"])
+
+
+def test_pending_migrations_apply_once_in_order(engine, monkeypatch):
+    first = Migration(1, "log table", ["CREATE TABLE log (seq SERIAL, version INTEGER)"])
+    monkeypatch.setattr(migrations, "MIGRATIONS", [first, _logged(2)])
+    assert run_migrations(engine) == [1, 2]
+    monkeypatch.setattr(migrations, "MIGRATIONS", [first, _logged(2), _logged(3), _logged(4)])
+    assert [m.version for m in pending_migrations(engine)] == [3, 4]
+    assert run_migrations(engine) == [3, 4]
+    assert run_migrations(engine) == []
+    assert _rows(engine, "SELECT version FROM log ORDER BY seq") == [(2,), (3,), (4,)]
+    assert _rows(engine, "SELECT version FROM schema_migrations ORDER BY version") == [(1,), (2,), (3,), (4,)]
+
+
+def test_failing_migration_applies_nothing(engine, monkeypatch):
+    first = Migration(1, "log table", ["CREATE TABLE log (seq SERIAL, version INTEGER)"])
+    broken = Migration(3, "broken", ["INSERT INTO missing_table VALUES (1)"])
+    monkeypatch.setattr(migrations, "MIGRATIONS", [first, _logged(2), broken])
+    with pytest.raises(ProgrammingError):
+        run_migrations(engine)
+    # one transaction: the migrations before the failing one are rolled back with it
+    assert [m.version for m in pending_migrations(engine)] == [1, 2, 3]
+
+
+def test_concurrent_runners_apply_each_migration_once(engine):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(run_migrations(engine))) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(results) == [[], [], [m.version for m in MIGRATIONS]]
+    assert pending_migrations(engine) == []
+
+
+def _migrate_to(engine, monkeypatch, version):
+    with monkeypatch.context() as patched:
+        patched.setattr(migrations, "MIGRATIONS", _upto(version))
+        run_migrations(engine)
+
+
+def test_migration_2_merges_duplicate_accounts(engine, monkeypatch):
+    _migrate_to(engine, monkeypatch, 1)
+    with engine.begin() as conn:
+        conn.execute(text(
+            """INSERT INTO "user" (id, name, email) VALUES
+               (1, 'a', 'a@x'), (2, 'a again', 'a@x'), (3, 'b', 'b@x'), (4, 'a third', 'a@x')"""
+        ))
+        conn.execute(text(
+            """INSERT INTO profile (id, user_id, academics_json, career_json, personal_json) VALUES
+               (1, 1, '{"v": 1}', NULL, NULL), (2, 2, NULL, '{"v": 2}', NULL),
+               (3, 3, NULL, NULL, '{"v": 3}'), (4, 3, NULL, NULL, '{"v": 4}'),
+               (5, 4, '{"v": 5}', NULL, NULL)"""
+        ))
+        conn.execute(text(
+            """INSERT INTO roadmap (id, user_id, domain, version, plan_json, created_at) VALUES
+               (1, 1, 'career', 1, '{}', now()), (2, 2, 'career', 1, '{}', now()),
+               (3, 2, 'career', 2, '{}', now()), (4, 3, 'career', 1, '{}', now())"""
+        ))
+        conn.execute(text("INSERT INTO feedback (roadmap_id, signal_type, created_at) VALUES (3, 'too_fast', now())"))
+    run_migrations(engine)
+
+    assert _rows(engine, 'SELECT id, email FROM "user" ORDER BY id') == [(1, "a@x"), (3, "b@x")]
+    # the latest profile stays, filled in from older ones where it has no data
+    assert _rows(engine, "SELECT id, user_id, academics_json, career_json, personal_json FROM profile ORDER BY id") == [
+        (4, 3, None, None, {"v": 4}),
+        (5, 1, {"v": 5}, {"v": 2}, None),
+    ]
+    # the merged chains are renumbered by migration 3
+    assert _rows(engine, "SELECT id, user_id, version FROM roadmap ORDER BY id") == [
+        (1, 1, 1), (2, 1, 2), (3, 1, 3), (4, 3, 1),
+    ]
+    assert _rows(engine, "SELECT roadmap_id FROM feedback") == [(3,)]
+
+
+def test_migration_3_renumbers_duplicate_versions(engine, monkeypatch):
+    _migrate_to(engine, monkeypatch, 2)
+    with engine.begin() as conn:
+        conn.execute(text("""INSERT INTO "user" (id, name, email) VALUES (1, 'a', 'a@x'), (2, 'b', 'b@x')"""))
+        # the old prev.version + 1 logic: two revisions of version 1 both became version 2
+        conn.execute(text(
+            """INSERT INTO roadmap (id, user_id, domain, version, plan_json, created_at) VALUES
+               (1, 1, 'career', 1, '{}', now()), (2, 1, 'career', 2, '{}', now()),
+               (3, 1, 'career', 2, '{}', now()), (4, 1, 'career', 3, '{}', now()),
+               (5, 1, 'personal', 1, '{}', now()), (6, 2, 'career', 1, '{}', now())"""
+        ))
+    run_migrations(engine)
+
+    assert _rows(engine, "SELECT id, version FROM roadmap WHERE user_id = 1 AND domain = 'career' ORDER BY id") == [
+        (1, 1), (2, 2), (3, 3), (4, 4),
+    ]
+    assert _rows(engine, "SELECT user_id, domain, last_version FROM roadmap_version_counter ORDER BY 1, 2") == [
+        (1, "career", 4), (1, "personal", 1), (2, "career", 1),
+    ]
+    with pytest.raises(IntegrityError, match="ix_roadmap_user_domain_version"):
+        with engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO roadmap (id, user_id, domain, version, plan_json, created_at) VALUES (7, 1, 'career', 4, '{}', now())"
+            ))
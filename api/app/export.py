@@ -0,0 +1,105 @@
+"""Streaming NDJSON export of roadmaps with their feedback (GET /export/roadmaps).
+
+One line per roadmap version:
+
+    {"roadmap_id", "user_id", "domain", "version", "created_at", "model", "archived", "plan", "feedback"}
+
+Rows are read through server-side cursors, EXPORT_BATCH_ROWS at a time, and each batch is
+written out before the next is fetched, so memory does not grow with the table. Both reads
+run in one REPEATABLE READ transaction, so hot and archived versions come from the same
+snapshot and a version archived mid-export is neither lost nor exported twice.
+
+Hot versions come in (user_id, domain, version) order. Plans and feedback are spliced in as
+the JSON text Postgres produces. Only versions stored as patches are decoded, to replay them.
+Each row carries the number of patches based on it, so a plan is kept only while later
+patches still need it. After the hot versions come the archived ones, one compressed run of
+versions at a time.
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+
+import orjson
+from sqlalchemy import text
+
+from .core.config import settings
+from .core.database import async_engine, unpack_versions
+from .llm.patch import apply_patch
+
+_HOT = text(
+    """
+    SELECT r.id, r.user_id, r.domain, r.version, r.created_at, r.model, r.base_version,
+           CAST(r.plan_json AS TEXT), CAST(r.patch_json AS TEXT),
+           (SELECT CAST(jsonb_agg(jsonb_build_object(
+                       'id', f.id, 'signal_type', f.signal_type, 'notes', f.notes, 'created_at', f.created_at)
+                   ORDER BY f.id) AS TEXT)
+            FROM feedback f WHERE f.roadmap_id = r.id),
+           (SELECT COUNT(*) FROM roadmap p
+            WHERE p.user_id = r.user_id AND p.domain = r.domain AND p.base_version = r.version)
+    FROM roadmap r
+    WHERE CAST(:domain AS VARCHAR) IS NULL OR r.domain = :domain
+    ORDER BY r.user_id, r.domain, r.version
+    """
+)
+
+_ARCHIVED = text(
+    """
+    SELECT user_id, domain, payload FROM roadmap_archive
+    WHERE CAST(:domain AS VARCHAR) IS NULL OR domain = :domain
+    ORDER BY user_id, domain, first_version
+    """
+)
+
+_LINE = orjson.OPT_APPEND_NEWLINE
+
+
+def _plan(plan: Union[str, Dict[str, Any]]) -> Any:
+    return orjson.Fragment(plan) if isinstance(plan, str) else plan
+
+
+async def export_roadmaps(domain: Optional[str] = None, archived: bool = True) -> AsyncIterator[bytes]:
+    """NDJSON chunks of every roadmap version (of `domain`), one chunk per fetched batch."""
+    batch = max(1, settings.EXPORT_BATCH_ROWS)
+    async with async_engine.connect() as conn:
+        await conn.execution_options(isolation_level="REPEATABLE READ")
+        async with conn.begin():
+            chain = None
+            # bases of the current chain by version: [plan, patches still to come]; the plan is
+            # JSON text, or decoded once a patch needed it
+            bases: Dict[int, List[Any]] = {}
+            result = await conn.stream(_HOT, {"domain": domain})
+            async for rows in result.partitions(batch):
+                lines: List[bytes] = []
+                for rid, user_id, row_domain, version, created_at, model, base, plan, patch, feedback, dependents in rows:
+                    if (user_id, row_domain) != chain:
+                        chain, bases = (user_id, row_domain), {}
+                    if plan is None:
+                        held = bases[base]
+                        if isinstance(held[0], str):
+                            held[0] = orjson.loads(held[0])
+                        plan = apply_patch(held[0], orjson.loads(patch))
+                        held[1] -= 1
+                        if not held[1]:
+                            del bases[base]
+                    if dependents:
+                        bases[version] = [plan, dependents]
+                    lines.append(orjson.dumps({
+                        "roadmap_id": rid, "user_id": user_id, "domain": row_domain, "version": version,
+                        "created_at": created_at.isoformat(), "model": model, "archived": False,
+                        "plan": _plan(plan), "feedback": orjson.Fragment(feedback or "[]"),
+                    }, option=_LINE))
+                yield b"".join(lines)
+
+            if not archived:
+                return
+            # each archive row holds up to ARCHIVE_CHUNK_VERSIONS versions
+            per_fetch = max(1, batch // max(1, settings.ARCHIVE_CHUNK_VERSIONS))
+            result = await conn.stream(_ARCHIVED, {"domain": domain})
+            async for rows in result.partitions(per_fetch):
+                lines = []
+                for user_id, row_domain, payload in rows:
+                    for entry in unpack_versions(payload):
+                        lines.append(orjson.dumps({
+                            "roadmap_id": entry["id"], "user_id": user_id, "domain": row_domain,
+                            "version": entry["version"], "created_at": entry["created_at"], "model": entry.get("model"),
+                            "archived": True, "plan": entry["plan"], "feedback": entry["feedback"],
+                        }, option=_LINE))
+                yield b"".join(lines)
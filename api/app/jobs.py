@@ -0,0 +1,258 @@
+"""Background LLM jobs backed by a Postgres table used as the queue.
+
+Submitting a job only inserts an `llm_job` row; a pool of worker tasks claims rows with
+`FOR UPDATE SKIP LOCKED`, runs the generate/revise flow and stores the result on the row.
+Workers run inside the API process (JOB_WORKERS tasks per worker process) or standalone:
+
+    JOB_WORKERS=0 uvicorn app.main:app ...      # API only
+    python -m app.jobs --concurrency 8           # dedicated worker process
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import signal
+
+import orjson
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+from .core.config import settings
+from .core.database import async_engine, LLMJob
+from .llm.provider import enable_cross_worker_coalescing, enable_similarity_index
+from .profiles import profile_cache
+from .roadmaps import generate_roadmap_version, revise_roadmap_version
+
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+HANDLERS: Dict[str, Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]] = {
+    "generate": lambda p: generate_roadmap_version(p["user_id"], p["domain"]),
+    "revise": lambda p: revise_roadmap_version(p["roadmap_id"], p["feedback"]),
+}
+
+# Oldest claimable job: queued, or running on a worker whose lease ran out (crashed/killed).
+_CLAIM = text(
+    """
+    UPDATE llm_job SET status = 'running', attempts = attempts + 1,
+                       updated_at = (now() AT TIME ZONE 'utc')
+    WHERE id = (
+        SELECT id FROM llm_job
+        WHERE status = 'queued'
+           OR (status = 'running'
+               AND updated_at < (now() AT TIME ZONE 'utc') - make_interval(secs => :lease))
+        ORDER BY id
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING id, kind, payload, attempts
+    """
+)
+
+_FINISH = text(
+    """
+    UPDATE llm_job SET status = :status, result = CAST(:result AS JSONB), error = :error,
+                       attempts = attempts + :extra_attempts, updated_at = (now() AT TIME ZONE 'utc')
+    WHERE id = :id
+    """
+)
+
+_DEPTH = text(
+    """
+    SELECT status, count(*), extract(epoch FROM (now() AT TIME ZONE 'utc') - min(created_at))
+    FROM llm_job WHERE status IN ('queued', 'running') GROUP BY status
+    """
+)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    # 4xx outcomes (missing user/roadmap, bad payload) will not improve on retry
+    return not (isinstance(exc, HTTPException) and exc.status_code < 500) and not isinstance(exc, KeyError)
+
+
+async def enqueue(session: AsyncSession, kind: str, payload: Dict[str, Any]) -> LLMJob:
+    """Insert a queued job and wake local workers; caller's session is committed."""
+    job = LLMJob(kind=kind, payload=payload)
+    session.add(job)
+    await session.commit()
+    job_worker.notify()
+    return job
+
+
+class JobWorker:
+    """Fixed-size pool of asyncio tasks draining the llm_job queue."""
+
+    def __init__(self) -> None:
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+        self._wakeup: Optional[asyncio.Event] = None
+        self._finished: Optional[asyncio.Event] = None
+        self.in_flight = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retries = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self, concurrency: int) -> None:
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._finished = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._loop(), name=f"llm-job-worker-{i}") for i in range(concurrency)]
+
+    async def stop(self) -> None:
+        """Let in-flight jobs finish (up to the grace period); unfinished ones are reclaimed later."""
+        if not self._tasks:
+            return
+        self._stopping = True
+        self.notify()
+        _, pending = await asyncio.wait(self._tasks, timeout=settings.JOB_SHUTDOWN_GRACE_SECONDS)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def wait_for_progress(self, timeout: float) -> None:
+        """Sleep until any local job finishes or `timeout` elapses (used by long-polling)."""
+        finished = self._finished
+        if finished is None:
+            await asyncio.sleep(timeout)
+            return
+        try:
+            await asyncio.wait_for(finished.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _signal_finished(self) -> None:
+        if self._finished is not None:
+            self._finished.set()
+            self._finished = asyncio.Event()
+
+    async def _loop(self) -> None:
+        while not self._stopping:
+            try:
+                claimed = await self._claim()
+            except Exception:
+                # database unavailable: back off and try again
+                await asyncio.sleep(settings.JOB_POLL_SECONDS)
+                continue
+            if claimed is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), settings.JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._execute(*claimed)
+
+    async def _claim(self):
+        async with AsyncSession(async_engine) as session:
+            row = (await session.execute(_CLAIM, {"lease": settings.JOB_LEASE_SECONDS})).first()
+            await session.commit()
+        return tuple(row) if row else None
+
+    async def _execute(self, job_id: int, kind: str, payload: Dict[str, Any], claims: int) -> None:
+        self.in_flight += 1
+        tries = 0
+        status, result, error = "succeeded", None, None
+        try:
+            if claims > settings.JOB_MAX_ATTEMPTS:
+                raise RuntimeError("lease expired too many times")
+            handler = HANDLERS[kind]
+            retrying = AsyncRetrying(
+                stop=stop_after_attempt(settings.JOB_MAX_ATTEMPTS),
+                wait=wait_exponential_jitter(
+                    initial=settings.JOB_RETRY_INITIAL_SECONDS, max=settings.JOB_RETRY_MAX_SECONDS
+                ),
+                retry=retry_if_exception(_is_retryable),
+                reraise=True,
+            )
+            async for attempt in retrying:
+                with attempt:
+                    tries += 1
+                    if tries > 1:
+                        self.retries += 1
+                    result = await handler(payload)
+        except Exception as exc:
+            status = "failed"
+            error = exc.detail if isinstance(exc, HTTPException) else f"{type(exc).__name__}: {exc}"
+        finally:
+            self.in_flight -= 1
+
+        try:
+            async with AsyncSession(async_engine) as session:
+                await session.execute(_FINISH, {
+                    "id": job_id,
+                    "status": status,
+                    "result": orjson.dumps(result).decode() if result is not None else None,
+                    "error": error,
+                    "extra_attempts": max(0, tries - 1),
+                })
+                await session.commit()
+        except Exception:
+            # the row stays 'running' and is reclaimed once its lease expires
+            return
+        if status == "succeeded":
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        self._signal_finished()
+
+    async def stats(self) -> Dict[str, Any]:
+        depth = {"queued": 0, "running": 0}
+        oldest_queued_s = 0.0
+        async with AsyncSession(async_engine) as session:
+            for status, count, age in (await session.execute(_DEPTH)).all():
+                depth[status] = count
+                if status == "queued":
+                    oldest_queued_s = round(float(age or 0), 3)
+        return {
+            "queue_depth": depth,
+            "oldest_queued_s": oldest_queued_s,
+            "worker": {
+                "running": self.running,
+                "concurrency": len(self._tasks),
+                "in_flight": self.in_flight,
+                "succeeded": self.succeeded,
+                "failed": self.failed,
+                "retries": self.retries,
+            },
+        }
+
+
+job_worker = JobWorker()
+
+
+async def _serve(concurrency: int) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    if settings.PLAN_SINGLEFLIGHT_CROSS_WORKER:
+        enable_cross_worker_coalescing(async_engine)
+    if settings.PLAN_SIMILARITY_ENABLED:
+        await enable_similarity_index(async_engine)
+    profile_cache.start_listener()
+    job_worker.start(concurrency)
+    print(f"[jobs] worker started with concurrency={concurrency}")
+    await stop.wait()
+    await job_worker.stop()
+    await profile_cache.stop_listener()
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run LLM job workers outside the API process.")
+    parser.add_argument("--concurrency", type=int, default=max(1, settings.JOB_WORKERS))
+    asyncio.run(_serve(parser.parse_args().concurrency))
+
+
+if __name__ == "__main__":
+    main()
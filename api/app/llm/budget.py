@@ -0,0 +1,210 @@
+"""Token budgeting for LLM prompts.
+
+Counts tokens per call (tiktoken, or ~4 characters per token if its encoding cannot be loaded),
+serializes payloads compactly and, when a plan still does not fit LLM_PROMPT_TOKEN_BUDGET,
+prunes its low-value parts step by step: resource URLs first, then long descriptions, then
+descriptions and resources altogether. `restore_pruned` puts pruned values back on items the
+model returned unchanged, so a full-plan revision does not lose what it never saw.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from functools import lru_cache
+import json
+import math
+
+try:  # exact counts for OpenAI models (in requirements.txt)
+    import tiktoken  # type: ignore
+except ImportError:  # pragma: no cover - heuristic fallback
+    tiktoken = None
+
+DESCRIPTION_CHARS = 120
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    """tiktoken encoding for `model`, or None without tiktoken or when its BPE file is neither
+    cached (TIKTOKEN_CACHE_DIR; the Docker image ships them) nor downloadable."""
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def tokenizer(model: str = "gpt-4o-mini") -> str:
+    """How `count_tokens` counts for `model`: "tiktoken" (exact) or "heuristic"."""
+    return "tiktoken" if _encoding(model) is not None else "heuristic"
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def compact_json(obj: Any) -> str:
+    """No indentation or padding, non-ASCII kept as-is (escapes cost tokens)."""
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _map_milestones(plan: Dict[str, Any], fn: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+    return {**plan, "milestones": [fn(dict(m)) for m in plan.get("milestones") or []]}
+
+
+def _drop_urls(plan: Dict[str, Any]) -> Dict[str, Any]:
+    def strip(resources):
+        return [{k: v for k, v in r.items() if k != "url"} for r in resources or []]
+
+    out = _map_milestones(plan, lambda m: {**m, "resources": strip(m.get("resources"))})
+    out["resources"] = strip(plan.get("resources"))
+    return out
+
+
+def _shorten_descriptions(plan: Dict[str, Any]) -> Dict[str, Any]:
+    def shorten(m):
+        desc = m.get("description")
+        if isinstance(desc, str) and len(desc) > DESCRIPTION_CHARS:
+            m["description"] = desc[:DESCRIPTION_CHARS].rstrip() + "…"
+        return m
+
+    return _map_milestones(plan, shorten)
+
+
+def _drop_descriptions(plan: Dict[str, Any]) -> Dict[str, Any]:
+    return _map_milestones(plan, lambda m: {k: v for k, v in m.items() if k != "description"})
+
+
+def _drop_resources(plan: Dict[str, Any]) -> Dict[str, Any]:
+    out = _map_milestones(plan, lambda m: {k: v for k, v in m.items() if k != "resources"})
+    out.pop("resources", None)
+    return out
+
+
+# cheapest information loss first
+PLAN_PRUNE_STEPS: List[Tuple[str, Callable[[Dict[str, Any]], Dict[str, Any]]]] = [
+    ("resource_urls", _drop_urls),
+    ("long_descriptions", _shorten_descriptions),
+    ("descriptions", _drop_descriptions),
+    ("resources", _drop_resources),
+]
+
+
+def fit_plan(
+    plan: Dict[str, Any], budget: int, render: Callable[[Dict[str, Any]], str], model: str = "gpt-4o-mini"
+) -> Tuple[Dict[str, Any], List[str], int]:
+    """Prune `plan` until `render(plan)` fits `budget` tokens (0 = no budget).
+
+    Returns the plan to send, the prune steps applied and the rendered token count, which can
+    still exceed the budget once every step has been applied.
+    """
+    tokens = count_tokens(render(plan), model)
+    applied: List[str] = []
+    if budget <= 0:
+        return plan, applied, tokens
+    for name, step in PLAN_PRUNE_STEPS:
+        if tokens <= budget:
+            break
+        plan = step(plan)
+        applied.append(name)
+        tokens = count_tokens(render(plan), model)
+    return plan, applied, tokens
+
+
+def _restore_urls(
+    resources: Optional[List[Dict[str, Any]]], original: Optional[List[Dict[str, Any]]], sent: Optional[List[Dict[str, Any]]]
+) -> List[Dict[str, Any]]:
+    """Resources with the URLs that were pruned from `sent` put back by name, where the model
+    left the URL empty."""
+    urls = {r.get("name"): r["url"] for r in original or [] if r.get("url")}
+    pruned = {r.get("name") for r in sent or [] if not r.get("url")}
+    out = []
+    for r in resources or []:
+        name = r.get("name")
+        if not r.get("url") and name in pruned and name in urls:
+            r = {**r, "url": urls[name]}
+        out.append(r)
+    return out
+
+
+def _restore_resources(
+    revised: Dict[str, Any], original: Dict[str, Any], sent: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """`revised`'s resources, or the original ones when they were pruned and the model
+    returned none."""
+    if original.get("resources") and "resources" not in sent and not revised.get("resources"):
+        return original["resources"]
+    return _restore_urls(revised.get("resources"), original.get("resources"), sent.get("resources"))
+
+
+def restore_pruned(original: Dict[str, Any], sent: Dict[str, Any], revised: Dict[str, Any]) -> Dict[str, Any]:
+    """Put pruned values back where the model left them empty (schema defaults such as
+    `url: None` and `resources: []` included) or echoed a shortened description unchanged.
+    Milestones are matched by id and resources by name."""
+    if sent is original:
+        return revised
+    out = dict(revised)
+    out["resources"] = _restore_resources(revised, original, sent)
+    orig_by_id = {m.get("id"): m for m in original.get("milestones") or []}
+    sent_by_id = {m.get("id"): m for m in sent.get("milestones") or []}
+    milestones = []
+    for m in out.get("milestones") or []:
+        orig, seen = orig_by_id.get(m.get("id")), sent_by_id.get(m.get("id"))
+        if orig is not None and seen is not None:
+            m = dict(m)
+            desc, sent_desc = orig.get("description"), seen.get("description")
+            if desc and sent_desc != desc and (not m.get("description") or m.get("description") == sent_desc):
+                m["description"] = desc
+            m["resources"] = _restore_resources(m, orig, seen)
+        milestones.append(m)
+    out["milestones"] = milestones
+    return out
+
+
+class TokenMeter:
+    """Per-worker token accounting for LLM calls."""
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.calls = 0
+        self.prompt_tokens_estimated = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.trimmed_calls = 0
+        self.over_budget_calls = 0
+
+    def record_prompt(self, tokens: int) -> None:
+        """Count one outgoing call and its locally counted prompt size."""
+        self.calls += 1
+        self.prompt_tokens_estimated += tokens
+
+    def record_fit(self, pruned: bool, over_budget: bool) -> None:
+        self.trimmed_calls += int(pruned)
+        self.over_budget_calls += int(over_budget)
+
+    def record_usage(self, usage: Optional[Any]) -> None:
+        """Add the provider-reported `usage` of a completion (None when not reported)."""
+        if usage is None:
+            return
+        self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+        self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.cached_prompt_tokens += getattr(details, "cached_tokens", 0) or 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tokenizer": tokenizer(),
+            "budget": self.budget,
+            "calls": self.calls,
+            "prompt_tokens_estimated": self.prompt_tokens_estimated,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_prompt_tokens": self.cached_prompt_tokens,
+            "avg_prompt_tokens": round(self.prompt_tokens_estimated / self.calls, 1) if self.calls else 0.0,
+            "trimmed_calls": self.trimmed_calls,
+            "over_budget_calls": self.over_budget_calls,
+        }
@@ -0,0 +1,173 @@
+from typing import Dict, Any, Optional, Protocol, Tuple
+from collections import OrderedDict
+import hashlib
+import json
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class CacheBackend(Protocol):
+    """Shared (cross-process) store for cached plans, e.g. Redis or a Postgres table."""
+
+    async def get(self, key: str) -> Optional[str]: ...
+
+    async def set(self, key: str, value: str, ttl_seconds: float) -> None: ...
+
+
+class PostgresCacheBackend:
+    """Shared plan cache in the `plan_cache` table; expired rows are pruned as a side effect of writes."""
+
+    PRUNE_EVERY = 100
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self._writes = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        async with self.engine.connect() as conn:
+            return (await conn.execute(
+                text("SELECT value FROM plan_cache WHERE key = :key AND expires_at > now()"),
+                {"key": key},
+            )).scalar()
+
+    async def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        self._writes += 1
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                text(
+                    """INSERT INTO plan_cache (key, value, expires_at)
+                       VALUES (:key, :value, now() + make_interval(secs => :ttl))
+                       ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, expires_at = EXCLUDED.expires_at"""
+                ),
+                {"key": key, "value": value, "ttl": ttl_seconds},
+            )
+            if self._writes % self.PRUNE_EVERY == 0:
+                await conn.execute(text("DELETE FROM plan_cache WHERE expires_at <= now()"))
+
+
+class LRUCache:
+    """In-process LRU with a per-entry TTL. Not thread-safe; meant for one event loop."""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def normalize_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop empty values and surrounding whitespace so equivalent profiles hash the same."""
+    out: Dict[str, Any] = {}
+    for k, v in profile.items():
+        if isinstance(v, str):
+            v = v.strip()
+        if v is None or v == "":
+            continue
+        out[k] = v
+    return out
+
+
+def plan_cache_key(prompt: str, profile: Dict[str, Any], domain: str, model: str, temperature: float) -> str:
+    """Stable content hash of everything that determines an LLM generation."""
+    material = json.dumps(
+        {
+            "prompt": prompt,
+            "profile": normalize_profile(profile),
+            "domain": domain,
+            "model": model,
+            "temperature": temperature,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class PlanCache:
+    """Two-tier plan cache: local LRU first, then an optional shared backend.
+
+    Plans are stored as JSON text so every hit hands back a fresh dict that callers
+    may mutate freely.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, enabled: bool = True):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.local = LRUCache(max_size, ttl_seconds)
+        self.shared: Optional[CacheBackend] = None
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def use_shared_backend(self, backend: Optional[CacheBackend]) -> None:
+        self.shared = backend
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        raw = self.local.get(key)
+        if raw is not None:
+            self.hits += 1
+            return json.loads(raw)
+        if self.shared is not None:
+            try:
+                raw = await self.shared.get(key)
+            except Exception:
+                raw = None
+            if raw is not None:
+                self.shared_hits += 1
+                self.local.set(key, raw)
+                return json.loads(raw)
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, plan: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        raw = json.dumps(plan, separators=(",", ":"))
+        self.local.set(key, raw)
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, raw, self.ttl_seconds)
+            except Exception:
+                # a flaky shared tier must never fail the request
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self.local),
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,61 @@
+from typing import TYPE_CHECKING, Optional, Tuple
+from functools import lru_cache
+import importlib.util
+
+import httpx
+
+from ..core.config import settings
+
+if TYPE_CHECKING:  # pragma: no cover
+    from openai import AsyncOpenAI
+
+
+@lru_cache(maxsize=1)
+def openai_available() -> bool:
+    """Whether the optional openai package is installed, without importing it (the import
+    costs ~200 ms and is deferred to the first client build)."""
+    return importlib.util.find_spec("openai") is not None
+
+
+class LLMClientManager:
+    """Owns one keep-alive httpx pool and the AsyncOpenAI client bound to it.
+
+    The client is built lazily on first use (or by the lifespan warm-up) and rebuilt only if
+    the API key or base URL changes; `aclose()` is called from the FastAPI lifespan on shutdown.
+    """
+
+    def __init__(self) -> None:
+        self._http: Optional[httpx.AsyncClient] = None
+        self._client: Optional["AsyncOpenAI"] = None
+        self._identity: Optional[Tuple[str, Optional[str]]] = None
+
+    def _build_http(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=settings.LLM_HTTP2,
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_KEEPALIVE,
+                keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            timeout=httpx.Timeout(settings.LLM_TIMEOUT_SECONDS, connect=settings.LLM_CONNECT_TIMEOUT_SECONDS),
+        )
+
+    def get(self, api_key: str, base_url: Optional[str] = None) -> "AsyncOpenAI":
+        identity = (api_key, base_url)
+        if self._client is None or self._identity != identity:
+            from openai import AsyncOpenAI
+
+            if self._http is None:
+                self._http = self._build_http()
+            # retries are owned by the resilience layer (deadline, backoff, circuit breaker)
+            self._client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=self._http, max_retries=0)
+            self._identity = identity
+        return self._client
+
+    async def aclose(self) -> None:
+        http, self._http, self._client, self._identity = self._http, None, None, None
+        if http is not None:
+            await http.aclose()
+
+
+llm_clients = LLMClientManager()
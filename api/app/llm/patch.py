@@ -0,0 +1,125 @@
+"""Plan patches: compute the delta between two plans and apply it back.
+
+Revisions are stored as a `PlanPatch` against the version they revised (see
+`roadmaps.reconstruct_plans`), and in patch mode the LLM answers with one instead of a
+whole plan. `diff_plans` only emits keyed ops when replaying them reproduces the new plan
+exactly; anything else (reordering, duplicate keys) falls back to a `set` of the field.
+"""
+from typing import Any, Dict, List, Optional, Union
+import copy
+
+from .schema import PATCH_KEYS, PatchOp, PlanPatch, RoadmapPlan
+
+
+class PatchError(ValueError):
+    """A patch op does not apply to the plan (unknown target item, bad value)."""
+
+
+def _matches(item: Dict[str, Any], field: str, key: Any) -> bool:
+    value = item.get(field)
+    # LLMs sometimes quote week numbers
+    return value == key or str(value) == str(key)
+
+
+def _find(items: List[Dict[str, Any]], field: str, key: Any) -> int:
+    for i, item in enumerate(items):
+        if _matches(item, field, key):
+            return i
+    raise PatchError(f"no item with {field}={key!r}")
+
+
+def apply_patch(plan: Dict[str, Any], patch: Union[PlanPatch, Dict[str, Any]]) -> Dict[str, Any]:
+    """Return a new plan with `patch` applied; `plan` itself is left untouched.
+
+    Copy-on-write: only the touched lists and items are copied, everything else is shared
+    with `plan`, so replaying a long chain stays cheap. Treat the result as read-only or
+    validate it (which copies) before editing. Stored patches (plain dicts) are trusted and
+    not re-validated; LLM patches go through `PlanPatch` and `validate_plan` before storage.
+    """
+    if isinstance(patch, PlanPatch):
+        ops = patch.ops
+    else:
+        ops = [PatchOp.model_construct(**op) for op in patch.get("ops") or []]
+    out = dict(plan)
+    copied = set()
+    for op in ops:
+        if op.op == "set":
+            out[op.target] = copy.deepcopy(op.value)
+            copied.add(op.target)
+            continue
+        field = PATCH_KEYS.get(op.target)
+        if field is None:
+            raise PatchError(f"{op.op} is not supported on {op.target}")
+        if op.target not in copied:
+            out[op.target] = list(out.get(op.target) or [])
+            copied.add(op.target)
+        items = out[op.target]
+        if op.op == "add":
+            if not isinstance(op.value, dict):
+                raise PatchError("add needs an item object as value")
+            index = len(items) if op.index is None else max(0, min(op.index, len(items)))
+            items.insert(index, copy.deepcopy(op.value))
+        elif op.op == "remove":
+            del items[_find(items, field, op.key)]
+        elif op.op == "modify":
+            if not isinstance(op.value, dict):
+                raise PatchError("modify needs an object of changed fields as value")
+            i = _find(items, field, op.key)
+            items[i] = {**items[i], **copy.deepcopy(op.value)}
+    return out
+
+
+def _diff_keyed(target: str, old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> Optional[List[PatchOp]]:
+    """remove/modify/add ops turning `old` into `new`, or None if that cannot be exact."""
+    field = PATCH_KEYS[target]
+    if new[:len(old)] == old:
+        # pure append (the common revision shape); works even when keys repeat
+        return [PatchOp(op="add", target=target, value=item) for item in new[len(old):]]
+
+    old_keys = [item.get(field) for item in old]
+    new_keys = [item.get(field) for item in new]
+    if len(set(old_keys)) != len(old_keys) or len(set(new_keys)) != len(new_keys) or None in old_keys + new_keys:
+        return None
+    old_by_key = dict(zip(old_keys, old))
+    new_set = set(new_keys)
+    # surviving items must keep their relative order; inserts then land at their final index
+    if [k for k in new_keys if k in old_by_key] != [k for k in old_keys if k in new_set]:
+        return None
+
+    ops: List[PatchOp] = []
+    for key in old_keys:
+        if key not in new_set:
+            ops.append(PatchOp(op="remove", target=target, key=key))
+    for index, item in enumerate(new):
+        key = item[field]
+        prev = old_by_key.get(key)
+        if prev is None:
+            ops.append(PatchOp(op="add", target=target, index=index, value=item))
+        elif prev != item:
+            if set(prev) - set(item):
+                return None  # a field was dropped; a merge cannot express that
+            changed = {f: v for f, v in item.items() if prev.get(f) != v or f not in prev}
+            ops.append(PatchOp(op="modify", target=target, key=key, value=changed))
+    return ops
+
+
+def diff_plans(old: Dict[str, Any], new: Dict[str, Any]) -> PlanPatch:
+    """Smallest-effort patch with `apply_patch(old, diff_plans(old, new)) == new`."""
+    ops: List[PatchOp] = []
+    for target in RoadmapPlan.model_fields:
+        before, after = old.get(target), new.get(target)
+        if before == after and (target in old) == (target in new):
+            continue
+        keyed = None
+        if target in PATCH_KEYS and isinstance(before, list) and isinstance(after, list):
+            keyed = _diff_keyed(target, before, after)
+        if keyed is not None and apply_patch({target: before}, PlanPatch(ops=keyed))[target] == after:
+            ops.extend(keyed)
+        else:
+            ops.append(PatchOp(op="set", target=target, value=after))
+    return PlanPatch(ops=ops)
+
+
+def patch_to_json(patch: PlanPatch) -> Dict[str, Any]:
+    """Compact storage form: unset op fields are dropped."""
+    return patch.model_dump(mode="json", exclude_none=True)
@@ -0,0 +1,269 @@
+"""Local plan engine: deterministic plans and revisions without an LLM.
+
+Picks a track from the template library by domain and target (role, exam or goal), scales each
+step's effort by experience level, style and pace, and packs the hours into weeks of
+`hours_per_week`. Review weeks are inserted per style, and a check-in lands on the week each
+milestone completes. Used when no API key is configured, when PLAN_ENGINE=local, and as the
+fallback when an LLM call fails.
+
+Per-milestone effort and pace are kept in `constraints`, so revisions can reschedule a plan.
+Generation is memoized on the normalized inputs; a cold build takes tens of microseconds.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from functools import lru_cache
+import math
+import re
+
+import orjson
+
+from .schema import ValidatedPlan, ensure_valid
+from .templates import TRACKS, Step, Track
+
+DEFAULT_HOURS = 8
+MAX_HOURS = 60
+# effort multiplier and weeks of work between review weeks (0 = none)
+STYLES: Dict[str, Tuple[float, int]] = {
+    "fast": (0.85, 0),
+    "intensive": (0.85, 0),
+    "balanced": (1.0, 6),
+    "hands-on": (1.0, 6),
+    "project-based": (1.0, 6),
+    "thorough": (1.2, 4),
+    "theory-first": (1.15, 4),
+}
+LEVELS: Dict[str, float] = {"beginner": 1.0, "intermediate": 0.8, "advanced": 0.65}
+MIN_PACE, MAX_PACE = 0.4, 1.6
+SLOWER, FASTER = 0.8, 1.15
+TOPIC_HOURS = 10
+REVIEW_FOCUS = "Review & buffer week"
+
+
+def _hours(profile: Dict[str, Any]) -> int:
+    try:
+        hours = int(float(profile.get("hours_per_week", DEFAULT_HOURS)))
+    except (TypeError, ValueError, OverflowError):
+        return DEFAULT_HOURS
+    return max(1, min(MAX_HOURS, hours))
+
+
+def _target(profile: Dict[str, Any]) -> str:
+    for field in ("target_role", "target_job", "target_exam", "goal"):
+        value = profile.get(field)
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+    return ""
+
+
+def match_track(domain: str, target: str) -> Track:
+    """The first track of `domain` whose keywords appear in `target`, else the domain default."""
+    tracks = TRACKS.get(domain) or TRACKS["career"]
+    text = target.lower()
+    words = set(re.findall(r"[a-z0-9]+", text))
+    for track in tracks[1:]:
+        if any(kw in words if kw.isalnum() else kw in text for kw in track.keywords):
+            return track
+    return tracks[0]
+
+
+def _step_hours(step: Step, level_factor: float, style_factor: float) -> int:
+    return max(1, round(step.hours * level_factor * style_factor))
+
+
+def _milestone(mid: str, step: Step) -> Dict[str, Any]:
+    return {
+        "id": mid,
+        "title": step.title,
+        "description": step.description,
+        "resources": [{"name": name, "url": url} for name, url in step.resources],
+    }
+
+
+def schedule(
+    milestones: List[Dict[str, Any]], hours: Dict[str, float], weekly_hours: float, review_every: int
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Pack milestone effort into weeks of `weekly_hours`, in order, with a review week after
+    every `review_every` weeks of work. Returns (timeline, check_ins)."""
+    weekly_hours = max(0.5, weekly_hours)
+    timeline: List[Dict[str, Any]] = []
+    check_ins: List[Dict[str, Any]] = []
+    week, left, worked = 1, weekly_hours, 0
+    titles: List[str] = []
+
+    def close_week() -> None:
+        nonlocal week, left, worked, titles
+        focus = titles[0] if len(titles) == 1 else f"Finish {titles[0]}; start {titles[-1]}"
+        timeline.append({"week": week, "focus": focus})
+        week, left, worked, titles = week + 1, weekly_hours, worked + 1, []
+        if review_every and worked % review_every == 0:
+            timeline.append({"week": week, "focus": REVIEW_FOCUS})
+            week += 1
+
+    for m in milestones:
+        remaining = hours[m["id"]]
+        done_week = week
+        while remaining > 1e-9:
+            if not titles or titles[-1] != m["title"]:
+                titles.append(m["title"])
+            take = min(remaining, left)
+            remaining -= take
+            left -= take
+            done_week = week
+            if left <= 1e-9:
+                close_week()
+        check_ins.append({"week": done_week, "goal": f"Complete {m['title']}"})
+    if titles:
+        close_week()
+    if timeline and timeline[-1]["focus"] == REVIEW_FOCUS:
+        timeline.pop()
+    return timeline, check_ins
+
+
+def _number(value: Any) -> Optional[float]:
+    """`value` as a finite float, or None if it is not a number."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _params(constraints: Dict[str, Any]) -> Tuple[int, str, float, int]:
+    hours = _hours(constraints)
+    style = str(constraints.get("style") or "balanced").lower()
+    _, review_every = STYLES.get(style, STYLES["balanced"])
+    pace = max(MIN_PACE, min(MAX_PACE, _number(constraints.get("pace") or 1.0) or 1.0))
+    return hours, style, pace, review_every
+
+
+def _assemble(
+    plan: Dict[str, Any], milestones: List[Dict[str, Any]], effort: Dict[str, float], constraints: Dict[str, Any]
+) -> Dict[str, Any]:
+    hours, _, pace, review_every = _params(constraints)
+    timeline, check_ins = schedule(milestones, effort, hours * pace, review_every)
+    constraints = {
+        **constraints,
+        "pace": round(pace, 3),
+        "milestone_hours": {m["id"]: round(effort[m["id"]], 1) for m in milestones},
+        "total_hours": round(sum(effort[m["id"]] for m in milestones), 1),
+        "weeks": len(timeline),
+    }
+    return {**plan, "milestones": milestones, "timeline": timeline, "check_ins": check_ins, "constraints": constraints}
+
+
+@lru_cache(maxsize=4096)
+def _build(domain: str, target: str, hours: int, style: str, level: str) -> bytes:
+    track = match_track(domain, target)
+    style_factor = STYLES.get(style, STYLES["balanced"])[0]
+    level_factor = LEVELS.get(level, 1.0)
+    steps = [s for s in track.steps if not (level == "advanced" and s.foundational)]
+    milestones = [_milestone(f"m{i}", step) for i, step in enumerate(steps, start=1)]
+    effort = {m["id"]: _step_hours(s, level_factor, style_factor) for m, s in zip(milestones, steps)}
+    title = f"{target[:1].upper()}{target[1:]} Plan" if target and track.key == "general" else track.title
+    plan = {
+        "domain": domain,
+        "title": title,
+        "resources": [{"name": name, "url": url} for name, url in track.resources],
+    }
+    constraints = {
+        "hours_per_week": hours, "style": style, "experience_level": level,
+        "track": track.key, **({"target": target} if target else {}),
+    }
+    # validated once per memoized build, so callers can skip validating the copies
+    return orjson.dumps(ensure_valid(_assemble(plan, milestones, effort, constraints)))
+
+
+def build_plan(profile: Dict[str, Any], domain: str) -> Dict[str, Any]:
+    """A plan for `profile`, matched to its target and packed into its weekly hours."""
+    style = str(profile.get("style") or "balanced").lower()
+    level = str(profile.get("experience_level") or "beginner").lower()
+    # memoized on the normalized inputs; each caller gets its own copy
+    return ValidatedPlan(orjson.loads(_build(domain, _target(profile), _hours(profile), style, level)))
+
+
+def adapt_plan(plan: Dict[str, Any], source: Dict[str, Any], profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Reuse `plan`, made for the profile signals `source`, for a similar `profile`: milestones
+    and resources are kept, and the effort they took at the source's pace is re-packed into
+    `profile`'s weekly hours and style."""
+    stored = plan.get("constraints")
+    old = {**(stored if isinstance(stored, dict) else {}), **source}
+    effort = _effort(plan, old)
+    constraints = {
+        **{k: v for k, v in old.items() if k != "target"},
+        "hours_per_week": _hours(profile),
+        "style": str(profile.get("style") or "balanced").lower(),
+        "experience_level": str(profile.get("experience_level") or "beginner").lower(),
+    }
+    return _assemble(plan, [dict(m) for m in plan.get("milestones") or []], effort, constraints)
+
+
+def _effort(plan: Dict[str, Any], constraints: Dict[str, Any]) -> Dict[str, float]:
+    """Stored per-milestone hours; milestones without one (LLM plans, manual edits) share the
+    hours implied by the current timeline."""
+    known = constraints.get("milestone_hours")
+    known = known if isinstance(known, dict) else {}
+    milestones = plan.get("milestones") or []
+    hours, _, pace, _ = _params(constraints)
+    work_weeks = sum(1 for t in plan.get("timeline") or [] if t.get("focus") != REVIEW_FOCUS)
+    default = (work_weeks * hours * pace / len(milestones)) if milestones and work_weeks else TOPIC_HOURS
+    effort: Dict[str, float] = {}
+    for m in milestones:
+        stored = _number(known.get(m["id"]))
+        # hand-edited or corrupt entries (non-numeric, zero, negative) get the default share
+        effort[m["id"]] = stored if stored is not None and stored > 0 else default
+    return effort
+
+
+def _next_id(milestones: List[Dict[str, Any]]) -> str:
+    taken = {m.get("id") for m in milestones}
+    n = len(milestones) + 1
+    while f"m{n}" in taken:
+        n += 1
+    return f"m{n}"
+
+
+def revise_plan(plan: Dict[str, Any], feedback: Dict[str, Any], domain: str) -> Dict[str, Any]:
+    """Apply feedback locally and reschedule: `too_fast` slows the pace, `too_easy` speeds it up
+    and adds the track's next stretch milestone, `missing_topic` inserts a milestone before the
+    last one, `change_goal` rebuilds from the track matching the notes. Milestone ids and
+    content are kept; timeline and check-ins are recomputed."""
+    signal = feedback.get("signal_type") or "other"
+    notes = (feedback.get("notes") or "").strip()
+    constraints = plan.get("constraints")
+    constraints = dict(constraints) if isinstance(constraints, dict) else {}
+    hours, style, pace, _ = _params(constraints)
+    constraints.setdefault("hours_per_week", hours)
+    constraints.setdefault("style", style)
+    level_factor = LEVELS.get(str(constraints.get("experience_level") or "beginner"), 1.0)
+    track = match_track(domain, str(constraints.get("target") or ""))
+
+    if signal == "change_goal" and notes and match_track(domain, notes).key != "general":
+        rebuilt = build_plan({**constraints, "target_role": notes, "target_exam": notes, "goal": notes}, domain)
+        rebuilt["constraints"]["pace"] = round(pace, 3)
+        return _assemble(rebuilt, rebuilt["milestones"], _effort(rebuilt, rebuilt["constraints"]), rebuilt["constraints"])
+
+    milestones = [dict(m) for m in plan.get("milestones") or []]
+    effort = _effort(plan, constraints)
+    if signal == "too_fast":
+        constraints["pace"] = max(MIN_PACE, pace * SLOWER)
+    elif signal == "too_easy":
+        constraints["pace"] = min(MAX_PACE, pace * FASTER)
+        titles = {m.get("title") for m in milestones}
+        step: Optional[Step] = next((s for s in track.stretch if s.title not in titles), None)
+        if step is not None:
+            m = _milestone(_next_id(milestones), step)
+            milestones.append(m)
+            effort[m["id"]] = float(_step_hours(step, level_factor, 1.0))
+    elif signal == "missing_topic":
+        topic = notes or "Additional topic"
+        m = {"id": _next_id(milestones), "title": f"Additional: {topic[:50]}",
+             "description": f"Added per user feedback: {topic}", "resources": []}
+        # before the capstone / final milestone
+        milestones.insert(max(0, len(milestones) - 1), m)
+        effort[m["id"]] = float(max(1, round(TOPIC_HOURS * level_factor)))
+
+    revised = _assemble(plan, milestones, effort, constraints)
+    if revised["timeline"]:
+        goal = f"Review plan changes ({signal}{': ' + notes[:60] if notes else ''})"
+        revised["check_ins"].append({"week": min(2, revised["timeline"][-1]["week"]), "goal": goal})
+        revised["check_ins"].sort(key=lambda c: c["week"])
+    return revised
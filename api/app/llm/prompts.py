@@ -23,11 +23,13 @@ def _build_profile_context(profile: Dict[str, Any], domain: str) -> str:
     return ". ".join(context_parts) + "."
 
 
-def career_prompt(profile: Dict[str, Any]) -> str:
-    profile_ctx = _build_profile_context(profile, "career")
+# Prompt layout: every system message below is static (no profile, plan or feedback in it), so
+# the same prefix is sent byte-for-byte on every call and provider-side prompt caching can
+# reuse it. Everything request-specific goes into the user message, after that prefix.
+
+def career_prompt() -> str:
     return (
-        "You are an expert career coach. Generate a structured JSON roadmap tailored to the user's profile. "
-        f"Profile context: {profile_ctx} "
+        "You are an expert career coach. Generate a structured JSON roadmap for the profile in the user message. "
         "Use ONLY strict JSON, no prose. Required fields: "
         "title (string), domain (\"career\"), milestones (array of {id,title,description,resources}), "
         "timeline (array of {week, focus}), resources (array of {name, url}), check_ins (array of {week, goal}). "
@@ -36,11 +38,9 @@ def career_prompt(profile: Dict[str, Any]) -> str:
     )
 
 
-def academics_prompt(profile: Dict[str, Any]) -> str:
-    profile_ctx = _build_profile_context(profile, "academics")
+def academics_prompt() -> str:
     return (
-        "You are an academic mentor. Generate a structured JSON study roadmap tailored to the user's profile. "
-        f"Profile context: {profile_ctx} "
+        "You are an academic mentor. Generate a structured JSON study roadmap for the profile in the user message. "
         "Use ONLY strict JSON, no prose. Required fields: "
         "title (string), domain (\"academics\"), milestones, timeline, resources, check_ins. "
         "Adapt difficulty, pacing, and milestone depth based on hours_per_week, style, and experience_level. "
@@ -48,17 +48,20 @@ def academics_prompt(profile: Dict[str, Any]) -> str:
     )
 
 
-def personal_prompt(profile: Dict[str, Any]) -> str:
-    profile_ctx = _build_profile_context(profile, "personal")
+def personal_prompt() -> str:
     return (
-        "You are a personal development coach. Generate a structured JSON growth plan tailored to the user's profile. "
-        f"Profile context: {profile_ctx} "
+        "You are a personal development coach. Generate a structured JSON growth plan for the profile in the user message. "
         "Use ONLY strict JSON, no prose. Required fields: "
         "title (string), domain (\"personal\"), milestones, timeline, resources, check_ins. "
         "Ensure milestones are realistic for the given hours_per_week and align with the learning style."
     )
 
 
+def get_generate_message(profile: Dict[str, Any], domain: str, payload_json: str) -> str:
+    """User message for generation: profile context sentence, then the profile JSON."""
+    return f"Profile context: {_build_profile_context(profile, domain)}\n{payload_json}"
+
+
 def get_feedback_fewshot_examples(signal_type: str) -> str:
     """Return few-shot examples for specific feedback types to guide revision."""
     examples = {
@@ -90,31 +93,55 @@ def get_feedback_fewshot_examples(signal_type: str) -> str:
     return examples.get(signal_type, examples["other"])
 
 
-def get_revise_prompt(plan: Dict[str, Any], feedback: Dict[str, Any], domain: str) -> str:
-    """Build revision prompt with feedback-driven few-shot guidance."""
+REVISE_PROMPT = (
+    "You are revising a roadmap based on user feedback. The user message gives the domain, the "
+    "feedback with guidance for its type, and the existing plan JSON. "
+    "Return a NEW strict JSON plan with the same schema. "
+    "Make concrete changes that address the feedback while maintaining plan coherence. "
+    "Preserve valid parts of the original plan that don't conflict with the feedback."
+)
+
+REVISE_PATCH_PROMPT = (
+    "You are revising a roadmap based on user feedback. The user message gives the domain, the "
+    "feedback with guidance for its type, and the existing plan JSON. "
+    "Return ONLY strict JSON of the form "
+    '{"ops": [...]} listing the edits to make, not the whole plan. Each op is one of: '
+    '{"op":"add","target":T,"value":ITEM,"index":N} (index optional, default append), '
+    '{"op":"remove","target":T,"key":K}, '
+    '{"op":"modify","target":T,"key":K,"value":{changed fields}}, '
+    '{"op":"set","target":F,"value":V}. '
+    "T is milestones (K = milestone id), timeline (K = week) or check_ins (K = week); "
+    "F is any top-level field (title, milestones, timeline, resources, check_ins, constraints). "
+    "Items use the same schema as the plan. Make concrete changes that address the feedback "
+    "and leave everything else untouched."
+)
+
+
+def get_revise_prompt(patch_mode: bool = False) -> str:
+    """Static revision instructions (whole new plan, or a patch in patch mode)."""
+    return REVISE_PATCH_PROMPT if patch_mode else REVISE_PROMPT
+
+
+def get_revise_message(feedback: Dict[str, Any], domain: str, payload_json: str) -> str:
+    """User message for revision: domain, feedback-driven few-shot guidance, then plan + feedback JSON."""
     signal_type = feedback.get("signal_type", "other")
     notes = feedback.get("notes", "")
     fewshot = get_feedback_fewshot_examples(signal_type)
-    
     return (
-        f"You are revising a {domain} roadmap based on user feedback. "
-        f"Feedback type: {signal_type}. "
-        f"{'User notes: ' + notes if notes else ''} "
-        f"{fewshot} "
-        "Given the existing plan JSON and this feedback, return a NEW strict JSON plan with the same schema. "
-        "Make concrete changes that address the feedback while maintaining plan coherence. "
-        "Preserve valid parts of the original plan that don't conflict with the feedback."
+        f"Domain: {domain}. Feedback type: {signal_type}. "
+        f"{'User notes: ' + notes + ' ' if notes else ''}"
+        f"{fewshot}\n{payload_json}"
     )
 
 
-def get_generate_prompt(profile: Dict[str, Any], domain: str) -> str:
-    """Get domain-specific prompt with profile conditioning."""
+def get_generate_prompt(domain: str) -> str:
+    """Get the static domain-specific system prompt (profile conditioning is in the user message)."""
     prompt_funcs = {
         "career": career_prompt,
         "academics": academics_prompt,
         "personal": personal_prompt,
     }
     func = prompt_funcs.get(domain, career_prompt)
-    return func(profile)
+    return func()
 
 
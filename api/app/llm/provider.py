@@ -1,145 +1,391 @@
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, List, Optional, Tuple
 import os
-import json
-from .prompts import get_generate_prompt, get_revise_prompt
-from .schema import RoadmapPlan, validate_plan
-
-try:
-    from openai import OpenAI  # type: ignore
-except Exception:  # pragma: no cover - optional import
-    OpenAI = None  # type: ignore
-
-
-def _fallback_plan(profile: Dict[str, Any], domain: str) -> Dict[str, Any]:
-    hours = profile.get("hours_per_week", 8)
-    style = profile.get("style", "balanced")
-    base = {
-        "domain": domain,
-        "title": {
-            "academics": "Structured Study Plan",
-            "career": "Backend Developer Prep Plan",
-            "personal": "Personal Growth Plan",
-        }.get(domain, f"{domain.title()} Plan"),
-        "milestones": [
-            {"id": "m1", "title": "Orientation & Baseline", "resources": []},
-            {"id": "m2", "title": "Core Fundamentals", "resources": []},
-            {"id": "m3", "title": "Projects & Practice", "resources": []},
-            {"id": "m4", "title": "Assessment & Review", "resources": []},
-            {"id": "m5", "title": "Polish & Next Steps", "resources": []}
-        ],
-        "timeline": [{"week": i + 1, "focus": f"Week {i+1} focus"} for i in range(8)],
-        "resources": [],
-        "check_ins": [{"week": 4, "goal": "Midpoint review"}, {"week": 8, "goal": "Final review"}],
-        "constraints": {"hours_per_week": hours, "style": style},
-    }
-    # Validate shape to guarantee downstream correctness
-    return RoadmapPlan.model_validate(base).model_dump()
+from .prompts import get_generate_prompt, get_generate_message, get_revise_prompt, get_revise_message
+from .budget import TokenMeter, compact_json, count_tokens, fit_plan, restore_pruned, tokenizer
+from .schema import PlanPatch, ValidatedPlan, ensure_valid, validate_plan_json
+from .patch import apply_patch
+from .planner import build_plan, revise_plan
+from .stream import PlanStreamParser, plan_events
+from .cache import PlanCache, PostgresCacheBackend, plan_cache_key
+from .singleflight import SingleFlight
+from .resilience import CircuitBreaker, LLMGuard, ServedPaths, fallback_path
+from .client import llm_clients, openai_available
+from .similar import similarity_index
+from ..core.config import settings
+from ..metrics import stage
+
+GENERATE_TEMPERATURE = 0.4
+REVISE_TEMPERATURE = 0.3
+
+# Process-wide cache of LLM-generated plans (local engine plans are cheap and never cached)
+plan_cache = PlanCache(
+    max_size=settings.PLAN_CACHE_SIZE,
+    ttl_seconds=settings.PLAN_CACHE_TTL_SECONDS,
+    enabled=settings.PLAN_CACHE_ENABLED,
+)
+
+# Prompt token accounting for this worker (see /llm/stats)
+token_meter = TokenMeter(budget=settings.LLM_PROMPT_TOKEN_BUDGET)
+
+# Identical concurrent generate/revise calls in this worker share one upstream request
+plan_flight = SingleFlight(enabled=settings.PLAN_SINGLEFLIGHT_ENABLED)
+
+# Deadline, retries, hedging and circuit breaker around every upstream call
+llm_guard = LLMGuard(
+    CircuitBreaker(
+        enabled=settings.LLM_BREAKER_ENABLED,
+        window_seconds=settings.LLM_BREAKER_WINDOW_SECONDS,
+        min_calls=settings.LLM_BREAKER_MIN_CALLS,
+        failure_rate=settings.LLM_BREAKER_FAILURE_RATE,
+        open_seconds=settings.LLM_BREAKER_OPEN_SECONDS,
+    ),
+    deadline_seconds=settings.LLM_DEADLINE_SECONDS,
+    attempt_timeout_seconds=settings.LLM_ATTEMPT_TIMEOUT_SECONDS,
+    max_attempts=settings.LLM_MAX_ATTEMPTS,
+    retry_initial_seconds=settings.LLM_RETRY_INITIAL_SECONDS,
+    retry_max_seconds=settings.LLM_RETRY_MAX_SECONDS,
+    hedge_after_seconds=settings.LLM_HEDGE_AFTER_SECONDS,
+)
+
+# Which path produced each plan: llm, cache, similar, local, or fallback_<reason> (see /llm/stats);
+# coalesced single-flight followers are counted by plan_flight, not here, but are labelled
+# with their leader's path
+served_paths = ServedPaths()
+
+
+def enable_cross_worker_coalescing(engine) -> None:
+    """Share plans between workers: Postgres tier for the plan cache plus a claim per
+    generate call, so a second worker waits for the first and reads its result."""
+    plan_cache.use_shared_backend(PostgresCacheBackend(engine))
+    plan_flight.use_shared_claims(
+        engine, settings.PLAN_SINGLEFLIGHT_LOCK_TIMEOUT_SECONDS, settings.PLAN_SINGLEFLIGHT_POLL_SECONDS,
+    )
+
 
+async def enable_similarity_index(engine) -> None:
+    """Load the stored profile encodings; generate then reuses the plan of a close enough one."""
+    await similarity_index.attach(engine)
 
-def _call_openai_json(prompt: str, profile: Dict[str, Any], domain: str) -> Dict[str, Any]:
+
+def _llm_api_key() -> Optional[str]:
+    """API key for LLM calls, or None when plans come from the local engine (no key, no
+    openai package, or PLAN_ENGINE=local)."""
     api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key or OpenAI is None:
-        return _fallback_plan(profile, domain)
+    if not api_key or not openai_available() or settings.PLAN_ENGINE == "local":
+        return None
+    return api_key
+
+
+def warm_up_llm_client() -> bool:
+    """Build the pooled LLM client (and import openai) and load the tokenizer encoding before
+    the first request; no LLM call is made. Returns False when plans come from the local engine."""
+    api_key = _llm_api_key()
+    if api_key is None:
+        return False
+    llm_clients.get(api_key, os.getenv("OPENAI_BASE_URL") or None)
+    tokenizer(_model())
+    return True
+
+
+def _model() -> str:
+    return os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+
+
+def plan_source(paths: List[str]) -> str:
+    """Model label stored with a roadmap version, from the paths `served_paths.collect()`
+    gathered for its generate/revise call: "local" for the local engine and fallbacks, else
+    the LLM model (cache and similar-profile plans were produced by it too)."""
+    if paths and (paths[-1] == "local" or paths[-1].startswith("fallback")):
+        return "local"
+    return _model()
 
-    try:
-        client = OpenAI(api_key=api_key)
-        system_msg = prompt
-        # Include profile data in user message for additional context
-        user_msg = json.dumps({"profile": profile, "domain": domain}, indent=2)
 
-        rsp = client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+async def _chat_completion(api_key: str, system_msg: str, user_msg: str, temperature: float) -> str:
+    """Run one chat completion under `llm_guard`; returns the raw content. Raises
+    CircuitOpenError while the breaker is open and asyncio.TimeoutError past the deadline."""
+    return await llm_guard.call(lambda: _chat_completion_once(api_key, system_msg, user_msg, temperature))
+
+
+async def _chat_completion_once(api_key: str, system_msg: str, user_msg: str, temperature: float) -> str:
+    # OPENAI_BASE_URL lets local runs point at a stub server instead of the real API
+    client = llm_clients.get(api_key, os.getenv("OPENAI_BASE_URL") or None)
+    token_meter.record_prompt(count_tokens(system_msg, _model()) + count_tokens(user_msg, _model()))
+    with stage("llm_upstream"):
+        rsp = await client.chat.completions.create(
+            model=_model(),
+            # static system prompt first: the shared prefix is what provider prompt caching matches
             messages=[
                 {"role": "system", "content": system_msg},
                 {"role": "user", "content": user_msg},
             ],
-            temperature=0.4,
+            temperature=temperature,
         )
-        content = rsp.choices[0].message.content or "{}"
-        try:
-            data = json.loads(content)
-        except Exception:
-            return _fallback_plan(profile, domain)
-        try:
-            return validate_plan(data).model_dump()
-        except Exception:
-            return _fallback_plan(profile, domain)
-    except Exception:
-        # Network/quota/errors → safe fallback
-        return _fallback_plan(profile, domain)
-
-
-def generate_roadmap_struct(profile: Dict[str, Any], domain: str) -> Dict[str, Any]:
+    token_meter.record_usage(rsp.usage)
+    return rsp.choices[0].message.content or "{}"
+
+
+def _stream_chat_completion(api_key: str, system_msg: str, user_msg: str, temperature: float) -> AsyncIterator[str]:
+    """Same request as `_chat_completion` with `stream=True`; yields content deltas as they
+    arrive. Guarded by the breaker and deadline, but never retried once output has started."""
+    return llm_guard.stream(lambda: _stream_chat_completion_once(api_key, system_msg, user_msg, temperature))
+
+
+async def _stream_chat_completion_once(api_key: str, system_msg: str, user_msg: str, temperature: float) -> AsyncIterator[str]:
+    client = llm_clients.get(api_key, os.getenv("OPENAI_BASE_URL") or None)
+    token_meter.record_prompt(count_tokens(system_msg, _model()) + count_tokens(user_msg, _model()))
+    stream = await client.chat.completions.create(
+        model=_model(),
+        messages=[
+            {"role": "system", "content": system_msg},
+            {"role": "user", "content": user_msg},
+        ],
+        temperature=temperature,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    async for chunk in stream:
+        if chunk.usage is not None:
+            token_meter.record_usage(chunk.usage)
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+async def _stream_plan(api_key: str, system_msg: str, user_msg: str, temperature: float) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Yield ("milestone" | "timeline_entry", item) as items validate, then ("plan", full plan).
+
+    Raises if the finished document does not parse or validate as a RoadmapPlan.
+    """
+    parser = PlanStreamParser()
+    async for delta in _stream_chat_completion(api_key, system_msg, user_msg, temperature):
+        for event in parser.feed(delta):
+            yield event
+    text = parser.text
+    # tolerate a markdown fence around the object
+    yield "plan", validate_plan_json(text[text.find("{"):text.rfind("}") + 1])
+
+
+def _generate_cache_key(prompt: str, profile: Dict[str, Any], domain: str) -> str:
+    return plan_cache_key(prompt, profile, domain, _model(), GENERATE_TEMPERATURE)
+
+
+def _generate_user_message(profile: Dict[str, Any], domain: str) -> str:
+    with stage("profile_context"):
+        return get_generate_message(profile, domain, compact_json({"profile": profile, "domain": domain}))
+
+
+def _revise_messages(
+    plan: Dict[str, Any], feedback: Dict[str, Any], domain: str, patch_mode: bool
+) -> Tuple[str, str, Dict[str, Any]]:
+    """System prompt, user message fitted to LLM_PROMPT_TOKEN_BUDGET, and the plan as sent."""
+    def render(p: Dict[str, Any]) -> str:
+        return get_revise_message(feedback, domain, compact_json({"plan": p, "feedback": feedback}))
+
+    budget = settings.LLM_PROMPT_TOKEN_BUDGET
+    with stage("prompt"):
+        sent, pruned, tokens = fit_plan(plan, budget, render, _model())
+    token_meter.record_fit(pruned=bool(pruned), over_budget=budget > 0 and tokens > budget)
+    return get_revise_prompt(patch_mode), render(sent), sent
+
+
+async def _coalesced(
+    key: str,
+    fn: Callable[[], Awaitable[Dict[str, Any]]],
+    recheck: Optional[Callable[[], Awaitable[Optional[Dict[str, Any]]]]] = None,
+) -> Dict[str, Any]:
+    """`plan_flight.do` for a plan call. The leader returns the served paths `fn` recorded
+    along with the plan, and every caller sharing the call adds them to its own collection,
+    so a follower's version is labelled by what actually produced the plan."""
+
+    async def lead() -> Tuple[Dict[str, Any], List[str]]:
+        with served_paths.collecting() as paths:
+            return await fn(), paths
+
+    async def shared() -> Optional[Tuple[Dict[str, Any], List[str]]]:
+        # another worker's result from the shared plan cache, which holds only LLM plans
+        found = await recheck()
+        return None if found is None else (found, ["cache"])
+
+    plan, paths = await plan_flight.do(key, lead, recheck=shared if recheck is not None else None)
+    served_paths.adopt(paths)
+    return plan
+
+
+async def _call_openai_json(prompt: str, profile: Dict[str, Any], domain: str) -> Dict[str, Any]:
+    api_key = _llm_api_key()
+    if api_key is None:
+        served_paths.record("local")
+        return build_plan(profile, domain)
+
+    cache_key = _generate_cache_key(prompt, profile, domain)
+    cached = await plan_cache.get(cache_key)
+    if cached is not None:
+        served_paths.record("cache")
+        # only validated plans are cached
+        return ValidatedPlan(cached)
+
+    similar = await similarity_index.lookup(profile, domain)
+    if similar is not None:
+        served_paths.record("similar")
+        return similar
+
+    return await _coalesced(
+        cache_key,
+        lambda: _generate_uncached(api_key, prompt, profile, domain, cache_key),
+        recheck=lambda: plan_cache.get(cache_key),
+    )
+
+
+async def _generate_uncached(api_key: str, prompt: str, profile: Dict[str, Any], domain: str, cache_key: str) -> Dict[str, Any]:
+    try:
+        system_msg = prompt
+        # Profile context and data go in the user message, after the static system prefix
+        user_msg = _generate_user_message(profile, domain)
+
+        content = await _chat_completion(api_key, system_msg, user_msg, temperature=GENERATE_TEMPERATURE)
+        plan = validate_plan_json(content)
+    except Exception as exc:
+        # Circuit open/deadline/network/quota/invalid output → safe fallback
+        served_paths.record(fallback_path(exc))
+        return build_plan(profile, domain)
+
+    served_paths.record("llm")
+    await plan_cache.set(cache_key, plan)
+    await similarity_index.record(profile, domain, plan)
+    return plan
+
+
+async def generate_roadmap_struct(profile: Dict[str, Any], domain: str) -> Dict[str, Any]:
     """Generate roadmap with profile-conditioned prompts."""
-    prompt = get_generate_prompt(profile, domain)
-    return _call_openai_json(prompt, profile, domain)
+    prompt = get_generate_prompt(domain)
+    return await _call_openai_json(prompt, profile, domain)
+
+
+async def stream_generate_roadmap_struct(profile: Dict[str, Any], domain: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Streaming `generate_roadmap_struct`: yields each validated milestone / timeline entry as
+    the LLM produces it, then ("plan", plan). The final plan is authoritative; if the stream
+    breaks or the finished plan fails validation it is the fallback plan."""
+    api_key = _llm_api_key()
+    if api_key is None:
+        served_paths.record("local")
+        plan = build_plan(profile, domain)
+        for event in plan_events(plan):
+            yield event
+        yield "plan", plan
+        return
+
+    prompt = get_generate_prompt(domain)
+    cache_key = _generate_cache_key(prompt, profile, domain)
+    cached = await plan_cache.get(cache_key)
+    if cached is not None:
+        served_paths.record("cache")
+        cached = ValidatedPlan(cached)
+        for event in plan_events(cached):
+            yield event
+        yield "plan", cached
+        return
 
+    similar = await similarity_index.lookup(profile, domain)
+    if similar is not None:
+        served_paths.record("similar")
+        for event in plan_events(similar):
+            yield event
+        yield "plan", similar
+        return
 
-def revise_roadmap_struct(plan: Dict[str, Any], feedback: Dict[str, Any], domain: str) -> Dict[str, Any]:
+    plan: Optional[Dict[str, Any]] = None
+    try:
+        user_msg = _generate_user_message(profile, domain)
+        async for name, data in _stream_plan(api_key, prompt, user_msg, GENERATE_TEMPERATURE):
+            if name == "plan":
+                plan = data
+            else:
+                yield name, data
+    except Exception as exc:
+        # Circuit open/deadline/network/quota/parse/validation errors → safe fallback
+        served_paths.record(fallback_path(exc))
+        plan = None
+
+    if plan is None:
+        plan = build_plan(profile, domain)
+    else:
+        served_paths.record("llm")
+        await plan_cache.set(cache_key, plan)
+        await similarity_index.record(profile, domain, plan)
+    yield "plan", plan
+
+
+async def revise_roadmap_struct(plan: Dict[str, Any], feedback: Dict[str, Any], domain: str) -> Dict[str, Any]:
     """Revise roadmap using feedback-driven prompts with few-shot examples."""
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key or OpenAI is None:
-        # Local revision with feedback-aware adjustments
-        try:
-            validated = validate_plan(plan).model_dump()
-        except Exception:
-            validated = _fallback_plan({}, domain)
-        
-        signal_type = feedback.get("signal_type", "other")
-        notes = feedback.get("notes") or signal_type
-        
-        # Apply feedback-aware local edits
-        if signal_type == "too_fast" and validated.get("timeline"):
-            # Extend timeline by adding buffer weeks
-            last_week = max([t.get("week", 0) for t in validated.get("timeline", [])], default=0)
-            validated["timeline"].extend([
-                {"week": last_week + 1, "focus": "Buffer week for review"},
-                {"week": last_week + 2, "focus": "Additional practice"}
-            ])
-        elif signal_type == "too_easy" and validated.get("milestones"):
-            # Add challenge note to first milestone
-            if validated["milestones"]:
-                validated["milestones"][0]["description"] = (
-                    (validated["milestones"][0].get("description") or "") + 
-                    " [Enhanced: Increased difficulty per feedback]"
-                ).strip()
-        elif signal_type == "missing_topic" and notes:
-            # Add a new milestone for missing topic
-            new_id = f"m{len(validated.get('milestones', [])) + 1}"
-            validated.setdefault("milestones", []).append({
-                "id": new_id,
-                "title": f"Additional: {notes[:50]}",
-                "description": f"Added per user feedback: {notes}",
-                "resources": []
-            })
-        
-        validated.setdefault("check_ins", []).append({
-            "week": len(validated.get("timeline", [])) + 1,
-            "goal": f"Review changes from {signal_type} feedback"
-        })
-        return validate_plan(validated).model_dump()
+    api_key = _llm_api_key()
+    if api_key is None:
+        served_paths.record("local")
+        return revise_plan(plan, feedback, domain)
 
+    patch_mode = settings.REVISE_PATCH_MODE
+    system_msg = get_revise_prompt(patch_mode)
+    # double-submitted revisions of the same plan with the same feedback share one call
+    flight_key = plan_cache_key(
+        system_msg, {"plan": plan, "feedback": feedback}, domain, _model(), REVISE_TEMPERATURE,
+    )
+    if patch_mode:
+        return await _coalesced(flight_key, lambda: _revise_patch_uncached(api_key, plan, feedback, domain))
+    return await _coalesced(flight_key, lambda: _revise_uncached(api_key, plan, feedback, domain))
+
+
+async def _revise_patch_uncached(api_key: str, plan: Dict[str, Any], feedback: Dict[str, Any], domain: str) -> Dict[str, Any]:
+    """Patch mode: the LLM sees the (budgeted) plan and answers with a PlanPatch, applied here
+    to the full plan, so pruned fields are never lost."""
     try:
-        client = OpenAI(api_key=api_key)
-        system_msg = get_revise_prompt(plan, feedback, domain)
-        user_msg = json.dumps({"plan": plan, "feedback": feedback}, indent=2)
-        rsp = client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-            messages=[
-                {"role": "system", "content": system_msg},
-                {"role": "user", "content": user_msg},
-            ],
-            temperature=0.3,
-        )
-        content = rsp.choices[0].message.content or "{}"
-        try:
-            data = json.loads(content)
-        except Exception:
-            return plan
-        try:
-            return validate_plan(data).model_dump()
-        except Exception:
-            return plan
-    except Exception:
-        # Network/quota/errors → keep prior plan but remain functional
-        return plan
+        system_msg, user_msg, _ = _revise_messages(plan, feedback, domain, patch_mode=True)
+        content = await _chat_completion(api_key, system_msg, user_msg, temperature=REVISE_TEMPERATURE)
+        patch = PlanPatch.model_validate_json(content)
+        revised = ensure_valid(apply_patch(plan, patch))
+    except Exception as exc:
+        # Circuit open/deadline/network/quota/invalid or inapplicable patch → local engine
+        served_paths.record(fallback_path(exc))
+        return revise_plan(plan, feedback, domain)
+    served_paths.record("llm")
+    return revised
+
+
+async def _revise_uncached(api_key: str, plan: Dict[str, Any], feedback: Dict[str, Any], domain: str) -> Dict[str, Any]:
+    try:
+        system_msg, user_msg, sent = _revise_messages(plan, feedback, domain, patch_mode=False)
+        content = await _chat_completion(api_key, system_msg, user_msg, temperature=REVISE_TEMPERATURE)
+        # restore_pruned returns the validated plan itself when nothing was pruned
+        revised = ensure_valid(restore_pruned(plan, sent, validate_plan_json(content)))
+    except Exception as exc:
+        # Circuit open/deadline/network/quota/invalid output → revise with the local engine
+        served_paths.record(fallback_path(exc))
+        return revise_plan(plan, feedback, domain)
+    served_paths.record("llm")
+    return revised
+
+
+async def stream_revise_roadmap_struct(plan: Dict[str, Any], feedback: Dict[str, Any], domain: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Streaming `revise_roadmap_struct`: yields validated items as they arrive, then ("plan", plan).
+    On any failure the final plan is the local engine's revision, as in the non-streaming path."""
+    api_key = _llm_api_key()
+    if api_key is None or settings.REVISE_PATCH_MODE:
+        # local revision, or a short patch response: nothing worth streaming, replay the result
+        revised = await revise_roadmap_struct(plan, feedback, domain)
+        for event in plan_events(revised):
+            yield event
+        yield "plan", revised
+        return
+
+    revised = None
+    try:
+        system_msg, user_msg, sent = _revise_messages(plan, feedback, domain, patch_mode=False)
+        async for name, data in _stream_plan(api_key, system_msg, user_msg, temperature=REVISE_TEMPERATURE):
+            if name == "plan":
+                revised = ensure_valid(restore_pruned(plan, sent, data))
+            else:
+                yield name, data
+    except Exception as exc:
+        # Circuit open/deadline/network/quota/errors → revise with the local engine
+        served_paths.record(fallback_path(exc))
+        revised = None
+    if revised is not None:
+        served_paths.record("llm")
+    yield "plan", revised if revised is not None else revise_plan(plan, feedback, domain)
@@ -0,0 +1,308 @@
+"""Resilience for upstream LLM calls: deadlines, retries, hedging and a circuit breaker.
+
+`LLMGuard.call` runs one logical completion: every attempt has its own timeout, transient
+provider errors are retried with jittered exponential backoff, a slow attempt can be hedged
+with a second identical request (first answer wins), and the whole thing is bounded by one
+deadline. The circuit breaker watches provider faults over a rolling window; while it is open,
+calls fail immediately with `CircuitOpenError` and the provider serves the local plan engine
+instead. After `open_seconds` a single probe call is let through to test recovery.
+
+`ServedPaths` counts which path answered each generate/revise (LLM, cache, local engine, or
+a fallback and why), reported by `GET /llm/stats`.
+"""
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterator, List, Optional, Tuple, TypeVar
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import sys
+import time
+
+import httpx
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(RuntimeError):
+    """The breaker is open: the provider is failing and calls are short-circuited."""
+
+
+def is_provider_fault(exc: BaseException) -> bool:
+    """Timeouts, connection errors, 429 and 5xx: worth retrying and counted by the breaker.
+    Other errors (4xx, unparsable output) mean the provider is up."""
+    if isinstance(exc, (asyncio.TimeoutError, httpx.TransportError)):
+        return True
+    # openai is imported lazily by the client: until it is loaded none of its errors can occur
+    openai = sys.modules.get("openai")
+    if openai is None:
+        return False
+    if isinstance(exc, openai.APIConnectionError):
+        return True
+    status = getattr(exc, "status_code", None) if isinstance(exc, openai.APIStatusError) else None
+    return status is not None and (status == 429 or status >= 500)
+
+
+class CircuitBreaker:
+    """Closed -> open when at least `min_calls` calls in the last `window_seconds` ran and the
+    share of provider faults reached `failure_rate`; open -> half-open after `open_seconds`,
+    where one probe decides between closed and open again."""
+
+    def __init__(self, enabled: bool = True, window_seconds: float = 30.0, min_calls: int = 10,
+                 failure_rate: float = 0.5, open_seconds: float = 15.0):
+        self.enabled = enabled
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.state = "closed"
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._opened_at = 0.0
+        self._probing = False
+        self.opened = 0
+
+    def allow(self) -> bool:
+        if not self.enabled or self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                return False
+            self.state = "half_open"
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record(self, ok: bool) -> None:
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if self.state == "open":
+            # late results of calls admitted before the breaker opened
+            return
+        if self.state == "half_open":
+            self._probing = False
+            if ok:
+                self.state = "closed"
+                self._outcomes.clear()
+            else:
+                self._open(now)
+            return
+        self._outcomes.append((now, ok))
+        while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+            self._outcomes.popleft()
+        failures = sum(1 for _, good in self._outcomes if not good)
+        if len(self._outcomes) >= self.min_calls and failures >= self.failure_rate * len(self._outcomes):
+            self._open(now)
+
+    def release(self) -> None:
+        """A call that was allowed ended without an outcome (cancelled)."""
+        self._probing = False
+
+    def _open(self, now: float) -> None:
+        self.state = "open"
+        self._opened_at = now
+        self._outcomes.clear()
+        self.opened += 1
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        recent = [good for t, good in self._outcomes if t >= now - self.window_seconds]
+        return {
+            "enabled": self.enabled,
+            "state": self.state,
+            "opened": self.opened,
+            "window_calls": len(recent),
+            "window_failures": sum(1 for good in recent if not good),
+        }
+
+
+class LLMGuard:
+    """Deadline, per-attempt timeout, retries with jitter and optional hedging around one call."""
+
+    def __init__(self, breaker: CircuitBreaker, deadline_seconds: float, attempt_timeout_seconds: float,
+                 max_attempts: int, retry_initial_seconds: float, retry_max_seconds: float,
+                 hedge_after_seconds: float = 0.0):
+        self.breaker = breaker
+        self.deadline_seconds = deadline_seconds
+        self.attempt_timeout_seconds = attempt_timeout_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.retry_initial_seconds = retry_initial_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.hedge_after_seconds = hedge_after_seconds
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedges_won = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.short_circuited = 0
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run `fn` (one upstream request) under the breaker, retries, hedging and deadline."""
+        if not self.breaker.allow():
+            self.short_circuited += 1
+            raise CircuitOpenError("LLM circuit open")
+        self.calls += 1
+        try:
+            result = await asyncio.wait_for(self._with_retries(fn), self.deadline_seconds)
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception as exc:
+            self._failed(exc)
+            raise
+        self.breaker.record(True)
+        return result
+
+    async def stream(self, open_stream: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """Guard a streamed call: breaker, deadline for the whole stream and `attempt_timeout`
+        between chunks. Not retried or hedged, since output has already been consumed."""
+        if not self.breaker.allow():
+            self.short_circuited += 1
+            raise CircuitOpenError("LLM circuit open")
+        self.calls += 1
+        self.attempts += 1
+        deadline = time.monotonic() + self.deadline_seconds
+        chunks = open_stream().__aiter__()
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), min(remaining, self.attempt_timeout_seconds))
+                except StopAsyncIteration:
+                    break
+                yield chunk
+        except (asyncio.CancelledError, GeneratorExit):
+            self.breaker.release()
+            raise
+        except Exception as exc:
+            self._failed(exc)
+            raise
+        self.breaker.record(True)
+
+    def _failed(self, exc: BaseException) -> None:
+        self.failures += 1
+        if isinstance(exc, asyncio.TimeoutError):
+            self.timeouts += 1
+        self.breaker.record(not is_provider_fault(exc))
+
+    async def _with_retries(self, fn: Callable[[], Awaitable[T]]) -> T:
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=wait_exponential_jitter(
+                initial=self.retry_initial_seconds, max=self.retry_max_seconds, jitter=self.retry_initial_seconds
+            ),
+            retry=retry_if_exception(is_provider_fault),
+            reraise=True,
+        )
+        tries = 0
+        async for attempt in retrying:
+            with attempt:
+                tries += 1
+                if tries > 1:
+                    self.retries += 1
+                return await self._hedged(fn)
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    async def _attempt(self, fn: Callable[[], Awaitable[T]]) -> T:
+        self.attempts += 1
+        return await asyncio.wait_for(fn(), self.attempt_timeout_seconds)
+
+    async def _hedged(self, fn: Callable[[], Awaitable[T]]) -> T:
+        if self.hedge_after_seconds <= 0:
+            return await self._attempt(fn)
+        first = asyncio.ensure_future(self._attempt(fn))
+        second: Optional["asyncio.Future[T]"] = None
+        try:
+            done, _ = await asyncio.wait({first}, timeout=self.hedge_after_seconds)
+            if done:
+                return first.result()
+            # slow first attempt: race an identical second request against it
+            self.hedges += 1
+            second = asyncio.ensure_future(self._attempt(fn))
+            pending = {first, second}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedges_won += 1
+                        return task.result()
+                    error = task.exception()
+            raise error  # type: ignore[misc]
+        finally:
+            for task in (first, second):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "breaker": self.breaker.stats(),
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedges_won": self.hedges_won,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "short_circuited": self.short_circuited,
+        }
+
+
+def fallback_path(exc: BaseException) -> str:
+    """Served-path name for a request answered by the local engine after `exc`."""
+    if isinstance(exc, CircuitOpenError):
+        return "fallback_circuit_open"
+    if isinstance(exc, asyncio.TimeoutError):
+        return "fallback_timeout"
+    if isinstance(exc, ValueError):  # JSON decode and schema validation errors
+        return "fallback_invalid_output"
+    return "fallback_error"
+
+
+class ServedPaths:
+    """Counts of which path produced each generated or revised plan."""
+
+    def __init__(self) -> None:
+        self.counts: Counter = Counter()
+        self._collected: ContextVar[Optional[List[str]]] = ContextVar("served_paths", default=None)
+
+    def record(self, path: str) -> None:
+        self.counts[path] += 1
+        collected = self._collected.get()
+        if collected is not None:
+            collected.append(path)
+
+    def collect(self) -> List[str]:
+        """Start collecting the paths recorded from now on in the current context (the
+        calling task and the tasks it starts, e.g. a single-flight leader); returns the list
+        they are appended to."""
+        collected: List[str] = []
+        self._collected.set(collected)
+        return collected
+
+    @contextmanager
+    def collecting(self) -> Iterator[List[str]]:
+        """Collect the paths recorded inside the block into a fresh list, instead of the
+        current context's; the outer collection is restored on exit."""
+        collected: List[str] = []
+        token = self._collected.set(collected)
+        try:
+            yield collected
+        finally:
+            self._collected.reset(token)
+
+    def adopt(self, paths: List[str]) -> None:
+        """Add `paths`, recorded (and counted) elsewhere, to the current context's collection."""
+        collected = self._collected.get()
+        if collected is not None:
+            collected.extend(paths)
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counts)
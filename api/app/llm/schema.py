@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, HttpUrl, ValidationError
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional, Union
 
 
 class Resource(BaseModel):
@@ -38,3 +38,43 @@ def validate_plan(data: dict) -> RoadmapPlan:
     return RoadmapPlan.model_validate(data)
 
 
+class ValidatedPlan(dict):
+    """A plan in its validated JSON form (defaults filled in, URLs normalized), as returned by
+    `validate_plan_json` and `ensure_valid`. `ensure_valid` passes these through without
+    checking them again; code that edits a plan builds a new plain dict instead."""
+
+    __slots__ = ()
+
+
+def validate_plan_json(raw: Union[str, bytes]) -> ValidatedPlan:
+    """Parse and validate raw LLM output in one pass (no intermediate `json.loads`)."""
+    return ValidatedPlan(RoadmapPlan.model_validate_json(raw).model_dump(mode="json"))
+
+
+def ensure_valid(plan: Dict[str, Any]) -> ValidatedPlan:
+    """`plan` validated and normalized; free for plans that already are."""
+    if isinstance(plan, ValidatedPlan):
+        return plan
+    return ValidatedPlan(RoadmapPlan.model_validate(plan).model_dump(mode="json"))
+
+
+# Keyed plan collections: patch ops address their items by this field
+PATCH_KEYS = {"milestones": "id", "timeline": "week", "check_ins": "week"}
+
+
+class PatchOp(BaseModel):
+    """One edit to a plan.
+
+    `set` replaces a top-level field with `value`. On `milestones`, `timeline` and `check_ins`,
+    `add` inserts the item `value` at `index` (appends when omitted), `remove` deletes the item
+    whose id/week is `key`, and `modify` merges the fields in `value` into that item.
+    """
+    op: Literal["set", "add", "remove", "modify"]
+    target: Literal["title", "domain", "milestones", "timeline", "resources", "check_ins", "constraints"]
+    key: Optional[Union[int, str]] = None
+    index: Optional[int] = None
+    value: Any = None
+
+
+class PlanPatch(BaseModel):
+    ops: List[PatchOp] = Field(default_factory=list)
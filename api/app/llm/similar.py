@@ -0,0 +1,271 @@
+"""Nearest-neighbour reuse of LLM plans for similar profiles.
+
+Profiles are encoded from the signals that condition a generation (target role / exam / goal,
+experience level, learning style, hours per week) as fixed-size float32 vectors made of
+weighted unit blocks, so one dot product is a similarity in [-1, 1]:
+
+- target: bag of words, two signed hashed dimensions per word (cosine), or a dedicated
+  "no target" dimension
+- level and style group (styles the planner treats alike share a group): one-hot
+- hours: an angle proportional to log(hours), so the dot product falls with the ratio
+
+`SimilarityIndex` keeps one matrix per domain in memory. It is persisted in the
+`profile_index` table (one LLM plan per distinct encoding), loaded at startup and refreshed
+incrementally from other workers' inserts. A generate whose nearest neighbour scores at least
+PLAN_SIMILARITY_THRESHOLD reuses that plan, rescheduled to the profile's hours and style by
+the local engine (`adapt_plan`), instead of calling the LLM.
+"""
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+from functools import lru_cache
+import hashlib
+import re
+import time
+
+import numpy as np
+import orjson
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .planner import LEVELS, STYLES, _hours, _target, adapt_plan
+from .schema import ensure_valid
+from ..core.config import settings
+
+TARGET_DIMS = 64
+STYLE_GROUPS = sorted(set(STYLES.values()))
+LEVEL_NAMES = list(LEVELS)
+WEIGHTS = {"target": 0.55, "level": 0.15, "style": 0.1, "hours": 0.2}
+# log2(hours) spans 0..log2(60); mapped onto a quarter turn so the cosine stays monotonic
+HOURS_SCALE = (np.pi / 2) / np.log2(60)
+
+_NO_TARGET = TARGET_DIMS
+_LEVEL0 = _NO_TARGET + 1
+_STYLE0 = _LEVEL0 + len(LEVEL_NAMES)
+_HOURS0 = _STYLE0 + len(STYLE_GROUPS)
+DIMS = _HOURS0 + 2
+
+# ids below the high-water mark that may still commit after a refresh passed them
+REFRESH_OVERLAP = 1000
+# partitions above this size are scanned in a thread, off the event loop
+THREAD_SCAN_ROWS = 100_000
+
+
+def profile_signals(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """The generation-relevant signals of a profile, normalized as the local engine reads them."""
+    return {
+        "target": _target(profile).lower(),
+        "experience_level": str(profile.get("experience_level") or "beginner").lower(),
+        "style": str(profile.get("style") or "balanced").lower(),
+        "hours_per_week": _hours(profile),
+    }
+
+
+@lru_cache(maxsize=65536)
+def _word_features(word: str) -> Tuple[Tuple[int, float], Tuple[int, float]]:
+    """Two signed hashed dimensions per word: two words only look alike if both collide."""
+    h = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "little")
+    return tuple(((part >> 1) % TARGET_DIMS, 1.0 if part & 1 else -1.0)
+                 for part in (h & 0xFFFFFFFF, h >> 32))
+
+
+def encode_profiles(profiles: List[Dict[str, Any]]) -> np.ndarray:
+    """(n, DIMS) float32 encodings of `profiles`; rows have unit norm."""
+    n = len(profiles)
+    signals = [profile_signals(p) for p in profiles]
+    out = np.zeros((n, DIMS), dtype=np.float32)
+
+    rows: List[int] = []
+    cols: List[int] = []
+    signs: List[float] = []
+    for i, s in enumerate(signals):
+        for w in set(re.findall(r"[a-z0-9]+", s["target"])):
+            for col, sign in _word_features(w):
+                rows.append(i)
+                cols.append(col)
+                signs.append(sign)
+    np.add.at(out, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), np.array(signs, dtype=np.float32))
+    target = out[:, :TARGET_DIMS]
+    norms = np.linalg.norm(target, axis=1)
+    out[norms == 0, _NO_TARGET] = 1.0
+    np.divide(target, norms[:, None], out=target, where=norms[:, None] > 0)
+    out[:, :_NO_TARGET + 1] *= np.sqrt(WEIGHTS["target"])
+
+    levels = np.array([LEVEL_NAMES.index(s["experience_level"]) if s["experience_level"] in LEVELS else 0
+                       for s in signals], dtype=np.intp)
+    out[np.arange(n), _LEVEL0 + levels] = np.sqrt(WEIGHTS["level"])
+    default_group = STYLE_GROUPS.index(STYLES["balanced"])
+    styles = np.array([STYLE_GROUPS.index(STYLES[s["style"]]) if s["style"] in STYLES else default_group
+                       for s in signals], dtype=np.intp)
+    out[np.arange(n), _STYLE0 + styles] = np.sqrt(WEIGHTS["style"])
+
+    angle = np.log2(np.array([s["hours_per_week"] for s in signals], dtype=np.float32)) * HOURS_SCALE
+    out[:, _HOURS0] = np.cos(angle) * np.sqrt(WEIGHTS["hours"])
+    out[:, _HOURS0 + 1] = np.sin(angle) * np.sqrt(WEIGHTS["hours"])
+    return out
+
+
+class _Partition:
+    """Encodings of one domain in a growable matrix."""
+
+    def __init__(self) -> None:
+        self.vectors = np.empty((1024, DIMS), dtype=np.float32)
+        self.ids = np.empty(1024, dtype=np.int64)
+        self.size = 0
+
+    def add(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        need = self.size + len(ids)
+        if need > len(self.ids):
+            capacity = max(need, 2 * len(self.ids))
+            self.vectors = np.resize(self.vectors, (capacity, DIMS))
+            self.ids = np.resize(self.ids, capacity)
+        self.vectors[self.size:need] = vectors
+        self.ids[self.size:need] = ids
+        self.size = need
+
+    def nearest(self, query: np.ndarray) -> Tuple[int, float]:
+        scores = self.vectors[:self.size] @ query
+        i = int(np.argmax(scores))
+        return int(self.ids[i]), float(scores[i])
+
+
+class SimilarityIndex:
+    def __init__(self, threshold: float, refresh_seconds: float, enabled: bool = True):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.refresh_seconds = refresh_seconds
+        self.engine: Optional[AsyncEngine] = None
+        self._partitions: Dict[str, _Partition] = {}
+        self._high_water = 0
+        self._recent: Set[int] = set()
+        self._refreshed_at = 0.0
+        self._refresh_lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self.errors = 0
+        self.lookup_seconds = 0.0
+
+    def __len__(self) -> int:
+        return sum(p.size for p in self._partitions.values())
+
+    def add(self, domain: str, ids: np.ndarray, vectors: np.ndarray) -> None:
+        self._partitions.setdefault(domain, _Partition()).add(ids, vectors)
+
+    async def nearest(self, domain: str, query: np.ndarray) -> Optional[Tuple[int, float]]:
+        """Best (id, score) in `domain`, or None when the domain is empty."""
+        partition = self._partitions.get(domain)
+        if partition is None or partition.size == 0:
+            return None
+        if partition.size > THREAD_SCAN_ROWS:
+            # numpy releases the GIL for the matrix product
+            return await asyncio.to_thread(partition.nearest, query)
+        return partition.nearest(query)
+
+    async def attach(self, engine: AsyncEngine) -> None:
+        """Use the `profile_index` table and load it; a failed load is retried by `lookup`."""
+        self.engine = engine
+        try:
+            await self.refresh()
+        except Exception as exc:
+            print(f"[similar] index not loaded: {exc}")
+
+    async def refresh(self) -> None:
+        """Load rows added since the last refresh (by any worker)."""
+        async with self._refresh_lock:
+            floor = max(0, self._high_water - REFRESH_OVERLAP)
+            async with self.engine.connect() as conn:
+                rows = (await conn.execute(
+                    text("SELECT id, domain, features FROM profile_index WHERE id > :floor ORDER BY id"),
+                    {"floor": floor},
+                )).all()
+            by_domain: Dict[str, List[Tuple[int, bytes]]] = {}
+            for row_id, domain, features in rows:
+                # rows written with another encoding layout can never match; skip them
+                if row_id not in self._recent and len(features) == DIMS * 4:
+                    by_domain.setdefault(domain, []).append((row_id, features))
+            for domain, items in by_domain.items():
+                ids = np.array([i for i, _ in items], dtype=np.int64)
+                vectors = np.frombuffer(b"".join(f for _, f in items), dtype=np.float32).reshape(-1, DIMS)
+                self.add(domain, ids, vectors)
+            if rows:
+                self._high_water = max(self._high_water, rows[-1][0])
+            floor = self._high_water - REFRESH_OVERLAP
+            self._recent = {i for i in self._recent if i > floor} | {r[0] for r in rows if r[0] > floor}
+            self._refreshed_at = time.monotonic()
+
+    async def lookup(self, profile: Dict[str, Any], domain: str) -> Optional[Dict[str, Any]]:
+        """The plan of the nearest stored profile adapted to `profile`, or None below the
+        threshold. Failures are misses: the caller generates as usual."""
+        if not self.enabled or self.engine is None:
+            return None
+        start = time.perf_counter()
+        try:
+            if time.monotonic() - self._refreshed_at >= self.refresh_seconds:
+                await self.refresh()
+            match = await self.nearest(domain, encode_profiles([profile])[0])
+            if match is None or match[1] < self.threshold:
+                self.misses += 1
+                return None
+            async with self.engine.connect() as conn:
+                row = (await conn.execute(
+                    text("SELECT plan, signals FROM profile_index WHERE id = :id"), {"id": match[0]},
+                )).first()
+            if row is None:
+                self.misses += 1
+                return None
+            plan = ensure_valid(adapt_plan(row[0], row[1], profile))
+        except Exception:
+            self.errors += 1
+            return None
+        finally:
+            self.lookup_seconds += time.perf_counter() - start
+        self.hits += 1
+        return plan
+
+    async def record(self, profile: Dict[str, Any], domain: str, plan: Dict[str, Any]) -> None:
+        """Store an LLM plan for `profile`; other profiles with the same encoding keep the first."""
+        if not self.enabled or self.engine is None:
+            return
+        try:
+            features = encode_profiles([profile])[0]
+            async with self.engine.begin() as conn:
+                row_id = (await conn.execute(
+                    text(
+                        """INSERT INTO profile_index (domain, features, signals, plan)
+                           VALUES (:domain, :features, CAST(:signals AS JSONB), CAST(:plan AS JSONB))
+                           ON CONFLICT (domain, features) DO NOTHING RETURNING id"""
+                    ),
+                    {"domain": domain, "features": features.tobytes(),
+                     "signals": orjson.dumps(profile_signals(profile)).decode(),
+                     "plan": orjson.dumps(plan).decode()},
+                )).scalar()
+            self.recorded += 1
+            # searchable in this worker at once; other workers pick it up on their next refresh
+            if row_id is not None and row_id not in self._recent:
+                self.add(domain, np.array([row_id], dtype=np.int64), features[None, :])
+                self._recent.add(row_id)
+        except Exception:
+            # the index is an optimization; a failed insert never fails the request
+            self.errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled and self.engine is not None,
+            "size": len(self),
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "recorded": self.recorded,
+            "errors": self.errors,
+            "mean_lookup_ms": round(self.lookup_seconds / (lookups + self.errors) * 1000, 3)
+            if lookups + self.errors else 0.0,
+        }
+
+
+similarity_index = SimilarityIndex(
+    threshold=settings.PLAN_SIMILARITY_THRESHOLD,
+    refresh_seconds=settings.PLAN_SIMILARITY_REFRESH_SECONDS,
+    enabled=settings.PLAN_SIMILARITY_ENABLED,
+)
@@ -0,0 +1,142 @@
+"""Single-flight: identical in-flight LLM calls share one upstream request.
+
+Within a worker, the first caller for a key (the leader) starts the call as a task and
+everyone arriving while it runs awaits that same task. Across workers, the leader can also
+claim the key in the `plan_flight` table: a leader in another worker finds the claim taken
+and polls the shared plan cache until the result shows up or the claim is released. Claims
+are taken and released in short transactions of their own, so no connection is held while
+the model answers, and a claim left by a crashed worker expires.
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+import asyncio
+import copy
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one.
+
+    The shared call runs as its own task, so a caller that disconnects does not cancel it
+    for the others. Followers get a deep copy of the result so callers may mutate freely.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._inflight: Dict[str, "asyncio.Task[Any]"] = {}
+        self._engine: Optional[AsyncEngine] = None
+        self._lease_seconds = 0.0
+        self._poll_seconds = 0.0
+        self.leaders = 0
+        self.collapsed = 0
+        self.cross_worker_collapsed = 0
+
+    def use_shared_claims(
+        self, engine: Optional[AsyncEngine], lease_seconds: float = 90.0, poll_seconds: float = 0.25
+    ) -> None:
+        """Coordinate leaders across workers through `engine` (None turns it off). A claim
+        lasts at most `lease_seconds`, which also bounds how long another worker waits."""
+        self._engine = engine
+        self._lease_seconds = lease_seconds
+        self._poll_seconds = poll_seconds
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        recheck: Optional[Callable[[], Awaitable[Optional[T]]]] = None,
+    ) -> T:
+        """Run `fn` once per key at a time. With cross-worker coordination on, calls that pass
+        `recheck` also claim the key, or, while another worker holds it, poll `recheck`; a
+        non-None result is used instead of calling `fn`. Without `recheck` there is no shared
+        result to pick up, so the claim is skipped."""
+        if not self.enabled:
+            return await fn()
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(self._lead(key, fn, recheck))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+            return await asyncio.shield(task)
+        self.collapsed += 1
+        return copy.deepcopy(await asyncio.shield(task))
+
+    def _done(self, key: str, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # mark the exception retrieved even if every waiter went away
+            task.exception()
+
+    async def _lead(self, key: str, fn: Callable[[], Awaitable[T]], recheck) -> T:
+        if self._engine is None or recheck is None:
+            return await fn()
+
+        claimed = False
+        deadline = time.monotonic() + self._lease_seconds
+        try:
+            while True:
+                claimed = await self._claim(key)
+                if claimed:
+                    break
+                found = await recheck()
+                if found is not None:
+                    self.cross_worker_collapsed += 1
+                    return found
+                if time.monotonic() >= deadline:
+                    break
+                await asyncio.sleep(self._poll_seconds)
+        except Exception:
+            # coordination unavailable (database down): call upstream uncoordinated
+            pass
+        if not claimed:
+            return await fn()
+
+        try:
+            # the previous holder may have stored its result just before releasing the claim
+            found = await recheck()
+            if found is not None:
+                self.cross_worker_collapsed += 1
+                return found
+            return await fn()
+        finally:
+            try:
+                await self._release(key)
+            except Exception:
+                # the claim expires on its own
+                pass
+
+    async def _claim(self, key: str) -> bool:
+        """Claim `key` for this call unless another worker holds a live claim on it."""
+        async with self._engine.begin() as conn:
+            claimed = (await conn.execute(
+                text(
+                    """INSERT INTO plan_flight (key, expires_at) VALUES (:key, now() + make_interval(secs => :lease))
+                       ON CONFLICT (key) DO UPDATE SET expires_at = EXCLUDED.expires_at
+                       WHERE plan_flight.expires_at <= now()
+                       RETURNING key"""
+                ),
+                {"key": key, "lease": self._lease_seconds},
+            )).scalar()
+        return claimed is not None
+
+    async def _release(self, key: str) -> None:
+        """Release the claim on `key`, pruning claims that crashed workers left to expire."""
+        async with self._engine.begin() as conn:
+            await conn.execute(text("DELETE FROM plan_flight WHERE key = :key OR expires_at <= now()"), {"key": key})
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "cross_worker": self._engine is not None,
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "collapsed": self.collapsed,
+            "cross_worker_collapsed": self.cross_worker_collapsed,
+        }
@@ -0,0 +1,108 @@
+"""Incremental parsing of a streamed roadmap JSON document.
+
+The LLM streams the plan as text deltas. `PlanStreamParser` scans the text as it arrives
+and, as soon as an element of the top-level `milestones` or `timeline` array is complete,
+validates it against the schema model and hands it back, long before the whole plan parses.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, ValidationError
+
+from .schema import Milestone, TimelineEntry
+
+
+# top-level array key -> (event name, model each element must validate against)
+STREAMED_ARRAYS: Dict[str, Tuple[str, type]] = {
+    "milestones": ("milestone", Milestone),
+    "timeline": ("timeline_entry", TimelineEntry),
+}
+
+
+class PlanStreamParser:
+    """Feed text chunks with `feed()`; each call returns the newly completed, validated items.
+
+    Only structure is tracked (container nesting, strings, escapes and the current top-level
+    key), so each character is looked at once. Anything before the first `{` (e.g. a markdown
+    fence) is ignored. Elements that fail validation are skipped here; the full plan is still
+    validated once the stream ends, via `text`.
+    """
+
+    def __init__(self) -> None:
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False
+        self._key: Optional[str] = None
+        self._item_start: Optional[int] = None
+        self._text = ""
+        self.skipped = 0
+
+    @property
+    def text(self) -> str:
+        """Everything received so far."""
+        return self._text
+
+    def feed(self, chunk: str) -> List[Tuple[str, Dict[str, Any]]]:
+        self._text += chunk
+        text = self._text
+        events: List[Tuple[str, Dict[str, Any]]] = []
+        stack = self._stack
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if len(stack) == 1 and self._expect_key:
+                        self._key = text[self._string_start + 1:i]
+                continue
+            if ch == '"':
+                if stack:
+                    self._in_string = True
+                    self._string_start = i
+            elif ch in "{[":
+                if not stack and ch == "[":
+                    continue
+                stack.append(ch)
+                if len(stack) == 1:
+                    self._expect_key = True
+                elif len(stack) == 3 and stack[1] == "[" and self._key in STREAMED_ARRAYS:
+                    self._item_start = i
+            elif ch in "}]":
+                if not stack:
+                    continue
+                stack.pop()
+                if len(stack) == 2 and self._item_start is not None:
+                    event = self._validate(text[self._item_start:i + 1])
+                    if event is not None:
+                        events.append(event)
+                    self._item_start = None
+            elif len(stack) == 1:
+                if ch == ":":
+                    self._expect_key = False
+                elif ch == ",":
+                    self._expect_key = True
+        self._pos = len(text)
+        return events
+
+    def _validate(self, raw: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        name, model = STREAMED_ARRAYS[self._key]
+        try:
+            item: BaseModel = model.model_validate_json(raw)
+        except (ValueError, ValidationError):
+            self.skipped += 1
+            return None
+        return name, item.model_dump(mode="json")
+
+
+def plan_events(plan: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """The item events a parser would have produced for an already complete plan."""
+    events: List[Tuple[str, Dict[str, Any]]] = []
+    for key, (name, _) in STREAMED_ARRAYS.items():
+        events.extend((name, item) for item in plan.get(key) or [])
+    return events
@@ -0,0 +1,170 @@
+"""Template library for the local plan engine (`planner.py`): milestone tracks per domain.
+
+A track is an ordered list of steps with an effort estimate in hours; the planner scales the
+effort to the learner, packs it into weeks and derives the timeline and check-ins. `keywords`
+match the profile's target (role, exam or goal); the first track of each domain is its default.
+"""
+from typing import Dict, List, NamedTuple, Tuple
+
+Link = Tuple[str, str]
+
+
+class Step(NamedTuple):
+    title: str
+    hours: int
+    description: str
+    resources: Tuple[Link, ...] = ()
+    # skipped for advanced learners
+    foundational: bool = False
+
+
+class Track(NamedTuple):
+    key: str
+    title: str
+    keywords: Tuple[str, ...]
+    steps: Tuple[Step, ...]
+    # added one at a time when feedback says the plan is too easy
+    stretch: Tuple[Step, ...] = ()
+    resources: Tuple[Link, ...] = ()
+
+
+TRACKS: Dict[str, List[Track]] = {
+    "career": [
+        Track("general", "Career Growth Plan", (), (
+            Step("Orientation & Baseline", 6, "Map the target role, list required skills and rate yourself on each.", foundational=True),
+            Step("Core Skills", 30, "Close the biggest skill gaps from the baseline with structured courses."),
+            Step("Portfolio Project", 30, "Build one end-to-end project that shows the core skills in use."),
+            Step("Networking & Visibility", 12, "Update your profile, write about the project and reach out to people in the role."),
+            Step("Applications & Interviews", 16, "Apply in batches, practice interviews and review every outcome."),
+        ), (
+            Step("Mentoring & Leadership", 12, "Lead a small initiative or mentor someone to practice leadership."),
+        ), (("Roadmap.sh", "https://roadmap.sh/roadmaps"),)),
+        Track("backend", "Backend Engineer Roadmap", ("backend", "back-end", "api", "server", "python", "java", "golang", "node"), (
+            Step("Programming Foundations", 30, "Language fundamentals, data structures and writing idiomatic code.",
+                 (("Python Tutorial", "https://docs.python.org/3/tutorial/"),), foundational=True),
+            Step("HTTP & APIs", 20, "HTTP semantics, REST design, authentication and building a small API.",
+                 (("MDN HTTP", "https://developer.mozilla.org/en-US/docs/Web/HTTP"),)),
+            Step("Databases & SQL", 24, "Relational modelling, SQL, indexes and transactions.",
+                 (("PostgreSQL Tutorial", "https://www.postgresql.org/docs/current/tutorial.html"),)),
+            Step("Testing & CI", 14, "Unit and integration tests, fixtures and a CI pipeline."),
+            Step("System Design Basics", 20, "Caching, queues, scaling and the trade-offs between them.",
+                 (("System Design Primer", "https://github.com/donnemartin/system-design-primer"),)),
+            Step("Deployment & Observability", 14, "Containers, deploying a service, logs and metrics."),
+            Step("Capstone API", 30, "A production-style service with a database, tests and a deployment."),
+        ), (
+            Step("Distributed Systems", 24, "Consistency, replication and failure handling in multi-node systems."),
+            Step("Performance Profiling", 12, "Profile and optimize a hot path in the capstone."),
+        ), (("Roadmap.sh Backend", "https://roadmap.sh/backend"),)),
+        Track("frontend", "Frontend Engineer Roadmap", ("frontend", "front-end", "react", "ui", "web", "javascript"), (
+            Step("HTML & CSS Foundations", 20, "Semantic HTML, layout with flexbox and grid, responsive design.",
+                 (("MDN Learn", "https://developer.mozilla.org/en-US/docs/Learn"),), foundational=True),
+            Step("JavaScript Essentials", 26, "Language core, the DOM, async code and modules."),
+            Step("Component Framework", 28, "Components, state management and routing in a modern framework."),
+            Step("Testing & Accessibility", 14, "Component tests, end-to-end tests and accessibility checks."),
+            Step("Performance & Tooling", 12, "Bundling, code splitting and measuring page performance."),
+            Step("Capstone App", 30, "A deployed single-page app backed by a public API."),
+        ), (
+            Step("Design Systems", 16, "Build a small component library with tokens and documentation."),
+        ), (("Roadmap.sh Frontend", "https://roadmap.sh/frontend"),)),
+        Track("data", "Data Science Roadmap", ("data", "analyst", "scientist", "machine learning", "ml", "ai"), (
+            Step("Python & Statistics Foundations", 28, "Python for analysis, probability and descriptive statistics.", foundational=True),
+            Step("Data Wrangling & SQL", 22, "Cleaning and joining data with pandas and SQL."),
+            Step("Visualization & Storytelling", 14, "Charts that answer a question and a short written narrative."),
+            Step("Machine Learning Fundamentals", 30, "Supervised learning, evaluation and feature engineering.",
+                 (("scikit-learn User Guide", "https://scikit-learn.org/stable/user_guide.html"),)),
+            Step("Capstone Analysis", 28, "An end-to-end project from raw data to model and write-up."),
+        ), (
+            Step("Deep Learning", 30, "Neural networks and training a model on an unstructured dataset."),
+            Step("Model Deployment", 14, "Serve a model behind an API and monitor it."),
+        ), (("Kaggle Learn", "https://www.kaggle.com/learn"),)),
+        Track("devops", "DevOps Engineer Roadmap", ("devops", "sre", "cloud", "platform", "infrastructure", "kubernetes"), (
+            Step("Linux & Networking", 24, "Shell, processes, permissions, DNS and TCP/IP basics.", foundational=True),
+            Step("Containers", 16, "Images, registries and running multi-container apps."),
+            Step("CI/CD Pipelines", 16, "Automated builds, tests and deployments."),
+            Step("Infrastructure as Code", 20, "Provision cloud resources declaratively."),
+            Step("Kubernetes", 26, "Deployments, services, config and scaling on a cluster.",
+                 (("Kubernetes Docs", "https://kubernetes.io/docs/home/"),)),
+            Step("Monitoring & Incident Response", 16, "Metrics, alerts, dashboards and running a postmortem."),
+        ), (
+            Step("Service Mesh & Security", 16, "mTLS, policies and secret management across services."),
+        ), (("Roadmap.sh DevOps", "https://roadmap.sh/devops"),)),
+        Track("product", "Product Manager Roadmap", ("product", "pm", "product manager", "product owner"), (
+            Step("Product Fundamentals", 16, "The PM role, product lifecycle and working with engineering and design.", foundational=True),
+            Step("User Research", 18, "Interviews, surveys and turning findings into problem statements."),
+            Step("Prioritization & Roadmaps", 14, "Frameworks for prioritizing and communicating a roadmap."),
+            Step("Metrics & Experimentation", 16, "North-star metrics, funnels and A/B tests."),
+            Step("Case Study", 24, "A written product case from problem to launch plan."),
+        ), (
+            Step("Pricing & Strategy", 12, "Market sizing, positioning and pricing models."),
+        )),
+    ],
+    "academics": [
+        Track("general", "Structured Study Plan", (), (
+            Step("Orientation & Baseline", 4, "Collect the syllabus, take a diagnostic and set weekly targets.", foundational=True),
+            Step("Core Concepts", 30, "Work through the core topics with notes and spaced repetition."),
+            Step("Practice Problems", 24, "Timed problem sets on each topic, reviewing every mistake."),
+            Step("Assessment & Review", 12, "Full-length practice assessments and targeted review of weak areas."),
+            Step("Final Revision", 8, "Summaries, formula sheets and light practice before the exam."),
+        ), (
+            Step("Advanced Problems", 14, "Competition-level or past-paper problems beyond the syllabus."),
+        ), (("Khan Academy", "https://www.khanacademy.org/"),)),
+        Track("sat", "SAT Preparation Plan", ("sat", "psat", "act"), (
+            Step("Diagnostic Test", 4, "A full practice test to set the baseline score.", foundational=True),
+            Step("Reading & Writing", 24, "Question types, grammar rules and evidence-based reading."),
+            Step("Math", 28, "Algebra, problem solving and advanced math topics."),
+            Step("Timed Practice Tests", 18, "Weekly full-length tests under real timing."),
+            Step("Error Log Review", 10, "Revisit every missed question by category."),
+        ), (
+            Step("Hardest-Module Drills", 10, "Drills at the difficulty of the hardest adaptive module."),
+        ), (("Official SAT Practice", "https://satsuite.collegeboard.org/practice"),)),
+        Track("gre", "GRE Preparation Plan", ("gre",), (
+            Step("Diagnostic Test", 4, "A full practice test to set the baseline score.", foundational=True),
+            Step("Vocabulary & Verbal Reasoning", 26, "High-frequency vocabulary, text completion and reading comprehension."),
+            Step("Quantitative Reasoning", 26, "Arithmetic, algebra, geometry and data analysis."),
+            Step("Analytical Writing", 10, "Issue and argument essays with timed practice."),
+            Step("Timed Practice Tests", 16, "Full-length tests and review of every section."),
+        ), (
+            Step("Hard Quant Sets", 10, "Sets of the hardest quantitative question types."),
+        ), (("ETS GRE Prep", "https://www.ets.org/gre/test-takers/general-test/prepare.html"),)),
+        Track("language", "Language Exam Plan", ("ielts", "toefl", "english", "language"), (
+            Step("Placement & Baseline", 4, "A practice test in all four skills.", foundational=True),
+            Step("Listening & Reading", 20, "Daily listening and timed reading passages."),
+            Step("Writing", 18, "Task types, structure and feedback on practice essays."),
+            Step("Speaking", 16, "Recorded answers, fluency drills and mock interviews."),
+            Step("Mock Exams", 12, "Full mock exams under real conditions."),
+        )),
+    ],
+    "personal": [
+        Track("general", "Personal Growth Plan", (), (
+            Step("Reflect & Set Goals", 4, "Review where you are and write three concrete goals.", foundational=True),
+            Step("Build Core Habits", 16, "Start one small daily habit per goal and track it."),
+            Step("Deepen Practice", 20, "Increase the habits' scope and add one weekly stretch activity."),
+            Step("Review & Adjust", 6, "Check progress against the goals and drop what is not working."),
+            Step("Sustain & Share", 8, "Make the habits routine and share what you learned."),
+        ), (
+            Step("Teach Someone", 8, "Teach or coach someone in a habit you have built."),
+        ), (("Atomic Habits summary", "https://jamesclear.com/atomic-habits-summary"),)),
+        Track("fitness", "Fitness Plan", ("fitness", "fit", "health", "running", "strength", "weight"), (
+            Step("Baseline & Goals", 3, "Measure a baseline and set a realistic target.", foundational=True),
+            Step("Consistency Phase", 16, "Three short sessions a week and a simple tracking log."),
+            Step("Build Capacity", 20, "Gradually increase volume and add strength work."),
+            Step("Nutrition & Recovery", 8, "Sleep, hydration and balanced meals around training."),
+            Step("Benchmark & Next Cycle", 6, "Re-test the baseline and plan the next cycle."),
+        ), (
+            Step("Event Goal", 16, "Train for an event such as a 10k or a lifting meet."),
+        )),
+        Track("finance", "Personal Finance Plan", ("finance", "money", "budget", "saving", "investing"), (
+            Step("Money Snapshot", 3, "List income, expenses, debts and savings.", foundational=True),
+            Step("Budget & Emergency Fund", 8, "Set a monthly budget and start an emergency fund."),
+            Step("Debt Plan", 6, "Order debts and automate repayments."),
+            Step("Investing Basics", 10, "Index funds, retirement accounts and risk."),
+            Step("Annual Review", 3, "Review the year and set next year's targets."),
+        )),
+        Track("learning", "Learning Habit Plan", ("reading", "learning", "writing", "creativity", "skill"), (
+            Step("Choose a Focus", 3, "Pick one skill or reading theme and a weekly time slot.", foundational=True),
+            Step("Daily Practice", 18, "Short daily sessions with a visible streak."),
+            Step("Project", 16, "A small project that uses what you learned."),
+            Step("Share & Reflect", 5, "Publish or present the project and note lessons."),
+        )),
+    ],
+}
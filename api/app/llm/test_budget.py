@@ -0,0 +1,64 @@
+import copy
+import json
+
+import pytest
+
+from app.llm.budget import DESCRIPTION_CHARS, PLAN_PRUNE_STEPS, compact_json, fit_plan, restore_pruned
+from app.llm.planner import build_plan
+from app.llm.schema import ensure_valid, validate_plan_json
+
+
+def _plan():
+    plan = copy.deepcopy(build_plan({"hours_per_week": 8, "target_role": "backend engineer"}, "career"))
+    plan["milestones"][0]["description"] = "Long description. " * 20
+    plan["resources"] = [{"name": "Docs", "url": "https://example.com/docs"}]
+    return ensure_valid(plan)
+
+
+def _pruned(plan, steps):
+    for _, step in PLAN_PRUNE_STEPS[:steps]:
+        plan = step(plan)
+    return plan
+
+
+@pytest.mark.parametrize("steps", range(1, len(PLAN_PRUNE_STEPS) + 1))
+def test_unchanged_echo_restores_every_pruned_value(steps):
+    original = _plan()
+    sent = _pruned(original, steps)
+    # the model answers with the plan it saw; validation fills in url: None and resources: []
+    revised = validate_plan_json(json.dumps(sent))
+    assert ensure_valid(restore_pruned(original, sent, revised)) == original
+
+
+def test_urls_come_back_on_edited_milestones():
+    original = _plan()
+    sent, applied, _ = fit_plan(original, 1, compact_json)
+    assert "resource_urls" in applied
+    echo = copy.deepcopy(sent)
+    echo["milestones"][0]["title"] = "Renamed"
+    echo["milestones"][1].setdefault("resources", []).append({"name": "New link"})
+    restored = restore_pruned(original, sent, validate_plan_json(json.dumps(echo)))
+    urls = {r["name"]: r["url"] for m in original["milestones"] for r in m["resources"]}
+    for m in restored["milestones"]:
+        for r in m["resources"]:
+            assert r["url"] == urls.get(r["name"])
+    assert restored["milestones"][0]["title"] == "Renamed"
+    assert restored["resources"] == original["resources"]
+
+
+def test_model_changes_are_kept():
+    original = _plan()
+    sent = _pruned(original, 2)
+    assert len(sent["milestones"][0]["description"]) <= DESCRIPTION_CHARS + 1
+    echo = copy.deepcopy(sent)
+    echo["milestones"][0]["description"] = "Rewritten by the model"
+    echo["milestones"][1]["resources"] = [{"name": "Other", "url": "https://example.com/other"}]
+    restored = restore_pruned(original, sent, validate_plan_json(json.dumps(echo)))
+    assert restored["milestones"][0]["description"] == "Rewritten by the model"
+    assert restored["milestones"][1]["resources"] == [{"name": "Other", "url": "https://example.com/other"}]
+
+
+def test_unpruned_plan_is_returned_as_is():
+    original = _plan()
+    revised = validate_plan_json(json.dumps(dict(original, title="New")))
+    assert restore_pruned(original, original, revised) is revised
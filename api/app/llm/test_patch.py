@@ -0,0 +1,63 @@
+import copy
+import random
+
+import pytest
+
+from app.llm.patch import PatchError, apply_patch, diff_plans, patch_to_json
+from app.llm.planner import build_plan, revise_plan
+from app.llm.schema import ensure_valid
+
+SIGNALS = ["too_fast", "too_easy", "missing_topic", "change_goal", "other"]
+
+
+def _mutate(rng: random.Random, plan):
+    """A random edit of the kind revisions and manual edits make, including the ones keyed
+    ops cannot express (reordering, dropped fields, duplicate keys)."""
+    new = copy.deepcopy(plan)
+    milestones = new["milestones"]
+    choice = rng.randrange(7)
+    if choice == 0 and milestones:
+        milestones.pop(rng.randrange(len(milestones)))
+    elif choice == 1:
+        milestones.insert(rng.randrange(len(milestones) + 1),
+                          {"id": f"x{rng.randrange(10**6)}", "title": "Extra", "description": "", "resources": []})
+    elif choice == 2 and milestones:
+        milestones[rng.randrange(len(milestones))]["title"] = f"Renamed {rng.randrange(100)}"
+    elif choice == 3:
+        rng.shuffle(new["timeline"])
+    elif choice == 4 and milestones:
+        milestones[rng.randrange(len(milestones))].pop("resources", None)
+    elif choice == 5 and milestones:
+        milestones.append(dict(milestones[0]))
+    else:
+        new["title"] = f"{plan['title']}!"
+    return new
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_round_trip_over_random_revisions(seed):
+    rng = random.Random(seed)
+    plan = build_plan({"hours_per_week": rng.randint(2, 20), "target_role": "backend engineer"}, "career")
+    for i in range(60):
+        if rng.random() < 0.5:
+            new = ensure_valid(revise_plan(plan, {"signal_type": rng.choice(SIGNALS), "notes": f"topic {i}"}, "career"))
+        else:
+            new = _mutate(rng, plan)
+        before = copy.deepcopy(plan)
+        patch = diff_plans(plan, new)
+        assert apply_patch(plan, patch) == new
+        # stored form (plain dict) replays the same
+        assert apply_patch(plan, patch_to_json(patch)) == new
+        assert plan == before
+        plan = new
+
+
+def test_identical_plans_give_an_empty_patch():
+    plan = build_plan({"hours_per_week": 8}, "academics")
+    assert diff_plans(plan, copy.deepcopy(plan)).ops == []
+
+
+def test_modify_of_unknown_item_raises():
+    plan = build_plan({"hours_per_week": 8}, "career")
+    with pytest.raises(PatchError):
+        apply_patch(plan, {"ops": [{"op": "modify", "target": "milestones", "key": "nope", "value": {"title": "x"}}]})
@@ -0,0 +1,64 @@
+import pytest
+
+from app.llm.planner import MAX_PACE, MIN_PACE, build_plan, revise_plan
+from app.llm.schema import ensure_valid
+
+SIGNALS = ["too_fast", "too_easy", "missing_topic", "change_goal", "other"]
+PLAN = build_plan({"hours_per_week": 10, "style": "balanced", "target_role": "backend engineer"}, "career")
+
+
+@pytest.mark.parametrize("constraints", [
+    {"pace": "fast"},
+    {"pace": None},
+    {"pace": float("nan")},
+    {"pace": float("inf")},
+    {"pace": -3},
+    {"pace": 100},
+    {"pace": [1]},
+    {"hours_per_week": "lots"},
+    {"hours_per_week": float("inf")},
+    {"hours_per_week": -5},
+    {"milestone_hours": {"m1": "x", "m2": 0, "m3": -4, "m4": None, "m5": float("nan")}},
+    {"milestone_hours": ["x"]},
+    {"milestone_hours": "x"},
+    {"style": 7, "experience_level": ["expert"], "target": 3},
+])
+@pytest.mark.parametrize("signal", SIGNALS)
+def test_revise_with_malformed_constraints(constraints, signal):
+    plan = dict(PLAN, constraints={**PLAN["constraints"], **constraints})
+    revised = ensure_valid(revise_plan(plan, {"signal_type": signal, "notes": "kubernetes"}, "career"))
+    assert MIN_PACE <= revised["constraints"]["pace"] <= MAX_PACE
+    assert all(h > 0 for h in revised["constraints"]["milestone_hours"].values())
+    assert revised["timeline"]
+
+
+@pytest.mark.parametrize("constraints", [None, "junk", [], {}])
+def test_revise_without_usable_constraints(constraints):
+    plan = {**PLAN, "constraints": constraints}
+    revised = ensure_valid(revise_plan(plan, {"signal_type": "too_fast"}, "career"))
+    assert revised["constraints"]["pace"] == pytest.approx(0.8)
+
+
+def test_revise_llm_plan_without_constraints():
+    plan = {"domain": "career", "title": "X", "milestones": [{"id": "a", "title": "A"}, {"id": "b", "title": "B"}],
+            "timeline": [{"week": 1, "focus": "A"}, {"week": 2, "focus": "B"}]}
+    for signal in SIGNALS:
+        ensure_valid(revise_plan(plan, {"signal_type": signal}, "career"))
+
+
+def test_pace_stays_within_bounds():
+    plan = PLAN
+    for _ in range(20):
+        plan = revise_plan(plan, {"signal_type": "too_fast"}, "career")
+    assert plan["constraints"]["pace"] == pytest.approx(MIN_PACE)
+    for _ in range(20):
+        plan = revise_plan(plan, {"signal_type": "too_easy"}, "career")
+    assert plan["constraints"]["pace"] == pytest.approx(MAX_PACE)
+
+
+@pytest.mark.parametrize("profile", [
+    {"hours_per_week": "abc"}, {"hours_per_week": 0}, {"hours_per_week": 1e9}, {"style": None},
+    {"target_role": 5}, {"experience_level": 3},
+])
+def test_build_with_odd_profiles(profile):
+    ensure_valid(build_plan(profile, "personal"))
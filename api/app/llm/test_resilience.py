@@ -0,0 +1,150 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.llm import resilience
+from app.llm.resilience import CircuitBreaker, CircuitOpenError, LLMGuard, ServedPaths, fallback_path
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(t=1000.0)
+    monkeypatch.setattr(resilience, "time", SimpleNamespace(monotonic=lambda: now.t))
+    return now
+
+
+def _breaker(**kw):
+    return CircuitBreaker(**{"window_seconds": 30, "min_calls": 4, "failure_rate": 0.5, "open_seconds": 10, **kw})
+
+
+def test_breaker_opens_at_the_failure_rate(clock):
+    breaker = _breaker()
+    for ok in (True, False, True):
+        breaker.record(ok)
+    assert breaker.state == "closed"
+    breaker.record(False)
+    assert breaker.state == "open" and breaker.opened == 1
+    assert not breaker.allow()
+
+
+def test_breaker_needs_min_calls(clock):
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record(False)
+    assert breaker.state == "closed"
+
+
+def test_breaker_forgets_outcomes_outside_the_window(clock):
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record(False)
+    clock.t += 31
+    breaker.record(False)
+    assert breaker.state == "closed"
+
+
+@pytest.mark.parametrize("probe_ok, state", [(True, "closed"), (False, "open")])
+def test_half_open_lets_one_probe_through(clock, probe_ok, state):
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record(False)
+    clock.t += 10
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+    breaker.record(probe_ok)
+    assert breaker.state == state
+
+
+def test_cancelled_probe_frees_the_slot(clock):
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record(False)
+    clock.t += 10
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def _guard(breaker=None, **kw):
+    options = {
+        "deadline_seconds": 2.0, "attempt_timeout_seconds": 1.0, "max_attempts": 3,
+        "retry_initial_seconds": 0.001, "retry_max_seconds": 0.002, **kw,
+    }
+    return LLMGuard(breaker or _breaker(), **options)
+
+
+def _flaky(*errors):
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return "ok"
+    return fn, calls
+
+
+def test_provider_faults_are_retried():
+    guard = _guard()
+    fn, calls = _flaky(httpx.ConnectError("down"), asyncio.TimeoutError())
+    assert asyncio.run(guard.call(fn)) == "ok"
+    assert len(calls) == 3 and guard.retries == 2
+
+
+def test_other_errors_are_not_retried():
+    guard = _guard()
+    fn, calls = _flaky(ValueError("bad output"))
+    with pytest.raises(ValueError):
+        asyncio.run(guard.call(fn))
+    assert len(calls) == 1
+    # the provider answered: not a fault for the breaker
+    assert guard.breaker.stats()["window_failures"] == 0
+
+
+def test_open_breaker_short_circuits():
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record(False)
+    guard = _guard(breaker)
+    fn, calls = _flaky()
+    with pytest.raises(CircuitOpenError) as exc:
+        asyncio.run(guard.call(fn))
+    assert not calls
+    assert fallback_path(exc.value) == "fallback_circuit_open"
+
+
+def test_slow_attempt_is_hedged():
+    guard = _guard(hedge_after_seconds=0.01)
+    delays = [0.5, 0.0]
+
+    async def fn():
+        await asyncio.sleep(delays.pop(0))
+        return "ok"
+    assert asyncio.run(guard.call(fn)) == "ok"
+    assert guard.hedges == 1 and guard.hedges_won == 1
+
+
+def test_deadline_bounds_all_attempts():
+    guard = _guard(deadline_seconds=0.05, attempt_timeout_seconds=1.0)
+
+    async def fn():
+        await asyncio.sleep(1)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(guard.call(fn))
+    assert guard.timeouts == 1
+
+
+def test_served_paths_collecting_and_adopt():
+    paths = ServedPaths()
+    outer = paths.collect()
+    with paths.collecting() as inner:
+        paths.record("fallback_timeout")
+    assert inner == ["fallback_timeout"] and outer == []
+    paths.adopt(inner)
+    paths.adopt(inner)
+    assert outer == ["fallback_timeout", "fallback_timeout"]
+    # adopted paths were recorded elsewhere and are not counted again
+    assert paths.stats() == {"fallback_timeout": 1}
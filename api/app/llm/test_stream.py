@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from app.llm.planner import build_plan
+from app.llm.schema import ensure_valid
+from app.llm.stream import PlanStreamParser, plan_events
+
+PLAN = ensure_valid(build_plan({"hours_per_week": 6, "target_role": "data engineer"}, "career"))
+
+
+def _feed(text: str, size: int):
+    parser = PlanStreamParser()
+    events = []
+    for i in range(0, len(text), size):
+        events += parser.feed(text[i:i + size])
+    return parser, events
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64, 10**6])
+def test_items_at_any_chunk_boundary(size):
+    text = json.dumps(PLAN)
+    parser, events = _feed(text, size)
+    assert events == plan_events(PLAN)
+    assert parser.text == text
+    assert parser.skipped == 0
+
+
+@pytest.mark.parametrize("size", [1, 3])
+@pytest.mark.parametrize("prefix, suffix", [
+    ("```json\n", "\n```"),
+    ("```\n", "\n```\n"),
+    ("Here is the plan:\n```json\n", "\n```\nHope it helps."),
+])
+def test_fenced_output(size, prefix, suffix):
+    _, events = _feed(prefix + json.dumps(PLAN, indent=2) + suffix, size)
+    assert events == plan_events(PLAN)
+
+
+def test_brackets_and_escapes_inside_strings():
+    plan = dict(PLAN, title='Plan {with} [brackets], "quotes" and \\ slashes')
+    plan["milestones"] = [dict(m, description='a "} ]," b \\" c') for m in PLAN["milestones"]]
+    _, events = _feed(json.dumps(plan), 1)
+    assert events == plan_events(plan)
+
+
+def test_invalid_items_are_skipped():
+    text = '{"milestones": [{"id": "m1", "title": "ok"}, {"title": 5, "id": []}], "timeline": [{"week": "x"}]}'
+    parser, events = _feed(text, 1)
+    assert [name for name, _ in events] == ["milestone"]
+    assert parser.skipped == 2
+
+
+def test_nested_arrays_are_not_items():
+    # resources inside a milestone are part of it, not streamed on their own
+    _, events = _feed(json.dumps({"resources": [{"name": "x", "url": "y"}], "milestones": PLAN["milestones"]}), 5)
+    assert events == [("milestone", m) for m in PLAN["milestones"]]
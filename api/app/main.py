@@ -1,14 +1,69 @@
-from fastapi import FastAPI, Header, HTTPException, Path
-from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Header, HTTPException, Path, Query
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any, Literal, List
+from typing import Optional, Dict, Any, Literal, List, AsyncIterator, Tuple
 from .core.config import settings
-from .llm.provider import generate_roadmap_struct, revise_roadmap_struct
-from .llm.schema import validate_plan
+from .llm.provider import (
+    plan_cache, plan_flight, token_meter, llm_guard, served_paths, enable_cross_worker_coalescing, warm_up_llm_client,
+    enable_similarity_index, similarity_index,
+)
+from .llm.client import llm_clients
+from .roadmaps import (
+    generate_roadmap_version, revise_roadmap_version,
+    stream_generate_roadmap_version, stream_revise_roadmap_version, reconstruct_plans, roadmap_not_found,
+)
+from .archive import archiver
+from .analytics import feedback_summary
+from .export import export_roadmaps
+from .jobs import enqueue, job_worker, TERMINAL_STATUSES
+from .cohorts import onboard_cohort
+from .profiles import profile_cache, publish_profile_changes
+from .core.auth import token_is_valid
+from .metrics import (
+    MetricsMiddleware, ProfileCacheCollector, StatsCollector, TimedORJSONResponse, collector_mirror, exposition,
+    instrument_pool, register_collector, stage,
+)
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from sqlmodel import select, func
+from sqlalchemy import String, cast
+from datetime import date
+import orjson
+import time
+from sqlmodel.ext.asyncio.session import AsyncSession
+from .core.database import (
+    async_engine, get_session, warm_up_pool, upsert_users_with_profiles, plan_projection, project_plan, summarize_plan,
+    archived_roadmap, archived_versions, ARCHIVE_MAX_VERSION, PLAN_FIELDS, PLAN_SUMMARY,
+    Roadmap, RoadmapVersionCounter, Feedback, LLMJob,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # migrations are applied once by the launcher (uvicorn_start.sh), not by every worker;
+    # each worker only fills its own pool and builds its LLM client before taking traffic
+    await warm_up_pool(settings.DB_POOL_WARMUP)
+    warm_up_llm_client()
+    profile_cache.start_listener()
+    if settings.PLAN_SINGLEFLIGHT_CROSS_WORKER:
+        enable_cross_worker_coalescing(async_engine)
+    if settings.PLAN_SIMILARITY_ENABLED:
+        await enable_similarity_index(async_engine)
+    if settings.JOB_WORKERS > 0:
+        job_worker.start(settings.JOB_WORKERS)
+    if settings.ARCHIVE_ENABLED:
+        archiver.start(settings.ARCHIVE_INTERVAL_SECONDS)
+    if settings.METRICS_MULTIPROC_DIR:
+        collector_mirror.start(settings.METRICS_SYNC_SECONDS)
+    yield
+    await collector_mirror.stop()
+    await archiver.stop()
+    await job_worker.stop()
+    await profile_cache.stop_listener()
+    await llm_clients.aclose()
+    await async_engine.dispose()
 
-from sqlmodel import Session, select, func
-from .core.database import engine, User, Profile, Roadmap, Feedback
-import json
 
 app = FastAPI(
     title=settings.API_NAME,
@@ -17,14 +72,18 @@ app = FastAPI(
         "LifeMap.AI Phase 4 — Personalized roadmaps with profile conditioning and feedback-driven adaptation. "
         "Endpoints: profile upsert, generate, revise, fetch, version history."
     ),
+    lifespan=lifespan,
+    default_response_class=TimedORJSONResponse,
 )
+app.add_middleware(MetricsMiddleware)
+instrument_pool(async_engine)
 
 # ---------------- Auth ----------------
 def verify_token(authorization: Optional[str]):
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Missing/invalid Bearer token")
     token = authorization.split(" ", 1)[1].strip()
-    if token != settings.API_TOKEN:
+    if not token_is_valid(token):
         raise HTTPException(status_code=403, detail="Forbidden")
 
 # ---------------- Schemas ----------------
@@ -48,15 +107,73 @@ class ReviseInput(BaseModel):
     roadmap_id: int
     feedback: FeedbackInput
 
+class CohortMember(BaseModel):
+    name: str
+    email: str
+    data: Dict[str, Any] = Field(default_factory=dict)
+
+class CohortInput(BaseModel):
+    domain: Domain = "career"
+    members: List[CohortMember] = Field(min_length=1, max_length=settings.COHORT_MAX_MEMBERS)
+    # concurrent LLM calls for this request, capped at COHORT_CONCURRENCY
+    concurrency: Optional[int] = Field(default=None, ge=1)
+
+class PinInput(BaseModel):
+    pinned: bool = True
+
 # ---------------- Health ----------------
 @app.get(
     "/health",
     summary="Health check",
     description="Returns service status, environment, and API version.",
 )
-def health():
+async def health():
     return {"status": "ok", "env": settings.ENV, "version": settings.API_VERSION}
 
+# ---------------- LLM: Stats ----------------
+@app.get(
+    "/llm/stats",
+    summary="LLM layer counters",
+    description=(
+        "Returns plan cache size and hit/miss counters, single-flight counters (`collapsed` "
+        "calls shared another request's upstream call), prompt token usage, resilience counters "
+        "(circuit breaker state, retries, hedges, timeouts) and which path served each plan for "
+        "this worker."
+    ),
+)
+async def llm_stats(authorization: Optional[str] = Header(None)):
+    verify_token(authorization)
+    return _llm_stats()
+
+
+def _llm_stats() -> Dict[str, Any]:
+    return {
+        "plan_cache": plan_cache.stats(),
+        "singleflight": plan_flight.stats(),
+        "tokens": token_meter.stats(),
+        "resilience": llm_guard.stats(),
+        "served": served_paths.stats(),
+        "similarity": similarity_index.stats(),
+    }
+
+
+register_collector(StatsCollector(_llm_stats))
+register_collector(ProfileCacheCollector(profile_cache))
+
+# ---------------- Metrics ----------------
+@app.get(
+    "/metrics",
+    summary="Prometheus metrics",
+    description=(
+        "Prometheus text format: request count and latency per route, per-stage latency "
+        "(`lifemap_stage_duration_seconds`), requests in flight, DB pool checkout wait and "
+        "connections, LLM tokens, served paths / fallbacks and resilience counters, summed over "
+        "all workers."
+    ),
+)
+async def metrics():
+    return Response(exposition(), media_type=CONTENT_TYPE_LATEST)
+
 # ---------------- Profile: Upsert ----------------
 @app.post(
     "/profile:upsert",
@@ -66,30 +183,19 @@ def health():
         "`academics`, `career`, or `personal`."
     ),
 )
-def upsert_profile(payload: ProfileUpsertInput, authorization: Optional[str] = Header(None)):
+async def upsert_profile(
+    payload: ProfileUpsertInput,
+    authorization: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_session),
+):
     verify_token(authorization)
 
-    with Session(engine) as session:
-        # find or create user
-        user = session.exec(select(User).where(User.email == payload.email)).first()
-        if not user:
-            user = User(name=payload.name, email=payload.email)
-            session.add(user)
-            session.commit()
-            session.refresh(user)
-
-        # find or create profile
-        prof = session.exec(select(Profile).where(Profile.user_id == user.id)).first()
-        if not prof:
-            prof = Profile(user_id=user.id)
-            session.add(prof)
-
-        # store domain-specific JSON
-        field_name = f"{payload.domain}_json"
-        setattr(prof, field_name, json.dumps(payload.data))
-
-        session.commit()
-        return {"status": "ok", "user_id": user.id, "updated_domain": payload.domain}
+    # find or create the user and store the domain JSON: one transaction, no unique-email race
+    # between concurrent upserts, and cached profiles dropped in every worker on commit
+    with stage("db_write"):
+        user_ids = await upsert_users_with_profiles(session, payload.domain, [payload.model_dump()])
+        await publish_profile_changes(session, user_ids.values())
+    return {"status": "ok", "user_id": user_ids[payload.email], "updated_domain": payload.domain}
 
 # ---------------- Roadmap: Generate (v1 or next) ----------------
 @app.post(
@@ -100,45 +206,9 @@ def upsert_profile(payload: ProfileUpsertInput, authorization: Optional[str] = H
         "profile context; persists to the `roadmaps` table."
     ),
 )
-def generate_roadmap(payload: GenerateInput, authorization: Optional[str] = Header(None)):
+async def generate_roadmap(payload: GenerateInput, authorization: Optional[str] = Header(None)):
     verify_token(authorization)
-
-    with Session(engine) as session:
-        user = session.get(User, payload.user_id)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        profile = session.exec(select(Profile).where(Profile.user_id == user.id)).first()
-        # choose domain data if present; otherwise empty dict
-        domain_json = None
-        if profile:
-            domain_json = getattr(profile, f"{payload.domain}_json", None)
-        profile_data = json.loads(domain_json) if domain_json else {"hours_per_week": 8, "style": "balanced"}
-
-        # build plan via LLM (with safe fallback) and validate
-        plan = generate_roadmap_struct(profile=profile_data, domain=payload.domain)
-        plan = validate_plan(plan).model_dump()
-
-        # compute next version
-        # compute next version safely (MAX can be NULL on first insert)
-        res = session.exec(
-            select(func.max(Roadmap.version)).where(
-                (Roadmap.user_id == user.id) & (Roadmap.domain == payload.domain)
-            )
-        ).first()
-        curr_max = None
-        if res is not None:
-            # res can be a scalar or a tuple depending on driver/version
-            curr_max = res[0] if isinstance(res, (tuple, list)) else res
-        next_version = (curr_max or 0) + 1
-
-        # persist roadmap
-        rm = Roadmap(user_id=user.id, domain=payload.domain, version=next_version, plan_json=json.dumps(plan))
-        session.add(rm)
-        session.commit()
-        session.refresh(rm)
-
-        return {"roadmap_id": rm.id, "version": rm.version, "plan": plan}
+    return TimedORJSONResponse(await generate_roadmap_version(payload.user_id, payload.domain))
 
 # ---------------- Roadmap: Revise (new version + feedback) ----------------
 @app.post(
@@ -149,108 +219,423 @@ def generate_roadmap(payload: GenerateInput, authorization: Optional[str] = Head
         "appends the feedback to the `feedback` table."
     ),
 )
-def revise_roadmap(payload: ReviseInput, authorization: Optional[str] = Header(None)):
+async def revise_roadmap(payload: ReviseInput, authorization: Optional[str] = Header(None)):
     verify_token(authorization)
+    return TimedORJSONResponse(await revise_roadmap_version(payload.roadmap_id, payload.feedback.model_dump()))
 
-    with Session(engine) as session:
-        prev = session.get(Roadmap, payload.roadmap_id)
-        if not prev:
-            raise HTTPException(status_code=404, detail="Roadmap not found")
+# ---------------- Roadmap: Streaming generate / revise (SSE) ----------------
+def _sse_event(name: str, data: Dict[str, Any]) -> bytes:
+    return b"event: " + name.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
 
-        # save feedback
-        fb = Feedback(
-            roadmap_id=prev.id,
-            signal_type=payload.feedback.signal_type,
-            notes=payload.feedback.notes
-        )
-        session.add(fb)
-
-        prev_plan = json.loads(prev.plan_json)
-        domain = prev.domain
-        # LLM-aware revision with feedback-driven prompts (falls back locally if no API key)
-        new_plan = revise_roadmap_struct(plan=prev_plan, feedback=payload.feedback.model_dump(), domain=domain)
-        new_plan = validate_plan(new_plan).model_dump()
-
-        # version bump
-        new_version = prev.version + 1
-        new_rm = Roadmap(
-            user_id=prev.user_id,
-            domain=domain,
-            version=new_version,
-            plan_json=json.dumps(new_plan)
-        )
-        session.add(new_rm)
-        session.commit()
-        session.refresh(new_rm)
 
-        return {"roadmap_id": new_rm.id, "version": new_rm.version, "plan": json.loads(new_rm.plan_json)}
+async def _sse_response(events: AsyncIterator[Tuple[str, Dict[str, Any]]]) -> StreamingResponse:
+    # pull the "start" event first so lookup errors (404) are still returned as plain responses
+    first = await events.__anext__()
+
+    async def body():
+        yield _sse_event(*first)
+        try:
+            async for name, data in events:
+                yield _sse_event(name, data)
+        except HTTPException as exc:
+            yield _sse_event("error", {"detail": exc.detail})
+        except Exception:
+            yield _sse_event("error", {"detail": "Roadmap generation failed"})
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post(
+    "/roadmap:generate/stream",
+    summary="Generate roadmap (streaming)",
+    description=(
+        "Server-Sent Events variant of `/roadmap:generate`. Emits `start`, then one `milestone` or "
+        "`timeline_entry` event per item as soon as it validates, then `done` with "
+        "`roadmap_id`, `version` and the persisted `plan` (authoritative; replaces the partial view)."
+    ),
+)
+async def generate_roadmap_stream(payload: GenerateInput, authorization: Optional[str] = Header(None)):
+    verify_token(authorization)
+    return await _sse_response(stream_generate_roadmap_version(payload.user_id, payload.domain))
+
+
+@app.post(
+    "/roadmap:revise/stream",
+    summary="Revise roadmap (streaming)",
+    description="Server-Sent Events variant of `/roadmap:revise`; same events as `/roadmap:generate/stream`.",
+)
+async def revise_roadmap_stream(payload: ReviseInput, authorization: Optional[str] = Header(None)):
+    verify_token(authorization)
+    return await _sse_response(stream_revise_roadmap_version(payload.roadmap_id, payload.feedback.model_dump()))
+
+# ---------------- Cohort: bulk upsert + generate (NDJSON) ----------------
+async def _ndjson_response(lines: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    # pull the first line before responding so validation errors are still plain responses
+    first = await lines.__anext__()
+
+    async def body():
+        yield orjson.dumps(first) + b"\n"
+        try:
+            async for line in lines:
+                yield orjson.dumps(line) + b"\n"
+        except Exception:
+            yield orjson.dumps({"type": "error", "detail": "Cohort onboarding failed"}) + b"\n"
+
+    return StreamingResponse(body(), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
+
+@app.post(
+    "/cohort:onboard",
+    summary="Onboard a cohort",
+    description=(
+        "Bulk `/profile:upsert` + `/roadmap:generate` for up to `COHORT_MAX_MEMBERS` users of one "
+        "domain. Profiles are stored in one transaction; one plan is generated per distinct "
+        "profile `data` with at most `concurrency` LLM calls in flight, and roadmaps are inserted "
+        "in batches. Streams NDJSON: a `start` line, one `roadmap` (or `error`) line per member "
+        "in completion order (`index` is the member's position in the request), then `done`."
+    ),
+)
+async def onboard_cohort_endpoint(payload: CohortInput, authorization: Optional[str] = Header(None)):
+    verify_token(authorization)
+    concurrency = min(payload.concurrency or settings.COHORT_CONCURRENCY, settings.COHORT_CONCURRENCY)
+    members = [m.model_dump() for m in payload.members]
+    return await _ndjson_response(onboard_cohort(payload.domain, members, concurrency))
+
+# ---------------- Jobs: queued generate / revise ----------------
+@app.post(
+    "/jobs/roadmap:generate",
+    status_code=202,
+    summary="Queue roadmap generation",
+    description=(
+        "Same as `/roadmap:generate` but returns a job id immediately; the LLM call runs on a "
+        "background worker. Poll `GET /jobs/{job_id}` for the result."
+    ),
+)
+async def submit_generate_job(
+    payload: GenerateInput,
+    authorization: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_session),
+):
+    verify_token(authorization)
+
+    if await profile_cache.get(session, payload.user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    job = await enqueue(session, "generate", payload.model_dump())
+    return {"job_id": job.id, "status": job.status}
+
+
+@app.post(
+    "/jobs/roadmap:revise",
+    status_code=202,
+    summary="Queue roadmap revision",
+    description="Same as `/roadmap:revise` but runs on a background worker; returns a job id immediately.",
+)
+async def submit_revise_job(
+    payload: ReviseInput,
+    authorization: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_session),
+):
+    verify_token(authorization)
+
+    if not await session.get(Roadmap, payload.roadmap_id):
+        raise await roadmap_not_found(session, payload.roadmap_id)
+    job = await enqueue(session, "revise", payload.model_dump())
+    return {"job_id": job.id, "status": job.status}
+
+
+@app.get(
+    "/jobs:stats",
+    summary="Job queue metrics",
+    description="Queue depth by status, age of the oldest queued job, and this worker's counters.",
+)
+async def job_stats(authorization: Optional[str] = Header(None)):
+    verify_token(authorization)
+    return await job_worker.stats()
+
+
+@app.get(
+    "/jobs/{job_id}",
+    summary="Get job status",
+    description=(
+        "Returns job status (`queued`, `running`, `succeeded`, `failed`) and, once finished, the "
+        "same body the synchronous endpoint would have returned. `wait` long-polls up to that many "
+        "seconds for the job to finish."
+    ),
+)
+async def get_job(
+    job_id: int = Path(..., gt=0),
+    wait: float = Query(0, ge=0, le=30),
+    authorization: Optional[str] = Header(None)
+):
+    verify_token(authorization)
+
+    deadline = time.monotonic() + wait
+    while True:
+        # a short session per poll, so a long poll does not hold a pooled connection
+        async with AsyncSession(async_engine) as session:
+            job = await session.get(LLMJob, job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        remaining = deadline - time.monotonic()
+        if job.status in TERMINAL_STATUSES or remaining <= 0:
+            break
+        # wakes early when a local worker finishes something; otherwise re-checks each poll interval
+        await job_worker.wait_for_progress(min(remaining, settings.JOB_POLL_SECONDS))
+
+    return TimedORJSONResponse({
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "attempts": job.attempts,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "updated_at": job.updated_at.isoformat(),
+    })
 
 # ---------------- Roadmap: Get by ID ----------------
+# plan parts that can be requested with `fields=`; projected in Postgres, not in Python
+PlanField = Literal[tuple(PLAN_FIELDS)]  # type: ignore[valid-type]
+
+
 @app.get(
     "/roadmap/{roadmap_id}",
     summary="Get roadmap by id",
-    description="Returns a stored roadmap including its plan and any associated feedback entries.",
+    description=(
+        "Returns a stored roadmap including its plan and any associated feedback entries. "
+        "Repeat `fields` (e.g. `fields=title&fields=timeline`) to return only those plan parts."
+    ),
 )
-def get_roadmap(roadmap_id: int = Path(..., gt=0), authorization: Optional[str] = Header(None)):
+async def get_roadmap(
+    roadmap_id: int = Path(..., gt=0),
+    fields: Optional[List[PlanField]] = Query(None),
+    authorization: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_session),
+):
     verify_token(authorization)
 
-    with Session(engine) as session:
-        rm = session.get(Roadmap, roadmap_id)
+    with stage("db_read"):
+        # plans come back as JSON text and are spliced into the response without a decode
+        plan_col = cast(plan_projection(fields) if fields else Roadmap.plan_json, String)
+        rm = (await session.exec(
+            select(Roadmap.id, Roadmap.user_id, Roadmap.domain, Roadmap.version, Roadmap.created_at, plan_col,
+                   Roadmap.plan_json.is_(None))
+            .where(Roadmap.id == roadmap_id)
+        )).first()
         if not rm:
-            raise HTTPException(status_code=404, detail="Roadmap not found")
-
-        fbs = session.exec(select(Feedback).where(Feedback.roadmap_id == roadmap_id)).all()
-        return {
-            "roadmap_id": rm.id,
-            "user_id": rm.user_id,
-            "domain": rm.domain,
-            "version": rm.version,
-            "created_at": rm.created_at.isoformat(),
-            "plan": json.loads(rm.plan_json),
-            "feedback": [{"id": x.id, "signal_type": x.signal_type, "notes": x.notes, "created_at": x.created_at.isoformat()} for x in fbs]
-        }
+            archived = await archived_roadmap(session, roadmap_id)
+            if archived is None:
+                raise HTTPException(status_code=404, detail="Roadmap not found")
+            return TimedORJSONResponse(_archived_roadmap_body(archived, fields))
+
+        if rm[6]:
+            # stored as a patch: rebuild the plan and project it here instead
+            plan = (await reconstruct_plans(session, rm[1], rm[2], [rm[3]]))[rm[3]]
+            plan_body = orjson.Fragment(orjson.dumps(project_plan(plan, fields) if fields else plan))
+        else:
+            plan_body = orjson.Fragment(rm[5])
+
+        fbs = (await session.exec(select(Feedback).where(Feedback.roadmap_id == roadmap_id))).all()
+    return TimedORJSONResponse({
+        "roadmap_id": rm[0],
+        "user_id": rm[1],
+        "domain": rm[2],
+        "version": rm[3],
+        "created_at": rm[4].isoformat(),
+        "plan": plan_body,
+        "feedback": [{"id": x.id, "signal_type": x.signal_type, "notes": x.notes, "created_at": x.created_at.isoformat()} for x in fbs]
+    })
+
+
+def _archived_roadmap_body(entry: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """`GET /roadmap/{id}` body for a version in the cold archive."""
+    return {
+        "roadmap_id": entry["id"],
+        "user_id": entry["user_id"],
+        "domain": entry["domain"],
+        "version": entry["version"],
+        "created_at": entry["created_at"],
+        "plan": project_plan(entry["plan"], fields) if fields else entry["plan"],
+        "feedback": entry["feedback"],
+    }
+
+
+@app.post(
+    "/roadmap/{roadmap_id}:pin",
+    summary="Pin or unpin a roadmap version",
+    description="Pinned versions are never moved to the cold archive. Archived versions cannot be pinned.",
+)
+async def pin_roadmap(
+    payload: PinInput,
+    roadmap_id: int = Path(..., gt=0),
+    authorization: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_session),
+):
+    verify_token(authorization)
+
+    rm = await session.get(Roadmap, roadmap_id)
+    if not rm:
+        raise await roadmap_not_found(session, roadmap_id)
+    rm.pinned = payload.pinned
+    session.add(rm)
+    return {"roadmap_id": roadmap_id, "pinned": rm.pinned}
 
 # ---------------- Roadmap: Get Version History ----------------
+PlanView = Literal["full", "summary", "none"]
+
+
 @app.get(
     "/roadmap/{user_id}/{domain}/history",
     summary="Get roadmap version history",
-    description="Returns all versions of a roadmap for a user and domain, showing adaptive evolution over time.",
+    description=(
+        "Returns versions of a roadmap for a user and domain, showing adaptive evolution over time. "
+        "Pages by version: pass the returned `next_after_version` as `after_version` to continue. "
+        "`plans` selects full plans, a compact summary, or no plan bodies; `fields` returns "
+        "only the named plan parts, as on `GET /roadmap/{id}`."
+    ),
 )
-def get_roadmap_history(
+async def get_roadmap_history(
     user_id: int = Path(..., gt=0),
     domain: Domain = Path(...),
-    authorization: Optional[str] = Header(None)
+    after_version: int = Query(0, ge=0, description="Return versions strictly greater than this"),
+    limit: int = Query(100, ge=1, le=1000),
+    plans: PlanView = Query("full"),
+    fields: Optional[List[PlanField]] = Query(None),
+    authorization: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_session),
 ):
     verify_token(authorization)
 
-    with Session(engine) as session:
-        user = session.get(User, user_id)
-        if not user:
+    with stage("db_read"):
+        if await profile_cache.get(session, user_id) is None:
             raise HTTPException(status_code=404, detail="User not found")
 
-        roadmaps = session.exec(
-            select(Roadmap)
-            .where((Roadmap.user_id == user_id) & (Roadmap.domain == domain))
+        scope = (Roadmap.user_id == user_id) & (Roadmap.domain == domain)
+        # feedback counts, the page itself, the overall total and the archived count in one round trip
+        archived_count = func.coalesce(
+            select(RoadmapVersionCounter.archived_versions)
+            .where((RoadmapVersionCounter.user_id == user_id) & (RoadmapVersionCounter.domain == domain))
+            .scalar_subquery(),
+            0,
+        )
+        total = select(func.count()).select_from(Roadmap).where(scope).scalar_subquery() + archived_count
+        columns = [Roadmap.id, Roadmap.version, Roadmap.created_at, func.count(Feedback.id), total,
+                   Roadmap.plan_json.is_(None), archived_count]
+        if fields:
+            columns.append(cast(plan_projection(fields), String))
+        elif plans == "full":
+            columns.append(cast(Roadmap.plan_json, String))
+        elif plans == "summary":
+            columns.append(cast(PLAN_SUMMARY, String))
+        rows = (await session.exec(
+            select(*columns)
+            .outerjoin(Feedback, Feedback.roadmap_id == Roadmap.id)
+            .where(scope & (Roadmap.version > after_version))
+            .group_by(Roadmap.id)
             .order_by(Roadmap.version)
-        ).all()
-
-        if not roadmaps:
-            return {"user_id": user_id, "domain": domain, "versions": []}
-
-        versions = []
-        for rm in roadmaps:
-            fbs = session.exec(select(Feedback).where(Feedback.roadmap_id == rm.id)).all()
-            versions.append({
-                "roadmap_id": rm.id,
-                "version": rm.version,
-                "created_at": rm.created_at.isoformat(),
-                "plan": json.loads(rm.plan_json),
-                "feedback_count": len(fbs),
-            })
-
-        return {
-            "user_id": user_id,
-            "domain": domain,
-            "total_versions": len(versions),
-            "versions": versions,
+            .limit(limit)
+        )).all()
+
+        # versions stored as patches are rebuilt and projected in Python
+        rebuilt: Dict[int, Dict[str, Any]] = {}
+        patched = [row[1] for row in rows if row[5]]
+        if patched and (fields or plans != "none"):
+            rebuilt = await reconstruct_plans(session, user_id, domain, patched)
+
+        # archived versions are older than the latest one, so they only belong on pages that
+        # start before the last hot version returned
+        archived: List[Dict[str, Any]] = []
+        if rows and rows[0][6]:
+            upto = rows[-1][1] if len(rows) == limit else ARCHIVE_MAX_VERSION
+            archived = await archived_versions(session, user_id, domain, after_version, upto, limit)
+
+    versions = []
+    for row in rows:
+        item = {
+            "roadmap_id": row[0],
+            "version": row[1],
+            "created_at": row[2].isoformat(),
+            "feedback_count": row[3],
         }
+        plan = rebuilt.get(row[1])
+        if fields:
+            item["plan"] = project_plan(plan, fields) if plan is not None else orjson.Fragment(row[7])
+        elif plans == "full":
+            item["plan"] = plan if plan is not None else orjson.Fragment(row[7])
+        elif plans == "summary":
+            item["plan_summary"] = summarize_plan(plan) if plan is not None else orjson.Fragment(row[7])
+        versions.append(item)
+    if archived:
+        for entry in archived:
+            item = {
+                "roadmap_id": entry["id"],
+                "version": entry["version"],
+                "created_at": entry["created_at"],
+                "feedback_count": len(entry["feedback"]),
+            }
+            if fields:
+                item["plan"] = project_plan(entry["plan"], fields)
+            elif plans == "full":
+                item["plan"] = entry["plan"]
+            elif plans == "summary":
+                item["plan_summary"] = summarize_plan(entry["plan"])
+            versions.append(item)
+        versions = sorted(versions, key=lambda v: v["version"])[:limit]
+
+    total_versions = rows[0][4] if rows else 0
+    if not rows and after_version:
+        # paged past the end: the total needs its own count
+        total_versions = (await session.exec(select(total))).one()
+
+    return TimedORJSONResponse({
+        "user_id": user_id,
+        "domain": domain,
+        "total_versions": total_versions,
+        "versions": versions,
+        "next_after_version": versions[-1]["version"] if len(versions) == limit else None,
+    })
+
+# ---------------- Analytics: feedback signals ----------------
+@app.get(
+    "/analytics/feedback",
+    summary="Feedback signal counts per domain and model",
+    description="Reads the incrementally maintained feedback rollups; `since`/`until` are inclusive UTC days.",
+)
+async def get_feedback_analytics(
+    domain: Optional[Domain] = None,
+    model: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    authorization: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_session),
+):
+    verify_token(authorization)
+    groups = await feedback_summary(session, domain=domain, model=model, since=since, until=until)
+    return TimedORJSONResponse({"since": since, "until": until, "groups": groups})
+
+# ---------------- Export: roadmaps + feedback (NDJSON) ----------------
+@app.get(
+    "/export/roadmaps",
+    summary="Stream every roadmap version with its feedback as NDJSON",
+    description="One line per version; read through server-side cursors, so memory stays flat. "
+                "A final {\"error\": ...} line means the export was cut short.",
+)
+async def export_roadmaps_ndjson(
+    domain: Optional[Domain] = None,
+    archived: bool = Query(True, description="Include versions in the cold archive"),
+    authorization: Optional[str] = Header(None),
+):
+    verify_token(authorization)
+
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            async for chunk in export_roadmaps(domain=domain, archived=archived):
+                yield chunk
+        except Exception:
+            yield orjson.dumps({"error": "Export failed"}) + b"\n"
+
+    return StreamingResponse(body(), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
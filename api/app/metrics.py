@@ -0,0 +1,334 @@
+"""Prometheus metrics: per-route request latency, per-stage spans, LLM, DB pool and cache counters.
+
+`MetricsMiddleware` is a plain ASGI middleware (no per-request task or body buffering) that
+records request count and latency by method, route template and status, and the number of
+requests in flight. `stage(name)` times one step of a request (profile load, LLM call,
+validation, DB write, encoding) into `lifemap_stage_duration_seconds`. LLM token usage, served
+paths (fallbacks), resilience and cache counters already kept by the LLM layer are read at
+scrape time by `StatsCollector`, so they cost nothing per request. Everything is exposed on
+`GET /metrics`; METRICS_ENABLED=false turns the hot-path recording off.
+
+With several workers, uvicorn_start.sh sets PROMETHEUS_MULTIPROC_DIR: every worker then writes
+its samples to files there (prometheus_client multiprocess mode) and `/metrics` in any worker
+merges them. The scrape-time collectors only see their own worker, so `CollectorMirror` copies
+their values into multiprocess metrics every METRICS_SYNC_SECONDS.
+"""
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+import asyncio
+import os
+import time
+
+from fastapi.responses import ORJSONResponse
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, disable_created_metrics, generate_latest, multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from .core.config import settings
+
+# requests span ~1 ms reads to LLM calls of tens of seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+# no `_created` series: they double the scrape size and nothing here reads them
+disable_created_metrics()
+registry = CollectorRegistry()
+enabled = settings.METRICS_ENABLED
+
+REQUESTS = Counter(
+    "lifemap_http_requests", "HTTP requests by method, route template and status",
+    ["method", "route", "status"], registry=registry,
+)
+REQUEST_SECONDS = Histogram(
+    "lifemap_http_request_duration_seconds", "HTTP request latency, until the last body byte is sent",
+    ["method", "route"], buckets=LATENCY_BUCKETS, registry=registry,
+)
+IN_FLIGHT = Gauge("lifemap_http_requests_in_flight", "HTTP requests being handled", registry=registry,
+                  multiprocess_mode="livesum")
+STAGE_SECONDS = Histogram(
+    "lifemap_stage_duration_seconds", "Time spent in one stage of a request",
+    ["stage"], buckets=LATENCY_BUCKETS, registry=registry,
+)
+POOL_WAIT_SECONDS = Histogram(
+    "lifemap_db_pool_checkout_wait_seconds", "Time to check a connection out of the DB pool",
+    buckets=WAIT_BUCKETS, registry=registry,
+)
+
+# label children are resolved once per label set instead of on every observation
+_request_children: Dict[Tuple[str, str, int], Tuple[Any, Any]] = {}
+_stage_children: Dict[str, Any] = {}
+
+
+def set_enabled(value: bool) -> None:
+    global enabled
+    enabled = value
+
+
+def _request_metrics(method: str, route: str, status: int) -> Tuple[Any, Any]:
+    key = (method, route, status)
+    children = _request_children.get(key)
+    if children is None:
+        children = (REQUESTS.labels(method, route, str(status)), REQUEST_SECONDS.labels(method, route))
+        _request_children[key] = children
+    return children
+
+
+def observe_stage(name: str, seconds: float) -> None:
+    child = _stage_children.get(name)
+    if child is None:
+        child = _stage_children[name] = STAGE_SECONDS.labels(name)
+    child.observe(seconds)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Record the duration of the enclosed block as stage `name` (also when it raises)."""
+    if not enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """Request count, latency and in-flight gauge per route template. Unmatched paths share
+    one `route` label so scanners cannot grow the label set."""
+
+    def __init__(self, app: Callable) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not enabled:
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec()
+            # the router stores the matched route in the scope
+            route = scope.get("route")
+            count, latency = _request_metrics(scope["method"], getattr(route, "path", "unmatched"), status)
+            count.inc()
+            latency.observe(elapsed)
+
+
+class TimedORJSONResponse(ORJSONResponse):
+    """ORJSONResponse that records its encoding time as the `encode` stage."""
+
+    def render(self, content: Any) -> bytes:
+        if not enabled:
+            return super().render(content)
+        start = time.perf_counter()
+        body = super().render(content)
+        observe_stage("encode", time.perf_counter() - start)
+        return body
+
+
+def instrument_pool(async_engine) -> None:
+    """Time every connection checkout on the engine's pool, including waits for a free
+    connection when the pool is exhausted."""
+    pool = async_engine.sync_engine.pool
+    do_get = pool._do_get
+
+    def timed_do_get():
+        if not enabled:
+            return do_get()
+        start = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            POOL_WAIT_SECONDS.observe(time.perf_counter() - start)
+
+    pool._do_get = timed_do_get
+    register_collector(PoolCollector(pool))
+
+
+class PoolCollector(Collector):
+    """Pool size and checked-out connections, read at scrape time."""
+
+    def __init__(self, pool) -> None:
+        self.pool = pool
+
+    def collect(self):
+        gauge = GaugeMetricFamily("lifemap_db_pool_connections", "DB pool connections by state", labels=["state"])
+        gauge.add_metric(["checked_out"], self.pool.checkedout())
+        gauge.add_metric(["idle"], self.pool.checkedin())
+        gauge.add_metric(["overflow"], max(0, self.pool.overflow()))
+        yield gauge
+        yield GaugeMetricFamily("lifemap_db_pool_size", "Configured DB pool size", value=self.pool.size())
+
+
+class ProfileCacheCollector(Collector):
+    """User/profile cache lookups and size (`app.profiles.ProfileCache`), read at scrape time."""
+
+    def __init__(self, cache) -> None:
+        self.cache = cache
+
+    def collect(self):
+        s = self.cache.stats()
+        lookups = CounterMetricFamily("lifemap_profile_cache_lookups", "Profile cache lookups by result",
+                                      labels=["result"])
+        lookups.add_metric(["hit"], s["hits"])
+        lookups.add_metric(["miss"], s["misses"])
+        yield lookups
+        yield CounterMetricFamily("lifemap_profile_cache_invalidations", "Profile cache invalidations",
+                                  value=s["invalidations"])
+        yield GaugeMetricFamily("lifemap_profile_cache_size", "Users in the profile cache", value=s["size"])
+        yield GaugeMetricFamily("lifemap_profile_cache_listening", "1 while the invalidation listener is connected",
+                                value=1 if s["listening"] else 0)
+
+
+class StatsCollector(Collector):
+    """Exports the LLM layer's own counters (the `/llm/stats` document) at scrape time."""
+
+    def __init__(self, stats: Callable[[], Dict[str, Any]]) -> None:
+        self.stats = stats
+
+    def collect(self):
+        s = self.stats()
+
+        tokens = CounterMetricFamily("lifemap_llm_tokens", "LLM tokens by kind", labels=["kind"])
+        for kind, key in (("prompt", "prompt_tokens"), ("completion", "completion_tokens"),
+                          ("cached_prompt", "cached_prompt_tokens"), ("prompt_estimated", "prompt_tokens_estimated")):
+            tokens.add_metric([kind], s["tokens"][key])
+        yield tokens
+        yield CounterMetricFamily("lifemap_llm_trimmed_prompts", "Prompts pruned to the token budget",
+                                  value=s["tokens"]["trimmed_calls"])
+
+        served = CounterMetricFamily("lifemap_llm_served", "Plans by serving path (llm, cache, similar, local, fallback_*)",
+                                     labels=["path"])
+        for path, count in s["served"].items():
+            served.add_metric([path], count)
+        yield served
+
+        guard = s["resilience"]
+        calls = CounterMetricFamily("lifemap_llm_guard_events", "LLM call attempts, retries, hedges and failures",
+                                    labels=["event"])
+        for event in ("calls", "attempts", "retries", "hedges", "hedges_won", "timeouts", "failures", "short_circuited"):
+            calls.add_metric([event], guard[event])
+        yield calls
+        breaker = GaugeMetricFamily("lifemap_llm_breaker_state", "Circuit breaker state (1 = current)", labels=["state"])
+        for state in ("closed", "open", "half_open"):
+            breaker.add_metric([state], 1 if guard["breaker"]["state"] == state else 0)
+        yield breaker
+
+        cache = CounterMetricFamily("lifemap_plan_cache_lookups", "Plan cache lookups by result", labels=["result"])
+        cache.add_metric(["hit"], s["plan_cache"]["hits"])
+        cache.add_metric(["shared_hit"], s["plan_cache"]["shared_hits"])
+        cache.add_metric(["miss"], s["plan_cache"]["misses"])
+        yield cache
+        yield GaugeMetricFamily("lifemap_plan_cache_size", "Plans in the local plan cache", value=s["plan_cache"]["size"])
+
+        similar = CounterMetricFamily("lifemap_similarity_lookups", "Similar-profile lookups by result",
+                                      labels=["result"])
+        for result, key in (("hit", "hits"), ("miss", "misses"), ("error", "errors")):
+            similar.add_metric([result], s["similarity"][key])
+        yield similar
+        yield GaugeMetricFamily("lifemap_similarity_index_size", "Profile encodings in this worker's similarity index",
+                                value=s["similarity"]["size"])
+
+        flight = CounterMetricFamily("lifemap_singleflight_calls", "Generate/revise calls by single-flight role",
+                                     labels=["role"])
+        for role in ("leaders", "collapsed", "cross_worker_collapsed"):
+            flight.add_metric([role], s["singleflight"][role])
+        yield flight
+
+
+
+class CollectorMirror:
+    """Multiprocess mode: copies the values of scrape-time collectors into multiprocess metrics
+    of the same names, so every worker's values reach the merged `/metrics`. Counters advance
+    by their increase since the last copy (and keep counting after the worker exits); gauges
+    are summed over live workers."""
+
+    def __init__(self) -> None:
+        self.collectors: List[Collector] = []
+        self._metrics: Dict[str, Any] = {}
+        self._copied: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _metric(self, family, labelnames: List[str]):
+        metric = self._metrics.get(family.name)
+        if metric is None:
+            if family.type == "counter":
+                metric = Counter(family.name, family.documentation, labelnames, registry=None)
+            else:
+                metric = Gauge(family.name, family.documentation, labelnames, registry=None,
+                               multiprocess_mode="livesum")
+            self._metrics[family.name] = metric
+        return metric
+
+    def sync(self) -> None:
+        for collector in self.collectors:
+            for family in collector.collect():
+                for sample in family.samples:
+                    metric = self._metric(family, list(sample.labels))
+                    child = metric.labels(**sample.labels) if sample.labels else metric
+                    if family.type != "counter":
+                        child.set(sample.value)
+                        continue
+                    key = (family.name, tuple(sample.labels.items()))
+                    increase = sample.value - self._copied.get(key, 0.0)
+                    self._copied[key] = sample.value
+                    if increase > 0:
+                        child.inc(increase)
+
+    def start(self, interval_seconds: float) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(interval_seconds), name="metrics-mirror")
+
+    async def stop(self) -> None:
+        """Last copy, then mark this worker dead so its gauges leave the sums."""
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        self.sync()
+        multiprocess.mark_process_dead(os.getpid())
+
+    async def _loop(self, interval_seconds: float) -> None:
+        while True:
+            try:
+                self.sync()
+            except Exception as exc:
+                print(f"[metrics] collector copy failed: {exc}")
+            await asyncio.sleep(interval_seconds)
+
+
+collector_mirror = CollectorMirror()
+
+
+def register_collector(collector: Collector) -> None:
+    """Add a scrape-time collector: to the registry, or to the mirror in multiprocess mode."""
+    if settings.METRICS_MULTIPROC_DIR:
+        collector_mirror.collectors.append(collector)
+    else:
+        registry.register(collector)
+
+
+def exposition() -> bytes:
+    """The `/metrics` body: this process's registry, or in multiprocess mode the samples of all
+    workers (live and exited) merged from PROMETHEUS_MULTIPROC_DIR."""
+    if not settings.METRICS_MULTIPROC_DIR:
+        return generate_latest(registry)
+    collector_mirror.sync()
+    merged = CollectorRegistry()
+    multiprocess.MultiProcessCollector(merged)
+    return generate_latest(merged)
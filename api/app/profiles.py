@@ -0,0 +1,150 @@
+"""Per-worker cache of user rows and profiles, invalidated across workers with LISTEN/NOTIFY.
+
+Generate, job submit and history look a user (and for generate, their profile) up on every
+request, but both only change through `/profile:upsert` and cohort onboarding. `ProfileCache`
+keeps, per user id, the profile JSON of every domain as loaded by one joined query, for
+PROFILE_CACHE_TTL_SECONDS. Writers call `publish_profile_changes` inside their transaction:
+it drops the local entries at once and sends a NOTIFY that Postgres delivers on commit, and
+each worker's listener (a dedicated connection, see `ProfileCache.start_listener`) drops the
+entries named by it. While the listener is not connected, nothing new is cached.
+
+Cached dicts are shared between requests; treat them as read-only.
+"""
+from typing import Any, Dict, Iterable, Optional, Tuple
+import asyncio
+
+import psycopg
+from sqlalchemy import text
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .core.config import settings
+from .core.database import PROFILE_DOMAINS, Profile, User
+from .llm.cache import LRUCache
+
+CHANNEL = "lifemap_profiles"
+# NOTIFY payloads are limited to 8000 bytes; bigger batches invalidate everything
+MAX_PAYLOAD = 7900
+
+Profiles = Dict[str, Optional[Dict[str, Any]]]
+
+_LOAD = (
+    select(User.id, Profile.academics_json, Profile.career_json, Profile.personal_json)
+    .outerjoin(Profile, Profile.user_id == User.id)
+)
+
+
+class ProfileCache:
+    """User id -> {domain: profile JSON or None}. A missing user is never cached."""
+
+    def __init__(self, enabled: bool, max_size: int, ttl_seconds: float):
+        self.enabled = enabled
+        self._cache = LRUCache(max_size, ttl_seconds)
+        # bumped by every invalidation: a load that raced one is not stored
+        self._generation = 0
+        self._listener: Optional[asyncio.Task] = None
+        self.listening = False
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get(self, session: AsyncSession, user_id: int) -> Optional[Profiles]:
+        """Profiles of every domain for `user_id`, or None when the user does not exist."""
+        if self.enabled:
+            cached = self._cache.get(str(user_id))
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+        generation = self._generation
+        row = (await session.exec(_LOAD.where(User.id == user_id))).first()
+        if row is None:
+            return None
+        profiles = dict(zip(PROFILE_DOMAINS, row[1:]))
+        if self._cacheable() and generation == self._generation:
+            self._cache.set(str(user_id), profiles)
+        return profiles
+
+    def _cacheable(self) -> bool:
+        # without a listener other workers' upserts would go unnoticed until the TTL; behind
+        # PgBouncer (no LISTEN) that is the accepted bound
+        return self.enabled and (self.listening or self._listener is None)
+
+    def invalidate(self, user_ids: Optional[Iterable[int]] = None) -> None:
+        """Drop `user_ids` (everything when None) from this worker's cache."""
+        self._generation += 1
+        self.invalidations += 1
+        if user_ids is None:
+            self._cache.clear()
+            return
+        for user_id in user_ids:
+            self._cache.pop(str(user_id))
+
+    def _on_notify(self, payload: str) -> None:
+        self.invalidate(None if payload == "*" else [int(i) for i in payload.split(",") if i])
+
+    def start_listener(self) -> None:
+        """LISTEN for other workers' invalidations (not possible through transaction pooling)."""
+        if self.enabled and not settings.DB_PGBOUNCER and self._listener is None:
+            self._listener = asyncio.create_task(self._listen(), name="profile-cache-listener")
+
+    async def stop_listener(self) -> None:
+        task, self._listener = self._listener, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self.listening = False
+
+    async def _listen(self) -> None:
+        delay = 0.5
+        while True:
+            try:
+                conn = await psycopg.AsyncConnection.connect(
+                    host=settings.DB_HOST, port=settings.DB_PORT, dbname=settings.DB_NAME,
+                    user=settings.DB_USER, password=settings.DB_PASSWORD, autocommit=True,
+                )
+                async with conn:
+                    await conn.execute(f"LISTEN {CHANNEL}")
+                    # changes made while no listener was connected were never delivered
+                    self.invalidate(None)
+                    self.listening = True
+                    delay = 0.5
+                    async for notify in conn.notifies():
+                        self._on_notify(notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                print(f"[profiles] cache listener disconnected: {exc}")
+            self.listening = False
+            self.invalidate(None)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "size": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "listening": self.listening,
+        }
+
+
+profile_cache = ProfileCache(
+    enabled=settings.PROFILE_CACHE_ENABLED,
+    max_size=settings.PROFILE_CACHE_SIZE,
+    ttl_seconds=settings.PROFILE_CACHE_TTL_SECONDS,
+)
+
+
+async def publish_profile_changes(session: AsyncSession, user_ids: Iterable[int]) -> None:
+    """Invalidate the cached profiles of `user_ids` in this worker now and in every worker
+    when the session's transaction commits. Call after the write, before the commit."""
+    ids: Tuple[int, ...] = tuple(sorted(set(user_ids)))
+    profile_cache.invalidate(ids)
+    payload = ",".join(map(str, ids))
+    await session.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": CHANNEL, "payload": payload if len(payload) <= MAX_PAYLOAD else "*"},
+    )
@@ -0,0 +1,248 @@
+"""Roadmap generate/revise flows shared by the HTTP handlers and the background job workers."""
+from typing import Dict, Any, AsyncIterator, Iterable, Optional, Tuple
+
+import orjson
+from fastapi import HTTPException
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .core.config import settings
+from .core.database import async_engine, archived_roadmap, archived_versions, insert_next_version, Roadmap, Feedback
+from .llm.patch import apply_patch, diff_plans, patch_to_json
+from .llm.provider import (
+    generate_roadmap_struct, revise_roadmap_struct,
+    stream_generate_roadmap_struct, stream_revise_roadmap_struct, plan_source, served_paths,
+)
+from .analytics import count_feedback
+from .llm.schema import ensure_valid
+from .metrics import stage
+from .profiles import profile_cache
+
+
+DEFAULT_PROFILE: Dict[str, Any] = {"hours_per_week": 8, "style": "balanced"}
+
+
+async def reconstruct_plans(session: AsyncSession, user_id: int, domain: str, versions: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+    """Full plans for `versions`, replaying stored patches from their nearest snapshots.
+
+    Rows are fetched a generation at a time (the requested versions, then the bases they
+    still miss, ...), so a page of consecutive revisions costs two or three queries and
+    each intermediate plan is built once.
+    """
+    versions = list(versions)
+    rows: Dict[int, Tuple[Optional[int], Optional[Dict[str, Any]], Optional[Dict[str, Any]]]] = {}
+    wanted = set(versions)
+    scope = (Roadmap.user_id == user_id) & (Roadmap.domain == domain)
+    while wanted:
+        fetched = (await session.execute(
+            select(Roadmap.version, Roadmap.base_version, Roadmap.plan_json, Roadmap.patch_json)
+            .where(scope & Roadmap.version.in_(wanted))
+        )).all()
+        for version, base, plan, patch in fetched:
+            rows[version] = (base, plan, patch)
+        missing = wanted - rows.keys()
+        if missing:
+            # archived versions (and bases) are stored as full plans
+            for entry in await archived_versions(session, user_id, domain, min(missing) - 1, max(missing)):
+                if entry["version"] in missing:
+                    rows[entry["version"]] = (None, entry["plan"], None)
+            missing -= rows.keys()
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Roadmap version {min(missing)} not found")
+        wanted = {base for base, plan, _ in rows.values() if plan is None and base not in rows}
+
+    plans: Dict[int, Dict[str, Any]] = {}
+    for version in versions:
+        chain = []
+        v = version
+        while v not in plans:
+            base, plan, _ = rows[v]
+            if plan is not None:
+                plans[v] = plan
+                break
+            chain.append(v)
+            v = base
+        for v in reversed(chain):
+            base, _, patch = rows[v]
+            plans[v] = apply_patch(plans[base], patch)
+    return {v: plans[v] for v in versions}
+
+
+async def load_plan(session: AsyncSession, roadmap: Roadmap) -> Dict[str, Any]:
+    """The full plan of a loaded Roadmap row, reconstructing it if it is stored as a patch."""
+    if roadmap.plan_json is not None:
+        return roadmap.plan_json
+    plans = await reconstruct_plans(session, roadmap.user_id, roadmap.domain, [roadmap.version])
+    return plans[roadmap.version]
+
+
+async def roadmap_not_found(session: AsyncSession, roadmap_id: int) -> HTTPException:
+    """The error for a roadmap id missing from `roadmap`: archived versions are read-only."""
+    if await archived_roadmap(session, roadmap_id) is not None:
+        return HTTPException(status_code=409, detail="Roadmap version is archived; revise a newer version")
+    return HTTPException(status_code=404, detail="Roadmap not found")
+
+
+async def ensure_revisable(session: AsyncSession, roadmap_id: int) -> None:
+    """Re-check, in a revision's write transaction, that the revised row was not archived
+    while the LLM call was in flight. Call it after `insert_next_version`: the counter row it
+    locks is the one the archiver holds while moving a chain, so the row stays until commit."""
+    found = (await session.execute(select(Roadmap.id).where(Roadmap.id == roadmap_id))).first()
+    if found is None:
+        raise await roadmap_not_found(session, roadmap_id)
+
+
+def revision_storage(prev: Roadmap, prev_plan: Dict[str, Any], new_plan: Dict[str, Any]) -> Dict[str, Any]:
+    """`insert_next_version` kwargs for a revision of `prev`: a patch against it, or nothing
+    (full snapshot) when snapshots are due, delta storage is off, or the patch is no smaller."""
+    chain_length = prev.chain_length + 1
+    if settings.PLAN_SNAPSHOT_EVERY <= 1 or chain_length >= settings.PLAN_SNAPSHOT_EVERY:
+        return {}
+    patch = patch_to_json(diff_plans(prev_plan, new_plan))
+    if len(orjson.dumps(patch)) >= len(orjson.dumps(new_plan)):
+        return {}
+    return {"base_version": prev.version, "patch": patch, "chain_length": chain_length}
+
+
+async def _load_profile_data(session: AsyncSession, user_id: int, domain: str) -> Dict[str, Any]:
+    profiles = await profile_cache.get(session, user_id)
+    if profiles is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # choose domain data if present; otherwise the default profile
+    domain_json = profiles.get(domain)
+    return domain_json if domain_json is not None else dict(DEFAULT_PROFILE)
+
+
+async def generate_roadmap_version(user_id: int, domain: str) -> Dict[str, Any]:
+    """Generate and persist the next roadmap version for a user and domain."""
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        with stage("profile_load"):
+            profile_data = await _load_profile_data(session, user_id, domain)
+            # end the read transaction so the pooled connection is free while the LLM call is in flight
+            await session.commit()
+
+        # build plan via LLM (with safe fallback) and validate
+        paths = served_paths.collect()
+        with stage("llm"):
+            plan = await generate_roadmap_struct(profile=profile_data, domain=domain)
+        with stage("validate"):
+            plan = ensure_valid(plan)
+
+        # persist as the next version (allocated atomically with the insert)
+        with stage("db_write"):
+            rm = await insert_next_version(session, user_id, domain, plan, model=plan_source(paths))
+            await session.commit()
+
+        return {"roadmap_id": rm.id, "version": rm.version, "plan": plan}
+
+
+async def stream_generate_roadmap_version(user_id: int, domain: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Streaming `generate_roadmap_version`.
+
+    Yields ("start", ...) once the user is found, each validated milestone / timeline entry
+    as the LLM produces it, and ("done", {"roadmap_id", "version", "plan"}) after the full
+    plan is persisted. `plan` in "done" is authoritative (it may be the fallback plan).
+    """
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        with stage("profile_load"):
+            profile_data = await _load_profile_data(session, user_id, domain)
+            await session.commit()
+        yield "start", {"user_id": user_id, "domain": domain}
+
+        paths = served_paths.collect()
+        plan: Dict[str, Any] = {}
+        async for name, data in stream_generate_roadmap_struct(profile=profile_data, domain=domain):
+            if name == "plan":
+                plan = data
+            else:
+                yield name, data
+        with stage("validate"):
+            plan = ensure_valid(plan)
+
+        with stage("db_write"):
+            rm = await insert_next_version(session, user_id, domain, plan, model=plan_source(paths))
+            await session.commit()
+        yield "done", {"roadmap_id": rm.id, "version": rm.version, "plan": plan}
+
+
+async def revise_roadmap_version(roadmap_id: int, feedback: Dict[str, Any]) -> Dict[str, Any]:
+    """Revise a stored roadmap with feedback; persists the feedback and a new version."""
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        with stage("db_read"):
+            prev = await session.get(Roadmap, roadmap_id)
+            if not prev:
+                raise await roadmap_not_found(session, roadmap_id)
+
+            prev_plan = await load_plan(session, prev)
+            domain = prev.domain
+            # end the read transaction so the pooled connection is free while the LLM call is in flight
+            await session.commit()
+
+        # LLM-aware revision with feedback-driven prompts (falls back locally if no API key)
+        paths = served_paths.collect()
+        with stage("llm"):
+            new_plan = await revise_roadmap_struct(plan=prev_plan, feedback=feedback, domain=domain)
+        with stage("validate"):
+            new_plan = ensure_valid(new_plan)
+
+        # version bump: next after the latest version, not after the one being revised
+        with stage("db_write"):
+            new_rm = await insert_next_version(
+                session, prev.user_id, domain, new_plan, **revision_storage(prev, prev_plan, new_plan),
+                model=plan_source(paths),
+            )
+            await ensure_revisable(session, prev.id)
+
+            # save feedback
+            fb = Feedback(
+                roadmap_id=prev.id,
+                signal_type=feedback["signal_type"],
+                notes=feedback.get("notes")
+            )
+            session.add(fb)
+            # last, so the rollup row stays locked only until the commit
+            await count_feedback(session, domain, prev.model, fb.signal_type, fb.created_at.date())
+            await session.commit()
+
+        return {"roadmap_id": new_rm.id, "version": new_rm.version, "plan": new_rm.plan_json}
+
+
+async def stream_revise_roadmap_version(roadmap_id: int, feedback: Dict[str, Any]) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Streaming `revise_roadmap_version`; same events as `stream_generate_roadmap_version`."""
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        with stage("db_read"):
+            prev = await session.get(Roadmap, roadmap_id)
+            if not prev:
+                raise await roadmap_not_found(session, roadmap_id)
+
+            prev_plan = await load_plan(session, prev)
+            domain = prev.domain
+            await session.commit()
+        yield "start", {"roadmap_id": prev.id, "version": prev.version, "domain": domain}
+
+        paths = served_paths.collect()
+        new_plan: Dict[str, Any] = prev_plan
+        async for name, data in stream_revise_roadmap_struct(plan=prev_plan, feedback=feedback, domain=domain):
+            if name == "plan":
+                new_plan = data
+            else:
+                yield name, data
+        with stage("validate"):
+            new_plan = ensure_valid(new_plan)
+
+        with stage("db_write"):
+            new_rm = await insert_next_version(
+                session, prev.user_id, domain, new_plan, **revision_storage(prev, prev_plan, new_plan),
+                model=plan_source(paths),
+            )
+            await ensure_revisable(session, prev.id)
+            fb = Feedback(
+                roadmap_id=prev.id,
+                signal_type=feedback["signal_type"],
+                notes=feedback.get("notes")
+            )
+            session.add(fb)
+            await count_feedback(session, domain, prev.model, fb.signal_type, fb.created_at.date())
+            await session.commit()
+        yield "done", {"roadmap_id": new_rm.id, "version": new_rm.version, "plan": new_plan}
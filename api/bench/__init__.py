@@ -0,0 +1 @@
+"""Benchmarks and load tools for LifeMap.AI (run from `api/` with `python -m bench.<name>`)."""
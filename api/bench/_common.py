@@ -0,0 +1,74 @@
+from typing import Dict, Any, List
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+BASE = os.getenv("BASE", "http://localhost:8000")
+TOKEN = os.getenv("TOKEN", "dev123")
+
+
+def auth_headers(token: str = TOKEN) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+
+
+def percentiles(samples_ms: List[float]) -> Dict[str, Any]:
+    """Summarize latency samples (milliseconds) as count/p50/p95/p99/max."""
+    if not samples_ms:
+        return {"count": 0}
+    ordered = sorted(samples_ms)
+
+    def pick(q: float) -> float:
+        idx = min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))
+        return round(ordered[idx], 2)
+
+    return {
+        "count": len(ordered),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1], 2),
+    }
+
+
+def emit(report: Dict[str, Any]) -> None:
+    """Print a benchmark report as one JSON document on stdout."""
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+def start_api(port: int, env: Dict[str, str], *uvicorn_args: str) -> subprocess.Popen:
+    """Start `uvicorn app.main:app` on `port` (JOB_WORKERS=0 unless `env` says otherwise)."""
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning",
+         *uvicorn_args],
+        env={**os.environ, "JOB_WORKERS": "0", **env},
+        stdout=sys.stderr,  # keep the JSON report alone on stdout
+    )
+
+
+def start_stub(port: int, *stub_args: str) -> subprocess.Popen:
+    """Start `bench.stub_llm` on `port`; wait for it with `wait_ready(..., path="/stats")`."""
+    return subprocess.Popen(
+        [sys.executable, "-m", "bench.stub_llm", "--port", str(port), *stub_args],
+        stdout=sys.stderr,
+    )
+
+
+async def wait_ready(base: str, timeout: float = 30, path: str = "/health") -> None:
+    """Poll `path` until it answers 200."""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(path)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.05)
+    raise RuntimeError(f"API at {base} did not start")
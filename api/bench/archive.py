@@ -0,0 +1,158 @@
+"""Cold archive: hot-path latency and table sizes before and after archival.
+
+Seeds `--users` users with `--versions` full-plan versions each (with feedback), times the
+read paths in-process (no network hop), archives every seeded chain down to its last
+`--keep` versions, VACUUM FULLs the tables and times the same reads again:
+
+    python -m bench.archive --users 2000 --versions 200 --keep 10
+
+- latest: `GET /roadmap/{id}` of the newest version (always hot)
+- history_recent: the history page holding the hot versions (`after_version=versions-keep`)
+- history_full: every history page from version 0 (`plans=summary`); after archival most
+  of it is read from `roadmap_archive`
+- archived_get: `GET /roadmap/{id}` of an archived version (after only)
+- sizes: total relation size (table + indexes + TOAST) and rows of `roadmap`, `feedback` and
+  all `roadmap_archive` partitions. The tables hold the whole dev database, so compare the
+  deltas.
+
+Only the seeded chains are archived; other data in the database is left alone.
+"""
+from typing import Any, Dict, List, Tuple
+from datetime import datetime
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+from sqlalchemy import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.archive import archive_chain
+from app.core.database import async_engine, engine
+from app.main import app
+from ._common import auth_headers, emit, percentiles
+from .seed import seed_bulk
+
+_SIZES = text(
+    """
+    SELECT pg_total_relation_size('roadmap'), pg_total_relation_size('feedback'),
+           (SELECT COALESCE(SUM(pg_total_relation_size(relid)), 0) FROM pg_partition_tree('roadmap_archive')),
+           (SELECT COUNT(*) FROM roadmap), (SELECT COUNT(*) FROM feedback), (SELECT COUNT(*) FROM roadmap_archive)
+    """
+)
+
+
+def _sizes() -> Dict[str, Any]:
+    # autocommit: VACUUM cannot run inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM (FULL, ANALYZE) roadmap, feedback, roadmap_archive"))
+        row = conn.execute(_SIZES).one()
+    return {
+        "roadmap_mb": round(row[0] / 2**20, 1),
+        "feedback_mb": round(row[1] / 2**20, 1),
+        "archive_mb": round(int(row[2]) / 2**20, 1),
+        "roadmap_rows": row[3],
+        "feedback_rows": row[4],
+        "archive_rows": row[5],
+    }
+
+
+def _chains(tag: str) -> List[Tuple[int, int, int]]:
+    """(user_id, latest roadmap id, first roadmap id) of every seeded chain."""
+    with engine.connect() as conn:
+        return [tuple(r) for r in conn.execute(
+            text(
+                "SELECT u.id, MAX(r.id), MIN(r.id) FROM \"user\" u JOIN roadmap r ON r.user_id = u.id "
+                "WHERE u.email LIKE :pattern GROUP BY u.id ORDER BY u.id"
+            ),
+            {"pattern": f"bulk-{tag}-%"},
+        ).all()]
+
+
+async def _walk(client: httpx.AsyncClient, user_id: int, domain: str, page: int) -> None:
+    after = 0
+    while after is not None:
+        r = await client.get(f"/roadmap/{user_id}/{domain}/history",
+                             params={"after_version": after, "limit": page, "plans": "summary"})
+        r.raise_for_status()
+        after = r.json()["next_after_version"]
+
+
+async def _timed(samples: List[float], call) -> None:
+    t0 = time.perf_counter()
+    await call
+    samples.append((time.perf_counter() - t0) * 1000)
+
+
+async def _reads(args: argparse.Namespace, sample: List[Tuple[int, int, int]], archived: bool) -> Dict[str, Any]:
+    ops: Dict[str, List[float]] = {"latest": [], "history_recent": [], "history_full": []}
+    if archived:
+        ops["archived_get"] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=auth_headers(), timeout=300) as client:
+
+        async def get(path: str, **params: Any) -> None:
+            (await client.get(path, params=params)).raise_for_status()
+
+        for user_id, latest_id, first_id in sample:
+            await _timed(ops["latest"], get(f"/roadmap/{latest_id}"))
+            await _timed(ops["history_recent"], get(
+                f"/roadmap/{user_id}/{args.domain}/history",
+                after_version=args.versions - args.keep, limit=args.page, plans="summary",
+            ))
+            await _timed(ops["history_full"], _walk(client, user_id, args.domain, args.page))
+            if archived:
+                await _timed(ops["archived_get"], get(f"/roadmap/{first_id}"))
+    return {name: percentiles(samples) for name, samples in ops.items()}
+
+
+async def _archive(chains: List[Tuple[int, int, int]], args: argparse.Namespace) -> Dict[str, Any]:
+    cutoff = datetime.utcnow()
+    moved = 0
+    t0 = time.perf_counter()
+    async with AsyncSession(async_engine) as session:
+        for user_id, _, _ in chains:
+            moved += await archive_chain(session, user_id, args.domain, args.keep, cutoff, args.versions)
+    seconds = time.perf_counter() - t0
+    return {"versions": moved, "seconds": round(seconds, 2), "versions_per_s": round(moved / seconds) if seconds else 0}
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    tag = seed_bulk(args.users, args.versions, [args.domain], compact_plan=False)
+    chains = _chains(tag)
+    sample = random.Random(args.seed).sample(chains, min(args.sample, len(chains)))
+
+    before = {"sizes": _sizes(), "reads": await _reads(args, sample, archived=False)}
+    archived = await _archive(chains, args)
+    after = {"sizes": _sizes(), "reads": await _reads(args, sample, archived=True)}
+    await async_engine.dispose()
+    return {
+        "benchmark": "archive",
+        "users": args.users,
+        "versions": args.versions,
+        "keep": args.keep,
+        "archived": archived,
+        "before": before,
+        "after": after,
+        "freed_mb": {
+            table: round(before["sizes"][f"{table}_mb"] - after["sizes"][f"{table}_mb"], 1)
+            for table in ("roadmap", "feedback")
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--versions", type=int, default=200, help="versions per user")
+    parser.add_argument("--keep", type=int, default=10, help="hot versions kept per chain")
+    parser.add_argument("--domain", default="career")
+    parser.add_argument("--page", type=int, default=100, help="history page size")
+    parser.add_argument("--sample", type=int, default=200, help="chains timed before and after")
+    parser.add_argument("--seed", type=int, default=7)
+    emit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
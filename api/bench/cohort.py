@@ -0,0 +1,120 @@
+"""Cohort onboarding throughput: sequential upsert + generate calls vs `/cohort:onboard`.
+
+Start the stub (`python -m bench.stub_llm --latency-ms 500`) and the API against it, then:
+
+    python -m bench.cohort --members 1000 --contexts 50
+
+Members are spread over `--contexts` distinct profile contexts (hours/style combinations).
+The sequential baseline replays today's onboarding, one `/profile:upsert` and one
+`/roadmap:generate` per member, for the first `--baseline-members` members; the batch run
+sends the whole cohort in one request and reads the NDJSON stream. Each run uses fresh emails
+and a fresh nonce in the profile data, so neither can reuse the other's cached plans.
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+import orjson
+
+from ._common import BASE, auth_headers, emit
+
+
+STYLES = ["balanced", "hands-on", "theory-first", "project-based", "fast"]
+
+
+def _members(count: int, contexts: int) -> List[Dict[str, Any]]:
+    run = uuid.uuid4().hex[:8]
+    return [
+        {
+            "name": f"Cohort {i}",
+            "email": f"cohort-{run}-{i}@example.com",
+            "data": {"hours_per_week": 4 + (i % contexts) // len(STYLES), "style": STYLES[i % contexts % len(STYLES)], "nonce": run},
+        }
+        for i in range(count)
+    ]
+
+
+def _stub_calls(stub: str) -> int:
+    return httpx.get(f"{stub}/stats", timeout=10).json()["calls"]
+
+
+async def _sequential(client: httpx.AsyncClient, members: List[Dict[str, Any]], domain: str) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    for m in members:
+        r = await client.post("/profile:upsert", json={**m, "domain": domain})
+        r.raise_for_status()
+        r = await client.post("/roadmap:generate", json={"user_id": r.json()["user_id"], "domain": domain})
+        r.raise_for_status()
+    wall = time.perf_counter() - t0
+    return {"members": len(members), "wall_s": round(wall, 2), "roadmaps_per_s": round(len(members) / wall, 1)}
+
+
+async def _batch(client: httpx.AsyncClient, members: List[Dict[str, Any]], domain: str, concurrency: int) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    first_roadmap_ms = None
+    roadmaps = errors = 0
+    done: Dict[str, Any] = {}
+    body = {"domain": domain, "members": members, "concurrency": concurrency}
+    async with client.stream("POST", "/cohort:onboard", json=body) as r:
+        r.raise_for_status()
+        async for raw in r.aiter_lines():
+            if not raw:
+                continue
+            line = orjson.loads(raw)
+            if line["type"] == "roadmap":
+                roadmaps += 1
+                if first_roadmap_ms is None:
+                    first_roadmap_ms = round((time.perf_counter() - t0) * 1000, 1)
+            elif line["type"] == "error":
+                errors += 1
+            elif line["type"] == "done":
+                done = line
+    wall = time.perf_counter() - t0
+    return {
+        "members": len(members),
+        "roadmaps": roadmaps,
+        "errors": errors,
+        "wall_s": round(wall, 2),
+        "roadmaps_per_s": round(roadmaps / wall, 1),
+        "first_roadmap_ms": first_roadmap_ms,
+        "unique_contexts": done.get("unique_contexts"),
+        "transactions": done.get("transactions"),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    async with httpx.AsyncClient(base_url=BASE, headers=auth_headers(), timeout=600) as client:
+        calls = _stub_calls(args.stub)
+        sequential = await _sequential(client, _members(args.baseline_members, args.contexts), args.domain)
+        sequential["upstream_calls"] = _stub_calls(args.stub) - calls
+
+        calls = _stub_calls(args.stub)
+        batch = await _batch(client, _members(args.members, args.contexts), args.domain, args.concurrency)
+        batch["upstream_calls"] = _stub_calls(args.stub) - calls
+
+    return {
+        "benchmark": "cohort",
+        "contexts": args.contexts,
+        "concurrency": args.concurrency,
+        "sequential": sequential,
+        "batch": batch,
+        "speedup": round(batch["roadmaps_per_s"] / sequential["roadmaps_per_s"], 1) if sequential["roadmaps_per_s"] else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stub", default="http://127.0.0.1:9100", help="stub LLM base URL (for its call counter)")
+    parser.add_argument("--members", type=int, default=1000)
+    parser.add_argument("--contexts", type=int, default=50, help="distinct profile contexts in the cohort")
+    parser.add_argument("--baseline-members", type=int, default=100, help="members onboarded one call at a time")
+    parser.add_argument("--concurrency", type=int, default=16, help="LLM calls in flight for the batch request")
+    parser.add_argument("--domain", default="career")
+    emit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""NDJSON export throughput and server memory, and rollup-backed feedback analytics.
+
+Optionally seeds `--seed-users` users with `--seed-versions` full-plan versions each, then
+starts the API (one worker) for each `--batch-rows` value and streams `GET /export/roadmaps`
+to the end, discarding it. RSS of the server process is sampled throughout (Linux /proc):
+
+    python -m bench.export --seed-users 10000 --seed-versions 100 --batch-rows 200 1000 5000
+
+- export: rows and MB per second, time to first byte, server RSS before the export and at its
+  peak. With server-side cursors the peak should not move with the table size.
+- analytics: `GET /analytics/feedback` (rollup rows) vs the full scan it replaces
+  (`feedback` joined to `roadmap`, grouped by domain and signal type)
+- with `--buffered`: the same rows fetched in one `fetchall`, as an export without a cursor
+  would, and the RSS that costs this process (about 2.3 GB per million full-plan rows)
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.export import _HOT
+from ._common import auth_headers, emit, percentiles, start_api, wait_ready
+from .seed import seed_bulk
+
+_FULL_SCAN = text(
+    """
+    SELECT r.domain, f.signal_type, COUNT(*) FROM feedback f JOIN roadmap r ON r.id = f.roadmap_id
+    GROUP BY r.domain, f.signal_type
+    """
+)
+
+
+def _rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def _export(base: str, pid: int, domain: str) -> Dict[str, Any]:
+    peak = start_rss = _rss_mb(pid)
+    done = asyncio.Event()
+
+    async def sample() -> None:
+        nonlocal peak
+        while not done.is_set():
+            peak = max(peak, _rss_mb(pid))
+            await asyncio.sleep(0.05)
+
+    sampler = asyncio.create_task(sample())
+    rows = size = 0
+    first_byte = None
+    last = b""
+    params = {"domain": domain} if domain else {}
+    t0 = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base, headers=auth_headers(), timeout=None) as client:
+        async with client.stream("GET", "/export/roadmaps", params=params) as r:
+            r.raise_for_status()
+            async for chunk in r.aiter_bytes():
+                if first_byte is None:
+                    first_byte = time.perf_counter() - t0
+                rows += chunk.count(b"\n")
+                size += len(chunk)
+                last = chunk[-256:]
+    seconds = time.perf_counter() - t0
+    done.set()
+    await sampler
+    if b'{"error"' in last:
+        raise RuntimeError(f"export cut short after {rows - 1} rows: {last.decode(errors='replace')}")
+    return {
+        "rows": rows,
+        "mb": round(size / 2**20, 1),
+        "seconds": round(seconds, 2),
+        "rows_per_s": round(rows / seconds),
+        "mb_per_s": round(size / 2**20 / seconds, 1),
+        "first_byte_ms": round((first_byte or 0) * 1000, 1),
+        "server_rss_start_mb": round(start_rss, 1),
+        "server_rss_peak_mb": round(peak, 1),
+    }
+
+
+async def _analytics(base: str, repeat: int) -> Dict[str, Any]:
+    rollup: List[float] = []
+    async with httpx.AsyncClient(base_url=base, headers=auth_headers()) as client:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            (await client.get("/analytics/feedback")).raise_for_status()
+            rollup.append((time.perf_counter() - t0) * 1000)
+    scan: List[float] = []
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            conn.execute(_FULL_SCAN).all()
+            scan.append((time.perf_counter() - t0) * 1000)
+    with engine.connect() as conn:
+        rollup_rows = conn.execute(text("SELECT COUNT(*) FROM feedback_rollup")).scalar()
+        feedback_rows = conn.execute(text("SELECT COUNT(*) FROM feedback")).scalar()
+    return {
+        "feedback_rows": feedback_rows,
+        "rollup_rows": rollup_rows,
+        "endpoint_rollup": percentiles(rollup),
+        "full_scan_sql": percentiles(scan),
+    }
+
+
+def _buffered(domain: str) -> Dict[str, Any]:
+    pid = os.getpid()
+    before = _rss_mb(pid)
+    t0 = time.perf_counter()
+    with engine.connect() as conn:
+        rows = conn.execute(_HOT, {"domain": domain or None}).all()
+        after = _rss_mb(pid)
+    return {"rows": len(rows), "seconds": round(time.perf_counter() - t0, 2), "rss_growth_mb": round(after - before, 1)}
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.seed_users:
+        seed_bulk(args.seed_users, args.seed_versions, [args.domain or "career"], compact_plan=False)
+
+    runs = []
+    analytics = None
+    for batch in args.batch_rows:
+        proc = start_api(args.port, {"EXPORT_BATCH_ROWS": str(batch), "DB_POOL_WARMUP": "0"})
+        base = f"http://127.0.0.1:{args.port}"
+        try:
+            await wait_ready(base)
+            runs.append({"batch_rows": batch, **await _export(base, proc.pid, args.domain)})
+            if analytics is None:
+                analytics = await _analytics(base, args.repeat)
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    report = {"benchmark": "export", "domain": args.domain or "all", "export": runs, "analytics": analytics}
+    if args.buffered:
+        report["buffered_fetchall"] = _buffered(args.domain)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed-users", type=int, default=0, help="users to seed first (0: use the data present)")
+    parser.add_argument("--seed-versions", type=int, default=100, help="versions per seeded user")
+    parser.add_argument("--domain", default="", help="export one domain (default: all)")
+    parser.add_argument("--batch-rows", type=int, nargs="*", default=[1000], help="EXPORT_BATCH_ROWS values")
+    parser.add_argument("--repeat", type=int, default=10, help="analytics requests / scans")
+    parser.add_argument("--buffered", action="store_true", help="also measure a fetchall of the export query")
+    parser.add_argument("--port", type=int, default=8011)
+    emit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""History endpoint cost on a long revision chain: legacy N+1 loop vs aggregated keyset pages.
+
+Seeds one user with `--versions` roadmap versions into the configured database, then
+times reading the full history in-process (no network hop):
+
+    python -m bench.history --versions 5000 --page 500
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database import async_engine, Roadmap, Feedback
+from app.main import app
+from ._common import auth_headers, emit, percentiles
+from .seed import seed_history
+
+
+async def legacy_history(user_id: int, domain: str) -> int:
+    """The pre-aggregation handler body: one feedback query per version, every plan loaded."""
+    async with AsyncSession(async_engine) as session:
+        roadmaps = (await session.exec(
+            select(Roadmap)
+            .where((Roadmap.user_id == user_id) & (Roadmap.domain == domain))
+            .order_by(Roadmap.version)
+        )).all()
+        versions = []
+        for rm in roadmaps:
+            fbs = (await session.exec(select(Feedback).where(Feedback.roadmap_id == rm.id))).all()
+            versions.append({
+                "roadmap_id": rm.id,
+                "version": rm.version,
+                "created_at": rm.created_at.isoformat(),
+                "plan": rm.plan_json,
+                "feedback_count": len(fbs),
+            })
+        return len(json.dumps({"versions": versions}))
+
+
+async def paged_history(client: httpx.AsyncClient, user_id: int, domain: str, page: int, plans: str) -> int:
+    """Walk every page of the current endpoint; returns total response bytes."""
+    after, size = 0, 0
+    while True:
+        r = await client.get(
+            f"/roadmap/{user_id}/{domain}/history",
+            params={"after_version": after, "limit": page, "plans": plans},
+        )
+        r.raise_for_status()
+        size += len(r.content)
+        after = r.json()["next_after_version"]
+        if after is None:
+            return size
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    user_id = seed_history(args.versions, args.domain)
+    results: Dict[str, Any] = {}
+
+    samples: List[float] = []
+    size = 0
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        size = await legacy_history(user_id, args.domain)
+        samples.append((time.perf_counter() - t0) * 1000)
+    results["legacy_n_plus_1"] = {"bytes": size, "latency": percentiles(samples)}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=auth_headers(), timeout=300) as client:
+        for plans in ("full", "summary", "none"):
+            samples = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                size = await paged_history(client, user_id, args.domain, args.page, plans)
+                samples.append((time.perf_counter() - t0) * 1000)
+            results[f"paged_{plans}"] = {"bytes": size, "latency": percentiles(samples)}
+
+    return {
+        "benchmark": "history",
+        "versions": args.versions,
+        "page": args.page,
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--versions", type=int, default=5000)
+    parser.add_argument("--domain", default="career")
+    parser.add_argument("--page", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    emit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
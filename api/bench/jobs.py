@@ -0,0 +1,99 @@
+"""Submit latency vs end-to-end completion for queued generate jobs.
+
+Start the stub (`python -m bench.stub_llm --latency-ms 2000`), run the API against it, then:
+
+    python -m bench.jobs --jobs 200 --concurrency 32
+
+Submits `--jobs` `/jobs/roadmap:generate` requests, long-polls each to completion and
+reports submit latency (what the client waits on), completion latency, and the peak queue
+depth seen on `/jobs:stats` while the worker pool drains the backlog.
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from ._common import BASE, auth_headers, emit, percentiles
+
+
+async def _setup(client: httpx.AsyncClient) -> int:
+    r = await client.post("/profile:upsert", json={
+        "name": "Bench User", "email": "bench-jobs@example.com", "domain": "career",
+        "data": {"hours_per_week": 10, "style": "balanced", "target_role": "Backend Engineer"},
+    })
+    r.raise_for_status()
+    return r.json()["user_id"]
+
+
+async def _one(client: httpx.AsyncClient, user_id: int, submit_ms: List[float], done_ms: List[float], statuses: Dict[str, int]) -> None:
+    t0 = time.perf_counter()
+    r = await client.post("/jobs/roadmap:generate", json={"user_id": user_id, "domain": "career"})
+    r.raise_for_status()
+    submit_ms.append((time.perf_counter() - t0) * 1000)
+    job_id = r.json()["job_id"]
+    while True:
+        r = await client.get(f"/jobs/{job_id}", params={"wait": 30})
+        r.raise_for_status()
+        status = r.json()["status"]
+        if status in ("succeeded", "failed"):
+            break
+    done_ms.append((time.perf_counter() - t0) * 1000)
+    statuses[status] = statuses.get(status, 0) + 1
+
+
+async def _watch_depth(client: httpx.AsyncClient, stop: asyncio.Event, peak: Dict[str, int]) -> None:
+    while not stop.is_set():
+        depth = (await client.get("/jobs:stats")).json()["queue_depth"]
+        for status, count in depth.items():
+            peak[status] = max(peak.get(status, 0), count)
+        await asyncio.sleep(0.2)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency + 4)
+    async with httpx.AsyncClient(base_url=args.base, headers=auth_headers(), limits=limits, timeout=120) as client:
+        user_id = await _setup(client)
+        submit_ms: List[float] = []
+        done_ms: List[float] = []
+        statuses: Dict[str, int] = {}
+        peak: Dict[str, int] = {}
+        sem = asyncio.Semaphore(args.concurrency)
+
+        async def bounded() -> None:
+            async with sem:
+                await _one(client, user_id, submit_ms, done_ms, statuses)
+
+        stop = asyncio.Event()
+        watcher = asyncio.create_task(_watch_depth(client, stop, peak))
+        t0 = time.perf_counter()
+        await asyncio.gather(*(bounded() for _ in range(args.jobs)))
+        wall = time.perf_counter() - t0
+        stop.set()
+        await watcher
+        worker = (await client.get("/jobs:stats")).json()["worker"]
+    return {
+        "benchmark": "jobs",
+        "jobs": args.jobs,
+        "client_concurrency": args.concurrency,
+        "wall_s": round(wall, 2),
+        "throughput_jobs_per_s": round(args.jobs / wall, 2),
+        "statuses": statuses,
+        "peak_queue_depth": peak,
+        "worker": worker,
+        "submit": percentiles(submit_ms),
+        "completion": percentiles(done_ms),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base", default=BASE)
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32, help="client-side concurrent submit+poll loops")
+    emit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Plan read cost: decoding whole documents in Python vs projecting in Postgres.
+
+Seeds one user with `--versions` full-size plans, then for each read mode measures the
+fetch+decode time, the time to encode the result as a response body, and its size.
+`text_decode` reproduces the old Text column path (fetch the string, json.loads it).
+
+    python -m bench.jsonb --versions 2000
+"""
+from typing import Any, Dict, List
+import argparse
+import json
+import time
+
+from sqlalchemy import String, cast, select
+
+from app.core.database import engine, plan_projection, PLAN_SUMMARY, Roadmap
+from ._common import emit, percentiles
+from .seed import seed_history
+
+
+def _modes():
+    return {
+        "text_decode": cast(Roadmap.plan_json, String),
+        "jsonb_full": Roadmap.plan_json,
+        "summary": PLAN_SUMMARY,
+        "title": plan_projection(["title"]),
+        "milestone_titles": plan_projection(["milestone_titles"]),
+        "timeline": plan_projection(["timeline"]),
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    user_id = seed_history(args.versions, feedback_every=args.versions + 1)
+    results: Dict[str, Any] = {}
+    with engine.connect() as conn:
+        for mode, expr in _modes().items():
+            stmt = select(expr).where(Roadmap.user_id == user_id).order_by(Roadmap.version)
+            read_ms: List[float] = []
+            encode_ms: List[float] = []
+            size = 0
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                plans = conn.execute(stmt).scalars().all()
+                if mode == "text_decode":
+                    plans = [json.loads(p) for p in plans]
+                t1 = time.perf_counter()
+                body = json.dumps(plans)
+                t2 = time.perf_counter()
+                read_ms.append((t1 - t0) * 1000)
+                encode_ms.append((t2 - t1) * 1000)
+                size = len(body)
+            results[mode] = {
+                "response_bytes": size,
+                "fetch_decode": percentiles(read_ms),
+                "encode": percentiles(encode_ms),
+            }
+    return {"benchmark": "jsonb", "versions": args.versions, "repeat": args.repeat, "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--versions", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=10)
+    emit(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
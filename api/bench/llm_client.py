@@ -0,0 +1,75 @@
+"""Per-call LLM latency: a fresh AsyncOpenAI client per call vs the shared pooled client.
+
+    python -m bench.stub_llm &
+    python -m bench.llm_client --calls 300 --concurrency 1 --concurrency 16
+
+Against the plain-HTTP stub this only captures client construction and TCP setup; over
+TLS to a real provider the per-call handshake makes the gap larger.
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import time
+
+from openai import AsyncOpenAI
+
+from app.llm.client import LLMClientManager
+from ._common import emit, percentiles
+
+
+MESSAGES = [
+    {"role": "system", "content": "Return a roadmap as strict JSON."},
+    {"role": "user", "content": '{"profile":{"hours_per_week":10},"domain":"career"}'},
+]
+
+
+async def _per_call(base_url: str) -> None:
+    async with AsyncOpenAI(api_key="sk-stub", base_url=base_url) as client:
+        await client.chat.completions.create(model="stub", messages=MESSAGES, temperature=0.4)
+
+
+async def run_mode(mode: str, base_url: str, calls: int, concurrency: int) -> Dict[str, Any]:
+    manager = LLMClientManager()
+    sem = asyncio.Semaphore(concurrency)
+    samples: List[float] = []
+
+    async def one() -> None:
+        async with sem:
+            t0 = time.perf_counter()
+            if mode == "per_call":
+                await _per_call(base_url)
+            else:
+                client = manager.get("sk-stub", base_url)
+                await client.chat.completions.create(model="stub", messages=MESSAGES, temperature=0.4)
+            samples.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    wall = time.perf_counter() - t0
+    await manager.aclose()
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "throughput_rps": round(calls / wall, 1),
+        "latency": percentiles(samples),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    runs = []
+    for concurrency in args.concurrency or [1, 16]:
+        for mode in ("per_call", "pooled"):
+            runs.append(await run_mode(mode, args.base_url, args.calls, concurrency))
+    return {"benchmark": "llm_client", "calls": args.calls, "runs": runs}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:9100/v1")
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, action="append")
+    emit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
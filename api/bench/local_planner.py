@@ -0,0 +1,121 @@
+"""Local plan engine throughput: generate and revise without an LLM (in-process, no stack).
+
+    python -m bench.local_planner --ops 20000
+
+Reports per-call latency (microseconds) and calls per second for:
+
+- generate, cold: memo cleared before every call (worst case, every profile new)
+- generate, warm: a skewed population of profiles, as real traffic repeats contexts
+- revise: each feedback type applied to generated plans
+- plan variety: distinct plans over the profile population (the old fallback returned one
+  per domain)
+"""
+from typing import Any, Callable, Dict, List
+import argparse
+import itertools
+import random
+import time
+
+import orjson
+
+from app.llm.planner import _build, build_plan, revise_plan
+from app.llm.schema import validate_plan
+from ._common import emit
+
+
+DOMAINS = {
+    "career": ["Backend Engineer", "Frontend Developer", "Data Scientist", "DevOps / SRE", "Product Manager", None],
+    "academics": ["GRE", "SAT", "IELTS", None],
+    "personal": ["fitness", "personal finance", "reading", None],
+}
+HOURS = [3, 5, 8, 10, 15, 20, 30]
+STYLES = ["fast", "balanced", "hands-on", "thorough"]
+LEVELS = ["beginner", "intermediate", "advanced"]
+FEEDBACK = [
+    {"signal_type": "too_fast", "notes": None},
+    {"signal_type": "too_easy", "notes": None},
+    {"signal_type": "missing_topic", "notes": "Kubernetes"},
+    {"signal_type": "change_goal", "notes": "data analyst"},
+    {"signal_type": "other", "notes": "weekend-friendly pacing"},
+]
+
+
+def _population() -> List[Dict[str, Any]]:
+    return [
+        {"domain": domain, "profile": {
+            "hours_per_week": h, "style": s, "experience_level": lvl,
+            **({"target_role": t, "target_exam": t, "goal": t} if t else {}),
+        }}
+        for domain, targets in DOMAINS.items()
+        for t, h, s, lvl in itertools.product(targets, HOURS, STYLES, LEVELS)
+    ]
+
+
+def _time(fn: Callable[[int], Any], ops: int) -> Dict[str, Any]:
+    samples: List[float] = []
+    t0 = time.perf_counter()
+    for i in range(ops):
+        start = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - start) * 1e6)
+    wall = time.perf_counter() - t0
+    samples.sort()
+
+    def pick(q: float) -> float:
+        return round(samples[min(len(samples) - 1, int(q * len(samples)))], 1)
+
+    return {"ops": ops, "p50_us": pick(0.50), "p99_us": pick(0.99), "max_us": round(samples[-1], 1),
+            "ops_per_s": round(ops / wall)}
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    population = _population()
+    rng = random.Random(args.seed)
+    # Zipf-ish skew: a few contexts are very common
+    weights = [1 / (rank + 1) for rank in range(len(population))]
+    skewed = rng.choices(population, weights=weights, k=args.ops)
+
+    def cold(i: int) -> None:
+        _build.cache_clear()
+        p = population[i % len(population)]
+        build_plan(p["profile"], p["domain"])
+
+    def warm(i: int) -> None:
+        p = skewed[i]
+        build_plan(p["profile"], p["domain"])
+
+    plans = [build_plan(p["profile"], p["domain"]) for p in population]
+
+    def revise(i: int) -> None:
+        revise_plan(plans[i % len(plans)], FEEDBACK[i % len(FEEDBACK)], population[i % len(population)]["domain"])
+
+    results = {"generate_cold": _time(cold, args.ops), "generate_warm": _time(warm, args.ops), "revise": _time(revise, args.ops)}
+
+    # every engine output must be a valid plan
+    for i, plan in enumerate(plans):
+        validate_plan(plan)
+        validate_plan(revise_plan(plan, FEEDBACK[i % len(FEEDBACK)], population[i]["domain"]))
+
+    weeks = [p["constraints"]["weeks"] for p in plans]
+    return {
+        "benchmark": "local_planner",
+        "profiles": len(population),
+        "results": results,
+        "variety": {
+            "distinct_plans": len({orjson.dumps(p, option=orjson.OPT_SORT_KEYS) for p in plans}),
+            "distinct_titles": len({p["title"] for p in plans}),
+            "weeks_min": min(weeks),
+            "weeks_max": max(weeks),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    emit(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
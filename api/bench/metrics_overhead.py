@@ -0,0 +1,95 @@
+"""Cost of the Prometheus instrumentation: requests with metrics on vs off (in-process).
+
+Calls the ASGI app directly (no network, so the difference is not hidden in socket noise) and
+alternates METRICS on/off between rounds of `--requests` calls:
+
+    DB_HOST=127.0.0.1 python -m bench.metrics_overhead --rounds 10 --requests 500
+
+- /health: no DB or LLM work, the worst case for relative overhead
+- /roadmap/{id}: a DB read with `db_read` and `encode` spans
+
+Also reports the cost of one `stage()` span and of rendering `/metrics` (one scrape).
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from sqlalchemy import func, select
+
+from app import metrics
+from app.core.database import async_engine, Roadmap
+from app.main import app
+from ._common import auth_headers, emit
+
+
+async def _round(client: httpx.AsyncClient, path: str, requests: int) -> float:
+    """Mean microseconds per request."""
+    t0 = time.perf_counter()
+    for _ in range(requests):
+        r = await client.get(path)
+        r.raise_for_status()
+    return (time.perf_counter() - t0) / requests * 1e6
+
+
+async def _compare(client: httpx.AsyncClient, path: str, args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[bool, List[float]] = {True: [], False: []}
+    await _round(client, path, args.requests)  # warm-up: connections, label children
+    for i in range(args.rounds):
+        # alternate the order so drift does not favour one side
+        for on in ((True, False) if i % 2 == 0 else (False, True)):
+            metrics.set_enabled(on)
+            results[on].append(await _round(client, path, args.requests))
+    metrics.set_enabled(True)
+    on, off = statistics.median(results[True]), statistics.median(results[False])
+    return {
+        "path": path,
+        "us_per_request_off": round(off, 1),
+        "us_per_request_on": round(on, 1),
+        "overhead_us": round(on - off, 1),
+        "overhead_pct": round((on - off) / off * 100, 2),
+    }
+
+
+def _stage_cost(n: int) -> float:
+    metrics.set_enabled(True)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        with metrics.stage("bench"):
+            pass
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    async with async_engine.connect() as conn:
+        roadmap_id = (await conn.execute(select(func.min(Roadmap.id)))).scalar()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=auth_headers()) as client:
+        paths = ["/health"] + ([f"/roadmap/{roadmap_id}"] if roadmap_id else [])
+        requests = [await _compare(client, path, args) for path in paths]
+
+        t0 = time.perf_counter()
+        scrape = await client.get("/metrics")
+        scrape_ms = (time.perf_counter() - t0) * 1000
+    await async_engine.dispose()
+    return {
+        "benchmark": "metrics_overhead",
+        "rounds": args.rounds,
+        "requests_per_round": args.requests,
+        "requests": requests,
+        "stage_span_us": round(_stage_cost(100_000), 2),
+        "scrape": {"ms": round(scrape_ms, 2), "bytes": len(scrape.content)},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=500, help="requests per round")
+    emit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
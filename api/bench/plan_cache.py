@@ -0,0 +1,101 @@
+"""Plan cache effect on generate latency and upstream LLM calls.
+
+Drives `generate_roadmap_struct` in-process over a skewed population of near-duplicate
+profiles, once with the cache disabled and once enabled. Needs the stub:
+
+    python -m bench.stub_llm --latency-ms 800 &
+    OPENAI_API_KEY=sk-stub OPENAI_BASE_URL=http://127.0.0.1:9100/v1 python -m bench.plan_cache
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+from app.llm import provider
+from ._common import emit, percentiles
+
+
+HOURS = [5, 8, 10, 12, 15, 20]
+STYLES = ["fast", "balanced", "slow"]
+LEVELS = ["beginner", "intermediate", "advanced"]
+ROLES = ["Backend Engineer", "Data Analyst", "Frontend Engineer", "ML Engineer", "DevOps Engineer"]
+
+
+def profile_population(seed: int) -> List[Dict[str, Any]]:
+    """All profile-signal combinations, shuffled so the Zipf head is arbitrary but reproducible."""
+    rng = random.Random(seed)
+    pop = [
+        {"hours_per_week": h, "style": s, "experience_level": lvl, "target_role": r}
+        for h in HOURS for s in STYLES for lvl in LEVELS for r in ROLES
+    ]
+    rng.shuffle(pop)
+    return pop
+
+
+def sample_profiles(n: int, skew: float, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    pop = profile_population(seed)
+    weights = [1.0 / (rank + 1) ** skew for rank in range(len(pop))]
+    return [dict(p) for p in rng.choices(pop, weights=weights, k=n)]
+
+
+async def _stub_calls(stub_stats: str) -> int:
+    async with httpx.AsyncClient(timeout=5) as client:
+        return (await client.get(stub_stats)).json()["calls"]
+
+
+async def run_once(profiles: List[Dict[str, Any]], concurrency: int, enabled: bool, stub_stats: str) -> Dict[str, Any]:
+    provider.plan_cache.enabled = enabled
+    provider.plan_cache.local.clear()
+    provider.plan_cache.hits = provider.plan_cache.shared_hits = provider.plan_cache.misses = 0
+    calls_before = await _stub_calls(stub_stats)
+
+    sem = asyncio.Semaphore(concurrency)
+    samples: List[float] = []
+
+    async def one(profile: Dict[str, Any]) -> None:
+        async with sem:
+            t0 = time.perf_counter()
+            await provider.generate_roadmap_struct(profile=profile, domain="career")
+            samples.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(p) for p in profiles))
+    wall = time.perf_counter() - t0
+    return {
+        "cache_enabled": enabled,
+        "requests": len(profiles),
+        "upstream_calls": await _stub_calls(stub_stats) - calls_before,
+        "throughput_rps": round(len(profiles) / wall, 1),
+        "latency": percentiles(samples),
+        "cache": provider.plan_cache.stats(),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    profiles = sample_profiles(args.requests, args.skew, args.seed)
+    return {
+        "benchmark": "plan_cache",
+        "distinct_profiles": len({tuple(sorted(p.items())) for p in profiles}),
+        "runs": [
+            await run_once(profiles, args.concurrency, False, args.stub_stats),
+            await run_once(profiles, args.concurrency, True, args.stub_stats),
+        ],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of profile popularity")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--stub-stats", default="http://127.0.0.1:9100/stats")
+    emit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""DB pool saturation and worker scaling under a mixed read/write load.
+
+Starts its own API servers (uvicorn on `--port`, JOB_WORKERS=0) with different pool sizes and
+worker counts, and drives each with `--concurrency` clients for `--duration` seconds:
+
+    DB_HOST=127.0.0.1 python -m bench.pool_load --concurrency 64 --duration 10
+
+The mix is `GET /roadmap/{id}`, a history page and `/profile:upsert` (one write transaction).
+
+- pool: one worker, DB_POOL_SIZE in `--pool-sizes` with no overflow; reports throughput,
+  latency, errors and the mean pool checkout wait from `/metrics`
+- workers: default pool settings, `--workers` uvicorn workers each
+"""
+from typing import Any, Dict, List, Optional
+from collections import Counter
+import argparse
+import asyncio
+import os
+import re
+import time
+import uuid
+
+import httpx
+
+from ._common import auth_headers, emit, percentiles, start_api, wait_ready
+
+
+async def _setup(client: httpx.AsyncClient) -> Dict[str, int]:
+    r = await client.post("/profile:upsert", json={
+        "name": "Pool Bench", "email": "bench-pool@example.com", "domain": "career", "data": {"hours_per_week": 6},
+    })
+    r.raise_for_status()
+    user_id = r.json()["user_id"]
+    r = await client.post("/roadmap:generate", json={"user_id": user_id, "domain": "career"})
+    r.raise_for_status()
+    return {"user_id": user_id, "roadmap_id": r.json()["roadmap_id"]}
+
+
+def _pool_wait(metrics_text: str) -> Optional[float]:
+    total = re.search(r"^lifemap_db_pool_checkout_wait_seconds_sum (\S+)$", metrics_text, re.M)
+    count = re.search(r"^lifemap_db_pool_checkout_wait_seconds_count (\S+)$", metrics_text, re.M)
+    if not total or not count or float(count.group(1)) == 0:
+        return None
+    return round(float(total.group(1)) / float(count.group(1)) * 1000, 2)
+
+
+async def _load(base: str, concurrency: int, duration: float) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, headers=auth_headers(), limits=limits, timeout=60) as client:
+        ids = await _setup(client)
+        run = uuid.uuid4().hex[:8]
+        samples: List[float] = []
+        errors: Counter = Counter()
+        deadline = time.perf_counter() + duration
+
+        async def client_loop(n: int) -> None:
+            i = 0
+            while time.perf_counter() < deadline:
+                i += 1
+                kind = (n + i) % 4
+                t0 = time.perf_counter()
+                try:
+                    if kind == 0:
+                        r = await client.post("/profile:upsert", json={
+                            "name": "Pool Bench", "email": f"bench-pool-{run}-{n}@example.com",
+                            "domain": "career", "data": {"hours_per_week": i % 20 + 1},
+                        })
+                    elif kind == 1:
+                        r = await client.get(f"/roadmap/{ids['user_id']}/career/history", params={"limit": 5, "plans": "summary"})
+                    else:
+                        r = await client.get(f"/roadmap/{ids['roadmap_id']}")
+                    if r.status_code != 200:
+                        errors[str(r.status_code)] += 1
+                        continue
+                except httpx.HTTPError as exc:
+                    errors[type(exc).__name__] += 1
+                    continue
+                samples.append((time.perf_counter() - t0) * 1000)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(client_loop(n) for n in range(concurrency)))
+        wall = time.perf_counter() - t0
+        scrape = (await client.get("/metrics")).text
+    return {
+        "requests": len(samples),
+        "errors": dict(errors),
+        "rps": round(len(samples) / wall, 1),
+        "latency": percentiles(samples),
+        "pool_wait_mean_ms": _pool_wait(scrape),
+    }
+
+
+async def _run_server(args: argparse.Namespace, workers: int, env: Dict[str, str]) -> Dict[str, Any]:
+    base = f"http://127.0.0.1:{args.port}"
+    proc = start_api(args.port, env, "--workers", str(workers))
+    try:
+        await wait_ready(base)
+        return await _load(base, args.concurrency, args.duration)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    pool = []
+    for size in args.pool_sizes:
+        result = await _run_server(args, 1, {"DB_POOL_SIZE": str(size), "DB_MAX_OVERFLOW": "0"})
+        pool.append({"pool_size": size, **result})
+    workers = []
+    for n in args.workers:
+        result = await _run_server(args, n, {})
+        # /metrics is per worker: the pool wait is one worker's view
+        workers.append({"workers": n, **result})
+    return {
+        "benchmark": "pool_load",
+        "cpus": os.cpu_count(),
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "pool": pool,
+        "workers": workers,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8100, help="port for the spawned API servers")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--pool-sizes", type=int, nargs="*", default=[1, 2, 5, 10, 20])
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, 2, 4])
+    emit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Read-path latency with the user/profile cache on and off (in-process).
+
+Upserts `--users` bench users, then alternates cache on/off between rounds:
+
+    DB_HOST=127.0.0.1 python -m bench.profile_cache --users 1000 --lookups 5000
+
+- profile_load: the profile lookup of generate (a session per lookup, as in the handler);
+  with the cache on and warm, a hit needs no connection checkout at all
+- history: `GET /roadmap/{user_id}/{domain}/history?limit=1&plans=summary` through the ASGI
+  app, whose user check comes from the cache
+- auth: one token check against the plain API_TOKEN plus `--keys` hashed keys, and the old
+  plain string comparison
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import random
+import time
+import timeit
+
+import httpx
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import auth
+from app.core.database import async_engine, upsert_users_with_profiles
+from app.main import app
+from app.profiles import profile_cache
+from app.roadmaps import _load_profile_data
+from ._common import auth_headers, emit, percentiles
+
+
+async def _seed(users: int) -> List[int]:
+    members = [{"name": f"Profile Bench {i}", "email": f"bench-profile-{i}@example.com",
+                "data": {"hours_per_week": i % 20 + 1, "style": "balanced"}} for i in range(users)]
+    async with AsyncSession(async_engine) as session:
+        ids = await upsert_users_with_profiles(session, "career", members)
+        await session.commit()
+    return list(ids.values())
+
+
+async def _profile_loads(user_ids: List[int], n: int) -> List[float]:
+    samples = []
+    for user_id in random.choices(user_ids, k=n):
+        t0 = time.perf_counter()
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            await _load_profile_data(session, user_id, "career")
+            await session.commit()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return samples
+
+
+async def _history(client: httpx.AsyncClient, user_ids: List[int], n: int) -> List[float]:
+    samples = []
+    for user_id in random.choices(user_ids, k=n):
+        t0 = time.perf_counter()
+        r = await client.get(f"/roadmap/{user_id}/career/history", params={"limit": 1, "plans": "summary"})
+        r.raise_for_status()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return samples
+
+
+def _summary(samples: List[float]) -> Dict[str, Any]:
+    # percentiles() labels its output in ms; these samples are microseconds
+    stats = percentiles(samples)
+    return {k.replace("_ms", "_us"): v for k, v in stats.items()}
+
+
+async def _warm(user_ids: List[int]) -> None:
+    async with AsyncSession(async_engine) as session:
+        for user_id in user_ids:
+            await profile_cache.get(session, user_id)
+
+
+async def _compare(name: str, measure, user_ids: List[int], rounds: int) -> Dict[str, Any]:
+    results: Dict[bool, List[float]] = {True: [], False: []}
+    for i in range(rounds):
+        for on in ((True, False) if i % 2 == 0 else (False, True)):
+            profile_cache.enabled = on
+            profile_cache.invalidate()
+            await _warm(user_ids)
+            results[on] += await measure()
+    profile_cache.enabled = True
+    return {"path": name, "cache_off": _summary(results[False]), "cache_on": _summary(results[True])}
+
+
+def _auth(keys: int) -> Dict[str, Any]:
+    auth._digests.extend(bytes.fromhex(auth.hash_api_key(f"bench-key-{i}")) for i in range(keys))
+    token, n = "dev123", 100_000
+    return {
+        "keys": len(auth._digests),
+        "hashed_constant_time_us": round(timeit.timeit(lambda: auth.token_is_valid(token), number=n) / n * 1e6, 3),
+        "plain_compare_us": round(timeit.timeit(lambda: token != "dev123", number=n) / n * 1e6, 3),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    user_ids = await _seed(args.users)
+    per_round = max(1, args.lookups // args.rounds)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=auth_headers()) as client:
+        paths = [
+            await _compare("profile_load", lambda: _profile_loads(user_ids, per_round), user_ids, args.rounds),
+            await _compare("history", lambda: _history(client, user_ids, per_round), user_ids, args.rounds),
+        ]
+    await async_engine.dispose()
+    return {
+        "benchmark": "profile_cache",
+        "users": args.users,
+        "lookups": per_round * args.rounds,
+        "paths": paths,
+        "auth": _auth(args.keys),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--lookups", type=int, default=5000, help="lookups per path and cache setting")
+    parser.add_argument("--rounds", type=int, default=4)
+    parser.add_argument("--keys", type=int, default=10, help="hashed API keys to check against")
+    emit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
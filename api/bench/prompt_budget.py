@@ -0,0 +1,165 @@
+"""Prompt tokens per LLM call: legacy prompt layout vs compact, budgeted prompts.
+
+Offline (no API, no LLM). For generate, revise and patch-mode revise it renders the prompts
+the provider sends today and the legacy layout they replace (profile context and feedback
+inside the system message, plan/profile JSON indented), then reports per call:
+
+- prompt tokens before/after and the saving
+- the static prefix shared by every call (what provider prompt caching can reuse)
+- for revisions, which prune steps LLM_PROMPT_TOKEN_BUDGET needed on each plan size
+
+Plans: the stub plan, a verbose variant (long descriptions, several resources per milestone)
+and the verbose plan after `--revisions` local revisions.
+
+    python -m bench.prompt_budget --budget 1500 --revisions 60
+"""
+from typing import Any, Dict, List, Tuple
+import argparse
+import copy
+import json
+import os
+
+from app.llm.budget import compact_json, count_tokens, fit_plan, tokenizer
+from app.llm.prompts import (
+    _build_profile_context, get_feedback_fewshot_examples, get_generate_message, get_generate_prompt,
+    get_revise_message, get_revise_prompt,
+)
+from app.llm.planner import revise_plan
+from ._common import emit
+from .stub_llm import STUB_PLAN
+
+
+PROFILES = [
+    {"hours_per_week": h, "style": s, "experience_level": e, "target_role": r}
+    for h, s, e, r in [
+        (6, "balanced", "beginner", "Backend Engineer"),
+        (10, "hands-on", "intermediate", "Data Engineer"),
+        (15, "theory-first", "advanced", "Staff Engineer"),
+        (4, "project-based", "beginner", None),
+    ]
+]
+FEEDBACK = [
+    {"signal_type": "too_fast", "notes": None},
+    {"signal_type": "missing_topic", "notes": "Kubernetes and observability"},
+    {"signal_type": "too_easy", "notes": None},
+    {"signal_type": "other", "notes": "More weekend-friendly pacing"},
+]
+SIGNALS = ["too_fast", "missing_topic", "too_easy", "other"]
+
+
+def _legacy_generate(profile: Dict[str, Any], domain: str) -> Tuple[str, str]:
+    ctx = _build_profile_context(profile, domain)
+    system = get_generate_prompt(domain).replace(
+        "for the profile in the user message. ", f"tailored to the user's profile. Profile context: {ctx} "
+    )
+    return system, json.dumps({"profile": profile, "domain": domain}, indent=2)
+
+
+def _legacy_revise(plan: Dict[str, Any], feedback: Dict[str, Any], domain: str, patch_mode: bool) -> Tuple[str, str]:
+    signal = feedback.get("signal_type", "other")
+    notes = feedback.get("notes")
+    head = (
+        f"You are revising a {domain} roadmap based on user feedback. Feedback type: {signal}. "
+        f"{'User notes: ' + notes if notes else ''} {get_feedback_fewshot_examples(signal)} "
+        "Given the existing plan JSON and this feedback, "
+    )
+    instructions = get_revise_prompt(patch_mode).split("existing plan JSON. ", 1)[1]
+    user = json.dumps({"plan": plan, "feedback": feedback}, **({"separators": (",", ":")} if patch_mode else {"indent": 2}))
+    return head + instructions[0].lower() + instructions[1:], user
+
+
+def _tokens(system: str, user: str) -> int:
+    return count_tokens(system) + count_tokens(user)
+
+
+def _shared_prefix_tokens(systems: List[str]) -> int:
+    return count_tokens(os.path.commonprefix(systems))
+
+
+def _verbose(plan: Dict[str, Any]) -> Dict[str, Any]:
+    plan = copy.deepcopy(plan)
+    for i, m in enumerate(plan["milestones"], start=1):
+        m["description"] = (
+            f"{m['title']}: work through the core concepts, then practice them on guided exercises "
+            "and finish by shipping a small project that you can show in interviews. Keep notes on "
+            "what was hard and revisit it during the buffer weeks before moving on."
+        )
+        m["resources"] = [
+            {"name": f"{m['title']} {kind}", "url": f"https://example.com/{i}/{kind.lower()}"}
+            for kind in ("Guide", "Course", "Exercises", "Reference")
+        ]
+    return plan
+
+
+def _grown(plan: Dict[str, Any], revisions: int) -> Dict[str, Any]:
+    for i in range(revisions):
+        signal = SIGNALS[i % len(SIGNALS)]
+        plan = revise_plan(plan, {"signal_type": signal, "notes": f"topic {i}" if signal == "missing_topic" else None}, "career")
+    return plan
+
+
+def _generate_report() -> Dict[str, Any]:
+    before = [_legacy_generate(p, "career") for p in PROFILES]
+    after = [
+        (get_generate_prompt("career"), get_generate_message(p, "career", compact_json({"profile": p, "domain": "career"})))
+        for p in PROFILES
+    ]
+    return _compare(before, after)
+
+
+def _revise_report(plan: Dict[str, Any], budget: int, patch_mode: bool) -> Dict[str, Any]:
+    before = [_legacy_revise(plan, fb, "career", patch_mode) for fb in FEEDBACK]
+    after = []
+    pruned: List[List[str]] = []
+    for fb in FEEDBACK:
+        def render(p: Dict[str, Any], fb: Dict[str, Any] = fb) -> str:
+            return get_revise_message(fb, "career", compact_json({"plan": p, "feedback": fb}))
+
+        sent, applied, _ = fit_plan(plan, budget, render)
+        after.append((get_revise_prompt(patch_mode), render(sent)))
+        pruned.append(applied)
+    report = _compare(before, after)
+    report["prune_steps"] = max(pruned, key=len)
+    return report
+
+
+def _compare(before: List[Tuple[str, str]], after: List[Tuple[str, str]]) -> Dict[str, Any]:
+    b = sum(_tokens(*m) for m in before) / len(before)
+    a = sum(_tokens(*m) for m in after) / len(after)
+    return {
+        "prompt_tokens_before": round(b, 1),
+        "prompt_tokens_after": round(a, 1),
+        "savings": round(1 - a / b, 3) if b else 0.0,
+        "static_prefix_tokens_before": _shared_prefix_tokens([s for s, _ in before]),
+        "static_prefix_tokens_after": _shared_prefix_tokens([s for s, _ in after]),
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    verbose = _verbose(STUB_PLAN)
+    plans = {"stub": STUB_PLAN, "verbose": verbose, f"verbose+{args.revisions}_revisions": _grown(verbose, args.revisions)}
+    return {
+        "benchmark": "prompt_budget",
+        "tokenizer": tokenizer(),
+        "budget": args.budget,
+        "generate": _generate_report(),
+        "revise": {
+            name: {
+                "plan_tokens": count_tokens(compact_json(plan)),
+                "full": _revise_report(plan, args.budget, patch_mode=False),
+                "patch": _revise_report(plan, args.budget, patch_mode=True),
+            }
+            for name, plan in plans.items()
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=int, default=3000, help="LLM_PROMPT_TOKEN_BUDGET to apply (0 = unlimited)")
+    parser.add_argument("--revisions", type=int, default=60, help="local revisions applied to grow the largest plan")
+    emit(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
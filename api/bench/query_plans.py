@@ -0,0 +1,94 @@
+"""Query plans and timings of the hot lookups with and without the lookup indexes.
+
+Bulk-seeds the configured database (default 100k users x 10 versions = 1M roadmap rows),
+then runs EXPLAIN ANALYZE for the queries behind upsert_profile, generate_roadmap,
+get_roadmap and the history endpoint. The "without" pass drops the indexes inside a
+transaction that is rolled back, so the schema is left untouched.
+
+    python -m bench.query_plans --users 100000 --versions 10
+    python -m bench.query_plans --tag <tag from an earlier run>   # skip seeding
+"""
+from typing import Any, Dict, List
+import argparse
+import json
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.database import engine
+from ._common import emit
+from .seed import seed_bulk
+
+
+LOOKUP_INDEXES = ["ix_user_email", "ix_profile_user_id", "ix_roadmap_user_domain_version", "ix_feedback_roadmap_id"]
+
+QUERIES: Dict[str, str] = {
+    "upsert_profile: user by email": 'SELECT * FROM "user" WHERE email = :email',
+    "upsert_profile/generate: profile by user": "SELECT * FROM profile WHERE user_id = :uid",
+    "generate: max version": "SELECT max(version) FROM roadmap WHERE user_id = :uid AND domain = 'career'",
+    "get_roadmap: feedback by roadmap": "SELECT * FROM feedback WHERE roadmap_id = :rid",
+    "history: aggregated page": (
+        "SELECT r.id, r.version, r.created_at, count(f.id) FROM roadmap r "
+        "LEFT JOIN feedback f ON f.roadmap_id = r.id "
+        "WHERE r.user_id = :uid AND r.domain = 'career' AND r.version > 0 "
+        "GROUP BY r.id ORDER BY r.version LIMIT 100"
+    ),
+}
+
+
+def _explain(conn: Connection, sql: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    raw = conn.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"), params).scalar_one()
+    doc = raw if isinstance(raw, list) else json.loads(raw)
+    nodes: List[str] = []
+
+    def walk(node: Dict[str, Any]) -> None:
+        label = node["Node Type"]
+        if "Index Name" in node:
+            label += f" using {node['Index Name']}"
+        elif "Relation Name" in node:
+            label += f" on {node['Relation Name']}"
+        nodes.append(label)
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(doc[0]["Plan"])
+    return {"execution_ms": round(doc[0]["Execution Time"], 3), "plan": nodes}
+
+
+def _sample(conn: Connection, tag: str) -> Dict[str, Any]:
+    row = conn.execute(
+        text('SELECT id, email FROM "user" WHERE email = :email'),
+        {"email": f"bulk-{tag}-1@example.com"},
+    ).one()
+    rid = conn.execute(
+        text("SELECT id FROM roadmap WHERE user_id = :uid ORDER BY version DESC LIMIT 1"), {"uid": row[0]}
+    ).scalar_one()
+    return {"email": row[1], "uid": row[0], "rid": rid}
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    tag = args.tag or seed_bulk(args.users, args.versions, ["career"])
+    report: Dict[str, Any] = {"benchmark": "query_plans", "tag": tag}
+    with engine.connect() as conn:
+        report["roadmap_rows"] = conn.execute(text("SELECT count(*) FROM roadmap")).scalar_one()
+        params = _sample(conn, tag)
+        report["with_indexes"] = {name: _explain(conn, sql, params) for name, sql in QUERIES.items()}
+        conn.rollback()
+        # DDL is transactional in Postgres: the drops vanish with the rollback below
+        for ix in LOOKUP_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {ix}"))
+        report["without_indexes"] = {name: _explain(conn, sql, params) for name, sql in QUERIES.items()}
+        conn.rollback()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--versions", type=int, default=10, help="roadmap versions per user")
+    parser.add_argument("--tag", help="reuse a batch seeded by an earlier run instead of seeding")
+    emit(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
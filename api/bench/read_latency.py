@@ -0,0 +1,94 @@
+"""Read-path latency while slow LLM generations are in flight.
+
+Start the stub (`python -m bench.stub_llm --latency-ms 2000`), run the API against it, then:
+
+    python -m bench.read_latency --inflight 64 --readers 8 --duration 15
+
+Reports p50/p95/p99 for `/health` and `GET /roadmap/{id}` measured while `--inflight`
+`/roadmap:generate` requests are continuously outstanding.
+"""
+from typing import Dict, List
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from ._common import BASE, auth_headers, emit, percentiles
+
+
+async def _setup(client: httpx.AsyncClient) -> Dict[str, int]:
+    r = await client.post("/profile:upsert", json={
+        "name": "Bench User", "email": "bench-read@example.com", "domain": "career",
+        "data": {"hours_per_week": 10, "style": "balanced", "target_role": "Backend Engineer"},
+    })
+    r.raise_for_status()
+    user_id = r.json()["user_id"]
+    r = await client.post("/roadmap:generate", json={"user_id": user_id, "domain": "career"})
+    r.raise_for_status()
+    return {"user_id": user_id, "roadmap_id": r.json()["roadmap_id"]}
+
+
+async def _writer(client: httpx.AsyncClient, user_id: int, deadline: float, done: List[float]) -> None:
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        try:
+            r = await client.post("/roadmap:generate", json={"user_id": user_id, "domain": "career"})
+            if r.status_code == 200:
+                done.append((time.perf_counter() - t0) * 1000)
+        except httpx.HTTPError:
+            pass
+
+
+async def _reader(client: httpx.AsyncClient, path: str, deadline: float, samples: List[float]) -> None:
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        try:
+            r = await client.get(path)
+            if r.status_code == 200:
+                samples.append((time.perf_counter() - t0) * 1000)
+        except httpx.HTTPError:
+            pass
+
+
+async def run(args: argparse.Namespace) -> Dict:
+    limits = httpx.Limits(max_connections=args.inflight + 2 * args.readers + 4)
+    async with httpx.AsyncClient(base_url=args.base, headers=auth_headers(), limits=limits, timeout=120) as client:
+        ids = await _setup(client)
+        deadline = time.perf_counter() + args.duration
+        generate_ms: List[float] = []
+        health_ms: List[float] = []
+        roadmap_ms: List[float] = []
+        writers = [asyncio.create_task(_writer(client, ids["user_id"], deadline, generate_ms)) for _ in range(args.inflight)]
+        # give the writers a head start so reads are measured with LLM calls outstanding
+        await asyncio.sleep(min(1.0, args.duration / 4))
+        readers = []
+        for _ in range(args.readers):
+            readers.append(asyncio.create_task(_reader(client, "/health", deadline, health_ms)))
+            readers.append(asyncio.create_task(_reader(client, f"/roadmap/{ids['roadmap_id']}", deadline, roadmap_ms)))
+        await asyncio.gather(*readers)
+        await asyncio.gather(*writers)
+    return {
+        "benchmark": "read_latency",
+        "inflight_generate": args.inflight,
+        "readers": args.readers,
+        "duration_s": args.duration,
+        "endpoints": {
+            "GET /health": percentiles(health_ms),
+            "GET /roadmap/{id}": percentiles(roadmap_ms),
+            "POST /roadmap:generate": percentiles(generate_ms),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base", default=BASE)
+    parser.add_argument("--inflight", type=int, default=64, help="concurrent generate requests kept open")
+    parser.add_argument("--readers", type=int, default=8, help="concurrent readers per read endpoint")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds to run")
+    emit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""LLM resilience under injected faults: deadlines, retries, hedging and the circuit breaker.
+
+Drives `generate_roadmap_struct` in-process against the fault-injecting stub, with the plan
+cache off and a unique profile per request, so every request is one upstream call:
+
+    python -m bench.stub_llm --latency-ms 200 &
+    OPENAI_API_KEY=sk-stub OPENAI_BASE_URL=http://127.0.0.1:9100/v1 python -m bench.resilience
+
+Scenarios (faults are set through the stub's `POST /faults`):
+
+- tail: `--slow-rate` of calls take `--slow-ms` longer; unguarded vs hedged after `--hedge-after`
+- errors: `--error-rate` of calls answer 503; unguarded (one attempt) vs retried with backoff
+- outage: every call hangs, or every call answers 503; the deadline bounds the calls that
+  reach the provider, then the breaker opens and the local engine serves without waiting
+- recovery: faults cleared; after `--open-seconds` one probe closes the breaker again
+
+"unguarded" is a single attempt with no deadline and no breaker. Each scenario reports
+latency, upstream calls, the served-path counters and the guard counters.
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+
+from app.llm import provider
+from app.llm.resilience import CircuitBreaker, LLMGuard, ServedPaths
+from ._common import emit, percentiles
+
+
+NO_FAULTS = {"error_rate": 0.0, "hang_rate": 0.0, "slow_rate": 0.0, "slow_ms": 0.0}
+
+
+def _guard(args: argparse.Namespace, guarded: bool, hedge: bool = False) -> LLMGuard:
+    if not guarded:
+        return LLMGuard(CircuitBreaker(enabled=False), deadline_seconds=3600, attempt_timeout_seconds=3600,
+                        max_attempts=1, retry_initial_seconds=0, retry_max_seconds=0)
+    return LLMGuard(
+        CircuitBreaker(window_seconds=30, min_calls=args.min_calls, failure_rate=0.5, open_seconds=args.open_seconds),
+        deadline_seconds=args.deadline,
+        attempt_timeout_seconds=args.attempt_timeout,
+        max_attempts=args.max_attempts,
+        retry_initial_seconds=0.05,
+        retry_max_seconds=0.5,
+        hedge_after_seconds=args.hedge_after if hedge else 0.0,
+    )
+
+
+async def _stub(client: httpx.AsyncClient, stub: str, faults: Dict[str, float]) -> int:
+    await client.post(f"{stub}/faults", json={**NO_FAULTS, **faults})
+    return (await client.get(f"{stub}/stats")).json()["calls"]
+
+
+async def _scenario(args: argparse.Namespace, client: httpx.AsyncClient, name: str, faults: Dict[str, float],
+                    guard: LLMGuard, requests: int) -> Dict[str, Any]:
+    provider.llm_guard = guard
+    provider.served_paths = ServedPaths()
+    calls = await _stub(client, args.stub, faults)
+    sem = asyncio.Semaphore(args.concurrency)
+    samples: List[float] = []
+    run = uuid.uuid4().hex[:8]
+
+    async def one(i: int) -> None:
+        async with sem:
+            t0 = time.perf_counter()
+            await provider.generate_roadmap_struct({"hours_per_week": 8, "nonce": f"{run}-{i}"}, "career")
+            samples.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    wall = time.perf_counter() - t0
+    return {
+        "scenario": name,
+        "requests": requests,
+        "wall_s": round(wall, 2),
+        "upstream_calls": (await client.get(f"{args.stub}/stats")).json()["calls"] - calls,
+        "latency": percentiles(samples),
+        "served": provider.served_paths.stats(),
+        "guard": guard.stats(),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    provider.plan_cache.enabled = False
+    tail = {"slow_rate": args.slow_rate, "slow_ms": args.slow_ms}
+    errors = {"error_rate": args.error_rate}
+    n = args.requests
+    results: List[Dict[str, Any]] = []
+    async with httpx.AsyncClient(timeout=10) as client:
+        results.append(await _scenario(args, client, "tail/unguarded", tail, _guard(args, False), n))
+        results.append(await _scenario(args, client, "tail/hedged", tail, _guard(args, True, hedge=True), n))
+        results.append(await _scenario(args, client, "errors/unguarded", errors, _guard(args, False), n))
+        results.append(await _scenario(args, client, "errors/retried", errors, _guard(args, True), n))
+
+        results.append(await _scenario(args, client, "outage/hang", {"hang_rate": 1.0}, _guard(args, True), n))
+        # one guard across the outage and recovery, as in a running worker
+        guard = _guard(args, True)
+        results.append(await _scenario(args, client, "outage/503", {"error_rate": 1.0}, guard, n))
+        await asyncio.sleep(args.open_seconds)
+        results.append(await _scenario(args, client, "recovery", {}, guard, n))
+        await _stub(client, args.stub, {})
+    return {
+        "benchmark": "resilience",
+        "concurrency": args.concurrency,
+        "faults": {**tail, **errors},
+        "guard": {"deadline_s": args.deadline, "attempt_timeout_s": args.attempt_timeout,
+                  "max_attempts": args.max_attempts, "hedge_after_s": args.hedge_after,
+                  "breaker_min_calls": args.min_calls, "breaker_open_s": args.open_seconds},
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stub", default="http://127.0.0.1:9100", help="stub LLM base URL")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-ms", type=float, default=3000)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    parser.add_argument("--hedge-after", type=float, default=0.5, help="seconds before a hedged second request")
+    parser.add_argument("--attempt-timeout", type=float, default=5)
+    parser.add_argument("--deadline", type=float, default=8)
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument("--min-calls", type=int, default=10, help="breaker minimum calls in the window")
+    parser.add_argument("--open-seconds", type=float, default=2, help="breaker open time before a probe")
+    emit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Micro-benchmarks of response building for get_roadmap, history and generate.
+
+`legacy` is the old path: decode stored plan text, run FastAPI's jsonable_encoder, then
+JSONResponse (stdlib json). `orjson` is the current path: ORJSONResponse with stored plan
+text spliced in via orjson.Fragment, or encoded directly by orjson for fresh plans.
+No database or server needed:
+
+    python -m bench.responses --history-versions 100
+"""
+from typing import Any, Callable, Dict
+import argparse
+import json
+import timeit
+from datetime import datetime
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from ._common import emit
+from .stub_llm import STUB_PLAN
+
+
+def _legacy(content: Any) -> bytes:
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def _meta(i: int) -> Dict[str, Any]:
+    return {"roadmap_id": i, "version": i, "created_at": datetime(2025, 1, 1).isoformat(), "feedback_count": 1}
+
+
+def cases(history_versions: int) -> Dict[str, Dict[str, Callable[[], bytes]]]:
+    plan = dict(STUB_PLAN)
+    stored = json.dumps(plan)  # what Postgres hands back for CAST(plan_json AS TEXT)
+    feedback = [{"id": 1, "signal_type": "too_fast", "notes": None, "created_at": datetime(2025, 1, 2).isoformat()}]
+
+    def get_legacy() -> bytes:
+        return _legacy(dict(_meta(1), plan=json.loads(stored), feedback=feedback))
+
+    def get_orjson() -> bytes:
+        return ORJSONResponse(dict(_meta(1), plan=orjson.Fragment(stored), feedback=feedback)).body
+
+    def history_legacy() -> bytes:
+        versions = [dict(_meta(i), plan=json.loads(stored)) for i in range(history_versions)]
+        return _legacy({"user_id": 1, "domain": "career", "versions": versions})
+
+    def history_orjson() -> bytes:
+        versions = [dict(_meta(i), plan=orjson.Fragment(stored)) for i in range(history_versions)]
+        return ORJSONResponse({"user_id": 1, "domain": "career", "versions": versions}).body
+
+    def generate_legacy() -> bytes:
+        json.dumps(plan)  # persisted copy
+        return _legacy({"roadmap_id": 1, "version": 1, "plan": plan})
+
+    def generate_orjson() -> bytes:
+        orjson.dumps(plan)  # persisted copy
+        return ORJSONResponse({"roadmap_id": 1, "version": 1, "plan": plan}).body
+
+    return {
+        "get_roadmap": {"legacy": get_legacy, "orjson": get_orjson},
+        f"get_roadmap_history[{history_versions}]": {"legacy": history_legacy, "orjson": history_orjson},
+        "generate_roadmap": {"legacy": generate_legacy, "orjson": generate_orjson},
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for name, impls in cases(args.history_versions).items():
+        row: Dict[str, Any] = {}
+        for impl, fn in impls.items():
+            number = max(1, args.number // (args.history_versions if "history" in name else 1))
+            best = min(timeit.repeat(fn, number=number, repeat=args.repeat)) / number
+            row[impl] = {"us_per_op": round(best * 1e6, 2), "bytes": len(fn())}
+        row["speedup"] = round(row["legacy"]["us_per_op"] / row["orjson"]["us_per_op"], 2)
+        results[name] = row
+    return {"benchmark": "responses", "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--history-versions", type=int, default=100)
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    emit(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Token and storage cost of long revision chains: full plans vs patches.
+
+Builds the same chain of `--revisions` revisions twice in-process (local revisions, no LLM),
+once storing every version in full and once with a snapshot every `--snapshot-every`
+versions and patches in between, then reports:
+
+- storage: bytes Postgres uses for plan_json + patch_json across the chain
+- read cost: walking the full history and fetching the latest version
+- tokens: per revision, what an LLM call would send and receive in full mode (indented
+  plan in, whole plan out) vs patch mode (compact plan in, patch out); ~4 chars per token
+
+    python -m bench.revision_chain --revisions 500 --snapshot-every 20
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+
+import httpx
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.llm.patch import diff_plans, patch_to_json
+from app.main import app
+from ._common import auth_headers, emit, percentiles
+
+
+SIGNALS = ["too_fast", "too_easy", "missing_topic", "other"]
+
+
+async def _build_chain(client: httpx.AsyncClient, revisions: int) -> Dict[str, Any]:
+    r = await client.post("/profile:upsert", json={
+        "name": "Bench User", "email": f"bench-chain-{uuid.uuid4().hex[:8]}@example.com", "domain": "career",
+        "data": {"hours_per_week": 10, "style": "balanced"},
+    })
+    r.raise_for_status()
+    user_id = r.json()["user_id"]
+    r = await client.post("/roadmap:generate", json={"user_id": user_id, "domain": "career"})
+    r.raise_for_status()
+    latest = r.json()
+    plans = [latest["plan"]]
+    for i in range(revisions):
+        signal = SIGNALS[i % len(SIGNALS)]
+        r = await client.post("/roadmap:revise", json={
+            "roadmap_id": latest["roadmap_id"],
+            "feedback": {"signal_type": signal, "notes": f"topic {i}" if signal == "missing_topic" else None},
+        })
+        r.raise_for_status()
+        latest = r.json()
+        plans.append(latest["plan"])
+    return {"user_id": user_id, "latest_id": latest["roadmap_id"], "plans": plans}
+
+
+async def _storage_bytes(user_id: int) -> Dict[str, int]:
+    async with async_engine.connect() as conn:
+        row = (await conn.execute(text(
+            """SELECT count(*) FILTER (WHERE plan_json IS NOT NULL),
+                      coalesce(sum(pg_column_size(plan_json)), 0),
+                      coalesce(sum(pg_column_size(patch_json)), 0)
+               FROM roadmap WHERE user_id = :u AND domain = 'career'"""
+        ), {"u": user_id})).one()
+    return {"snapshots": row[0], "plan_bytes": row[1], "patch_bytes": row[2], "total_bytes": row[1] + row[2]}
+
+
+async def _read_cost(client: httpx.AsyncClient, user_id: int, latest_id: int, repeat: int) -> Dict[str, Any]:
+    history_ms: List[float] = []
+    latest_ms: List[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        after = 0
+        while after is not None:
+            r = await client.get(f"/roadmap/{user_id}/career/history", params={"after_version": after, "limit": 100})
+            r.raise_for_status()
+            after = r.json()["next_after_version"]
+        history_ms.append((time.perf_counter() - t0) * 1000)
+        t0 = time.perf_counter()
+        (await client.get(f"/roadmap/{latest_id}")).raise_for_status()
+        latest_ms.append((time.perf_counter() - t0) * 1000)
+    return {"full_history": percentiles(history_ms), "get_latest": percentiles(latest_ms)}
+
+
+def _token_estimate(plans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    full_in = full_out = patch_in = patch_out = 0
+    for prev, new in zip(plans, plans[1:]):
+        feedback = {"signal_type": "too_fast", "notes": None}
+        full_in += len(json.dumps({"plan": prev, "feedback": feedback}, indent=2))
+        full_out += len(json.dumps(new))
+        patch_in += len(json.dumps({"plan": prev, "feedback": feedback}, separators=(",", ":")))
+        patch_out += len(json.dumps(patch_to_json(diff_plans(prev, new)), separators=(",", ":")))
+    full, patch = (full_in + full_out) // 4, (patch_in + patch_out) // 4
+    return {
+        "full_mode": {"prompt_tokens": full_in // 4, "completion_tokens": full_out // 4, "total": full},
+        "patch_mode": {"prompt_tokens": patch_in // 4, "completion_tokens": patch_out // 4, "total": patch},
+        "savings": round(1 - patch / full, 3) if full else 0.0,
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    os.environ.pop("OPENAI_API_KEY", None)  # local revisions: deterministic and free
+    transport = httpx.ASGITransport(app=app)
+    results: Dict[str, Any] = {}
+    plans: List[Dict[str, Any]] = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=auth_headers(), timeout=300) as client:
+        for mode, every in (("full", 1), ("delta", args.snapshot_every)):
+            settings.PLAN_SNAPSHOT_EVERY = every
+            t0 = time.perf_counter()
+            chain = await _build_chain(client, args.revisions)
+            build_s = time.perf_counter() - t0
+            plans = chain["plans"]
+            results[mode] = {
+                "snapshot_every": every,
+                "build_s": round(build_s, 2),
+                "storage": await _storage_bytes(chain["user_id"]),
+                "reads": await _read_cost(client, chain["user_id"], chain["latest_id"], args.repeat),
+            }
+    full_bytes = results["full"]["storage"]["total_bytes"]
+    results["storage_savings"] = round(1 - results["delta"]["storage"]["total_bytes"] / full_bytes, 3) if full_bytes else 0.0
+    return {
+        "benchmark": "revision_chain",
+        "revisions": args.revisions,
+        "tokens": _token_estimate(plans),
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--revisions", type=int, default=500)
+    parser.add_argument("--snapshot-every", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    emit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
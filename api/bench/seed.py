@@ -0,0 +1,121 @@
+"""Seed the configured database with synthetic users, roadmaps and feedback.
+
+Expects an initialized schema (`scripts/dev/migrate.sh`).
+
+    python -m bench.seed --versions 5000                 # one user with a long revision chain
+    python -m bench.seed --users 100000 --versions 10    # bulk: 1M roadmap rows
+"""
+from typing import Any, Dict, List
+import argparse
+import json
+import uuid
+
+from sqlalchemy import text
+
+from app.core.database import engine
+from .stub_llm import STUB_PLAN
+
+
+def plan_text(domain: str = "career") -> str:
+    return json.dumps(dict(STUB_PLAN, domain=domain))
+
+
+def seed_history(versions: int, domain: str = "career", feedback_every: int = 2, email: str = "") -> int:
+    """Create one user with `versions` roadmap versions; every Nth version gets feedback."""
+    with engine.begin() as conn:
+        email = email or f"bench-history-{uuid.uuid4().hex[:8]}@example.com"
+        user_id = conn.execute(
+            text('INSERT INTO "user" (name, email) VALUES (:n, :e) RETURNING id'),
+            {"n": "Bench History", "e": email},
+        ).scalar_one()
+        conn.execute(
+            text(
+                "INSERT INTO roadmap (user_id, domain, version, plan_json, created_at) "
+                "SELECT :uid, :domain, g, CAST(:plan AS JSONB), now() FROM generate_series(1, :n) AS g"
+            ),
+            {"uid": user_id, "domain": domain, "plan": plan_text(domain), "n": versions},
+        )
+        conn.execute(
+            text("INSERT INTO roadmap_version_counter (user_id, domain, last_version) VALUES (:uid, :domain, :n)"),
+            {"uid": user_id, "domain": domain, "n": versions},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO feedback (roadmap_id, signal_type, notes, created_at) "
+                "SELECT id, 'too_fast', 'seeded', now() FROM roadmap "
+                "WHERE user_id = :uid AND version % :every = 0"
+            ),
+            {"uid": user_id, "every": max(1, feedback_every)},
+        )
+    return user_id
+
+
+def seed_bulk(users: int, versions: int, domains: List[str], feedback_every: int = 2, compact_plan: bool = True) -> str:
+    """Bulk-create `users` users with profiles and `versions` roadmaps per user and domain.
+
+    Runs entirely server-side with generate_series, so millions of rows take seconds.
+    Returns the email tag identifying this batch (`bulk-<tag>-<n>@example.com`).
+    """
+    tag = uuid.uuid4().hex[:8]
+    plan = json.dumps({"domain": domains[0], "title": "Bulk plan", "milestones": []}) if compact_plan else plan_text()
+    profile = json.dumps({"hours_per_week": 10, "style": "balanced", "target_role": "Backend Engineer"})
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                'INSERT INTO "user" (name, email) '
+                "SELECT 'Bulk ' || g, 'bulk-' || :tag || '-' || g || '@example.com' FROM generate_series(1, :n) AS g"
+            ),
+            {"tag": tag, "n": users},
+        )
+        batch = '(SELECT id FROM "user" WHERE email LIKE :pattern)'
+        pattern = f"bulk-{tag}-%"
+        conn.execute(
+            text(f"INSERT INTO profile (user_id, career_json) SELECT id, CAST(:profile AS JSONB) FROM {batch} AS u"),
+            {"profile": profile, "pattern": pattern},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO roadmap (user_id, domain, version, plan_json, created_at) "
+                f"SELECT u.id, d, v, CAST(:plan AS JSONB), now() FROM {batch} AS u "
+                "CROSS JOIN unnest(CAST(:domains AS text[])) AS d CROSS JOIN generate_series(1, :versions) AS v"
+            ),
+            {"plan": plan, "pattern": pattern, "domains": domains, "versions": versions},
+        )
+        # the API numbers new versions from this counter, not from the roadmap rows
+        conn.execute(
+            text(
+                "INSERT INTO roadmap_version_counter (user_id, domain, last_version) "
+                f"SELECT u.id, d, :versions FROM {batch} AS u CROSS JOIN unnest(CAST(:domains AS text[])) AS d"
+            ),
+            {"pattern": pattern, "domains": domains, "versions": versions},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO feedback (roadmap_id, signal_type, notes, created_at) "
+                f"SELECT r.id, 'too_fast', NULL, now() FROM roadmap r JOIN {batch} AS u ON u.id = r.user_id "
+                "WHERE r.version % :every = 0"
+            ),
+            {"pattern": pattern, "every": max(1, feedback_every)},
+        )
+        for table in ('"user"', "profile", "roadmap", "feedback", "roadmap_version_counter"):
+            conn.execute(text(f"ANALYZE {table}"))
+    return tag
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--versions", type=int, default=5000, help="versions per user (and domain)")
+    parser.add_argument("--users", type=int, default=0, help="bulk mode: number of users to create")
+    parser.add_argument("--domain", action="append", help="domain(s) to seed; default career")
+    args = parser.parse_args()
+    domains = args.domain or ["career"]
+    report: Dict[str, Any]
+    if args.users:
+        report = {"tag": seed_bulk(args.users, args.versions, domains), "users": args.users, "versions": args.versions}
+    else:
+        report = {"user_id": seed_history(args.versions, domains[0]), "versions": args.versions}
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Similar-profile index: hit rate and lookup latency over a synthetic population (offline).
+
+Encodes `--profiles` synthetic profiles spread over the three domains, keeps one row per
+distinct encoding (as the `profile_index` table does), then looks up `--queries` fresh
+profiles from the same distribution. `--unique-share` of the targets carry a word nobody else
+uses, the long tail:
+
+    python -m bench.similarity --profiles 1000000 --queries 2000
+
+- encode: profiles encoded per second, index rows and memory
+- lookup: encode + nearest-neighbour scan per query (p50/p95/p99), as `SimilarityIndex.lookup`
+  does before fetching the matched plan
+- hit_rate: share of queries answered without the LLM at each `--thresholds` value, overall
+  and split into common and long-tail targets
+- adapt: rescheduling a matched plan to the query profile
+- with `--persist N` (needs the database): N rows written to `profile_index` under bench
+  domains, the time a worker takes to load them at startup, then deleted again
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import random
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+from app.llm.planner import adapt_plan, build_plan
+from app.llm.similar import SimilarityIndex, encode_profiles, profile_signals
+from ._common import emit, percentiles
+
+DOMAINS = ("career", "academics", "personal")
+TARGETS = {
+    "career": ["backend engineer", "frontend developer", "data scientist", "data analyst", "devops engineer",
+               "product manager", "python developer", "machine learning engineer", "cloud engineer",
+               "react developer", "site reliability engineer", "java developer", "ui designer", ""],
+    "academics": ["sat", "gre", "ielts", "toefl", "act", "gmat", "calculus", "organic chemistry", ""],
+    "personal": ["running", "strength training", "budgeting", "investing", "reading habit", "writing",
+                 "weight loss", "meditation", ""],
+}
+TARGET_KEYS = {"career": "target_role", "academics": "target_exam", "personal": "goal"}
+# free-text qualifiers users add; they make most targets unique strings
+QUALIFIERS = ["", "", "", "senior", "junior", "remote", "at a startup", "in fintech", "for a promotion",
+              "by summer", "with python", "in 6 months", "part time", "career switch"]
+LEVELS = ["beginner", "beginner", "intermediate", "advanced"]
+STYLES = ["balanced", "hands-on", "fast", "thorough", "project-based", "theory-first", "intensive"]
+
+
+def _population(n: int, unique_share: float, rng: random.Random) -> List[Dict[str, Any]]:
+    people = []
+    for _ in range(n):
+        domain = rng.choice(DOMAINS)
+        # the long tail: a word no one else uses (a company, a course code)
+        unique = f"x{rng.getrandbits(40):x}" if rng.random() < unique_share else ""
+        target = " ".join(w for w in (rng.choice(QUALIFIERS), rng.choice(TARGETS[domain]), unique) if w)
+        people.append({
+            "domain": domain,
+            "long_tail": bool(unique),
+            TARGET_KEYS[domain]: target,
+            "experience_level": rng.choice(LEVELS),
+            "style": rng.choice(STYLES),
+            "hours_per_week": min(60, max(1, int(rng.lognormvariate(2.0, 0.6)))),
+        })
+    return people
+
+
+def _build(profiles: List[Dict[str, Any]]) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    vectors = encode_profiles(profiles)
+    encode_s = time.perf_counter() - t0
+    domains = np.array([p["domain"] for p in profiles])
+    index = SimilarityIndex(threshold=0.0, refresh_seconds=float("inf"))
+    next_id = 1
+    for domain in DOMAINS:
+        distinct = np.unique(vectors[domains == domain], axis=0)
+        index.add(domain, np.arange(next_id, next_id + len(distinct), dtype=np.int64), distinct)
+        next_id += len(distinct)
+    return {"index": index, "encode_s": encode_s}
+
+
+async def _lookups(index: SimilarityIndex, queries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    samples, scores = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        _, score = await index.nearest(q["domain"], encode_profiles([q])[0])
+        samples.append((time.perf_counter() - t0) * 1000)
+        scores.append(score)
+    return {"latency": percentiles(samples), "scores": np.array(scores)}
+
+
+def _hit_rates(scores: np.ndarray, queries: List[Dict[str, Any]], thresholds: List[float]) -> Dict[str, Any]:
+    tail = np.array([q["long_tail"] for q in queries])
+    return {
+        str(t): {
+            "all": round(float(np.mean(scores >= t)), 4),
+            "common_targets": round(float(np.mean(scores[~tail] >= t)), 4) if (~tail).any() else None,
+            "long_tail": round(float(np.mean(scores[tail] >= t)), 4) if tail.any() else None,
+        }
+        for t in thresholds
+    }
+
+
+def _adapt(queries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    source = queries[0]
+    plan = build_plan(source, source["domain"])
+    signals = profile_signals(source)
+    samples = []
+    for q in queries:
+        t0 = time.perf_counter()
+        adapt_plan(plan, signals, q)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return percentiles(samples)
+
+
+async def _persist(index: SimilarityIndex, rows: int) -> Dict[str, Any]:
+    from app.core.database import async_engine
+
+    bench_domains = {d: f"bench-{d}" for d in DOMAINS}
+    batch = []
+    for domain, partition in index._partitions.items():
+        take = min(partition.size, rows - len(batch))
+        batch += [{"domain": bench_domains[domain], "features": partition.vectors[i].tobytes()} for i in range(take)]
+    t0 = time.perf_counter()
+    async with async_engine.begin() as conn:
+        await conn.execute(
+            text("INSERT INTO profile_index (domain, features, signals, plan) "
+                 "VALUES (:domain, :features, '{}', '{}') ON CONFLICT DO NOTHING"),
+            batch,
+        )
+    insert_s = time.perf_counter() - t0
+    try:
+        loaded = SimilarityIndex(threshold=0.0, refresh_seconds=float("inf"))
+        t0 = time.perf_counter()
+        await loaded.attach(async_engine)
+        load_s = time.perf_counter() - t0
+        return {"rows": len(batch), "insert_s": round(insert_s, 2), "startup_load_s": round(load_s, 2),
+                "loaded_rows": len(loaded)}
+    finally:
+        async with async_engine.begin() as conn:
+            await conn.execute(text("DELETE FROM profile_index WHERE domain = ANY(:d)"),
+                               {"d": list(bench_domains.values())})
+        await async_engine.dispose()
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    built = _build(_population(args.profiles, args.unique_share, rng))
+    index: SimilarityIndex = built["index"]
+    queries = _population(args.queries, args.unique_share, rng)
+    looked_up = await _lookups(index, queries)
+    report = {
+        "benchmark": "similarity",
+        "profiles": args.profiles,
+        "unique_share": args.unique_share,
+        "encode": {
+            "profiles_per_s": round(args.profiles / built["encode_s"]),
+            "index_rows": len(index),
+            "index_mb": round(sum(p.vectors.nbytes + p.ids.nbytes for p in index._partitions.values()) / 2**20, 1),
+        },
+        "lookup": looked_up["latency"],
+        "hit_rate": _hit_rates(looked_up["scores"], queries, args.thresholds),
+        "adapt": _adapt(queries),
+    }
+    if args.persist:
+        report["persist"] = await _persist(index, args.persist)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--unique-share", type=float, default=0.3, help="profiles with a one-off word in their target")
+    parser.add_argument("--thresholds", type=float, nargs="*", default=[0.9, 0.95, 0.98])
+    parser.add_argument("--persist", type=int, default=0, help="rows to round-trip through profile_index")
+    parser.add_argument("--seed", type=int, default=7)
+    emit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
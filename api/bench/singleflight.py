@@ -0,0 +1,89 @@
+"""Upstream LLM calls for a burst of identical generate requests (single-flight).
+
+Start the stub (`python -m bench.stub_llm --latency-ms 2000`) and the API against it, then:
+
+    python -m bench.singleflight --requests 50
+
+Each round upserts a fresh profile (so the plan cache cannot answer), fires `--requests`
+concurrent `/roadmap:generate` calls for it and counts how many completions reached the stub.
+Pass `--base` several times to spread the burst over separate API processes, e.g. two
+uvicorns started with PLAN_SINGLEFLIGHT_CROSS_WORKER=true.
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+
+from ._common import BASE, auth_headers, emit, percentiles
+
+
+async def _singleflight_stats(clients: List[httpx.AsyncClient]) -> List[Dict[str, Any]]:
+    return [(await c.get("/llm/stats")).json()["singleflight"] for c in clients]
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    bases = args.base or [BASE]
+    limits = httpx.Limits(max_connections=args.requests + 4)
+    clients = [httpx.AsyncClient(base_url=b, headers=auth_headers(), limits=limits, timeout=120) for b in bases]
+    stub = httpx.AsyncClient(base_url=args.stub, timeout=10)
+    try:
+        before = await _singleflight_stats(clients)
+        calls_before = (await stub.get("/stats")).json()["calls"]
+        samples: List[float] = []
+        t0 = time.perf_counter()
+        for _ in range(args.rounds):
+            r = await clients[0].post("/profile:upsert", json={
+                "name": "Bench User", "email": "bench-singleflight@example.com", "domain": "career",
+                "data": {"hours_per_week": 10, "style": "balanced", "nonce": uuid.uuid4().hex},
+            })
+            r.raise_for_status()
+            user_id = r.json()["user_id"]
+
+            async def one(i: int) -> None:
+                start = time.perf_counter()
+                r = await clients[i % len(clients)].post("/roadmap:generate", json={"user_id": user_id, "domain": "career"})
+                r.raise_for_status()
+                samples.append((time.perf_counter() - start) * 1000)
+
+            await asyncio.gather(*(one(i) for i in range(args.requests)))
+        wall = time.perf_counter() - t0
+        upstream = (await stub.get("/stats")).json()["calls"] - calls_before
+        after = await _singleflight_stats(clients)
+    finally:
+        for c in clients:
+            await c.aclose()
+        await stub.aclose()
+
+    delta = {
+        k: sum(a[k] - b[k] for a, b in zip(after, before))
+        for k in ("leaders", "collapsed", "cross_worker_collapsed")
+    }
+    total = args.requests * args.rounds
+    return {
+        "benchmark": "singleflight",
+        "api_processes": len(bases),
+        "rounds": args.rounds,
+        "requests_per_round": args.requests,
+        "requests": total,
+        "upstream_calls": upstream,
+        "upstream_calls_per_round": round(upstream / args.rounds, 2),
+        "singleflight": delta,
+        "wall_s": round(wall, 2),
+        "latency": percentiles(samples),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base", action="append", help="API base URL; repeat for several processes")
+    parser.add_argument("--stub", default="http://127.0.0.1:9100", help="stub LLM base URL (for its call counter)")
+    parser.add_argument("--requests", type=int, default=50, help="identical concurrent requests per round")
+    parser.add_argument("--rounds", type=int, default=3)
+    emit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
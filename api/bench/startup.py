@@ -0,0 +1,162 @@
+"""Startup time, first-request latency and throughput: dev (--reload) vs production mode.
+
+Spawns its own servers on `--port` (JOB_WORKERS=0) and compares:
+
+    DB_HOST=127.0.0.1 python -m bench.startup --workers 2 --duration 10
+
+- import: `import app.main` in a fresh interpreter, as shipped (openai deferred) and with
+  openai imported up front (the old eager import)
+- dev: `uvicorn --reload`, one process with the file watcher, DB pool and LLM client on demand
+- prod: `uvicorn_start.sh` with SERVER_MODE=prod: migrations once, `--workers` workers on
+  uvloop + httptools, no access log, pool warm-up in the lifespan
+- prod-cold: prod with DB_POOL_WARMUP=0
+
+Each server reports time until `/health` answers, the latency of the first DB-backed
+requests, and throughput / latency of `GET /roadmap/{id}` with `--concurrency` clients.
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from ._common import auth_headers, emit, percentiles, start_api, wait_ready
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); {pre}import app.main; print((time.perf_counter() - t) * 1000)"
+
+
+def _import_ms(pre: str, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET.format(pre=pre)],
+                             capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return round(statistics.median(samples), 1)
+
+
+def _spawn(mode: str, args: argparse.Namespace) -> subprocess.Popen:
+    env = {"PORT": str(args.port)}
+    if mode == "dev":
+        return start_api(args.port, env, "--reload")
+    if mode == "prod-cold":
+        env["DB_POOL_WARMUP"] = "0"
+    return subprocess.Popen(
+        ["bash", "uvicorn_start.sh"],
+        env={**os.environ, "JOB_WORKERS": "0", "SERVER_MODE": "prod", "WEB_CONCURRENCY": str(args.workers), **env},
+        stdout=sys.stderr,
+    )
+
+
+async def _setup(base: str) -> int:
+    async with httpx.AsyncClient(base_url=base, headers=auth_headers(), timeout=60) as client:
+        r = await client.post("/profile:upsert", json={
+            "name": "Startup Bench", "email": "bench-startup@example.com", "domain": "career",
+            "data": {"hours_per_week": 6},
+        })
+        r.raise_for_status()
+        r = await client.post("/roadmap:generate", json={"user_id": r.json()["user_id"], "domain": "career"})
+        r.raise_for_status()
+        return r.json()["roadmap_id"]
+
+
+async def _first_requests(base: str, path: str, n: int) -> List[float]:
+    """Latency of the first `n` concurrent requests: each needs a pooled connection."""
+    async with httpx.AsyncClient(base_url=base, headers=auth_headers(), timeout=60) as client:
+        async def one() -> float:
+            t0 = time.perf_counter()
+            (await client.get(path)).raise_for_status()
+            return (time.perf_counter() - t0) * 1000
+
+        return list(await asyncio.gather(*(one() for _ in range(n))))
+
+
+async def _load(base: str, path: str, concurrency: int, duration: float) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    samples: List[float] = []
+    errors = 0
+    async with httpx.AsyncClient(base_url=base, headers=auth_headers(), limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+
+        async def client_loop() -> None:
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                try:
+                    r = await client.get(path)
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                if r.status_code != 200:
+                    errors += 1
+                    continue
+                samples.append((time.perf_counter() - t0) * 1000)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        wall = time.perf_counter() - t0
+    return {"requests": len(samples), "errors": errors, "rps": round(len(samples) / wall, 1),
+            "latency": percentiles(samples)}
+
+
+async def _mode(mode: str, args: argparse.Namespace, roadmap_id: int) -> Dict[str, Any]:
+    base = f"http://127.0.0.1:{args.port}"
+    t0 = time.perf_counter()
+    proc = _spawn(mode, args)
+    try:
+        await wait_ready(base, timeout=60)
+        ready_ms = (time.perf_counter() - t0) * 1000
+        path = f"/roadmap/{roadmap_id}"
+        first = await _first_requests(base, path, args.first_requests)
+        return {
+            "mode": mode,
+            "workers": 1 if mode == "dev" else args.workers,
+            "ready_ms": round(ready_ms, 1),
+            "first_requests": percentiles(first),
+            "load": await _load(base, path, args.concurrency, args.duration),
+        }
+    finally:
+        proc.terminate()
+        proc.wait(timeout=60)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    base = f"http://127.0.0.1:{args.port}"
+    proc = start_api(args.port, {})
+    try:
+        await wait_ready(base)
+        roadmap_id = await _setup(base)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    modes = [await _mode(mode, args, roadmap_id) for mode in ("dev", "prod", "prod-cold")]
+    return {
+        "benchmark": "startup",
+        "cpus": os.cpu_count(),
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "import_ms": {
+            "lazy_openai": _import_ms("", args.import_runs),
+            "eager_openai": _import_ms("import openai; ", args.import_runs),
+        },
+        "modes": modes,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8100, help="port for the spawned API servers")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="workers in prod mode")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--first-requests", type=int, default=8, help="concurrent requests right after start")
+    parser.add_argument("--import-runs", type=int, default=5)
+    emit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Time-to-first-milestone: streaming vs blocking roadmap generation.
+
+Start the stub so it streams tokens over the whole latency window, run the API against it:
+
+    python -m bench.stub_llm --latency-ms 3000 --chunk-chars 16
+    python -m bench.stream --requests 10
+
+Each request uses a fresh profile so the plan cache never answers. For `/roadmap:generate`
+the first milestone arrives with the full response; for `/roadmap:generate/stream` it is the
+first `milestone` event.
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+
+from ._common import BASE, auth_headers, emit, percentiles
+
+
+async def _fresh_profile(client: httpx.AsyncClient) -> int:
+    r = await client.post("/profile:upsert", json={
+        "name": "Bench User", "email": "bench-stream@example.com", "domain": "career",
+        "data": {"hours_per_week": 10, "style": "balanced", "nonce": uuid.uuid4().hex},
+    })
+    r.raise_for_status()
+    return r.json()["user_id"]
+
+
+async def _blocking(client: httpx.AsyncClient, user_id: int) -> Dict[str, float]:
+    t0 = time.perf_counter()
+    r = await client.post("/roadmap:generate", json={"user_id": user_id, "domain": "career"})
+    r.raise_for_status()
+    total = (time.perf_counter() - t0) * 1000
+    return {"first_milestone": total, "done": total}
+
+
+async def _streaming(client: httpx.AsyncClient, user_id: int) -> Dict[str, float]:
+    marks: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    async with client.stream("POST", "/roadmap:generate/stream", json={"user_id": user_id, "domain": "career"}) as r:
+        r.raise_for_status()
+        async for line in r.aiter_lines():
+            if not line.startswith("event: "):
+                continue
+            event = line[len("event: "):]
+            now = (time.perf_counter() - t0) * 1000
+            if event == "milestone":
+                marks.setdefault("first_milestone", now)
+            elif event == "done":
+                marks["done"] = now
+            elif event == "error":
+                raise RuntimeError("stream reported an error")
+    return marks
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    async with httpx.AsyncClient(base_url=args.base, headers=auth_headers(), timeout=120) as client:
+        for mode, fn in (("blocking", _blocking), ("streaming", _streaming)):
+            first: List[float] = []
+            done: List[float] = []
+            for _ in range(args.requests):
+                user_id = await _fresh_profile(client)
+                marks = await fn(client, user_id)
+                first.append(marks["first_milestone"])
+                done.append(marks["done"])
+            results[mode] = {"time_to_first_milestone": percentiles(first), "time_to_done": percentiles(done)}
+    return {"benchmark": "stream", "requests": args.requests, "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base", default=BASE)
+    parser.add_argument("--requests", type=int, default=10)
+    emit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
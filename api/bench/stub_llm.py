@@ -0,0 +1,199 @@
+"""Local stand-in for the OpenAI chat completions API.
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:9100/v1 and any OPENAI_API_KEY.
+
+    python -m bench.stub_llm --port 9100 --latency-ms 1500
+
+With `stream: true` the plan is sent as `--chunk-chars`-sized deltas spread evenly over
+`--latency-ms`, like tokens arriving from a real model.
+
+Fault injection, per request: `--error-rate` answers `--error-status` (503 by default),
+`--hang-rate` never answers, `--slow-rate` adds `--slow-ms` before answering. `POST /faults`
+with any of these as JSON keys (`error_rate`, ...) changes them while the stub runs.
+"""
+from typing import Dict, Any, List, Optional
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+STUB_PLAN: Dict[str, Any] = {
+    "domain": "career",
+    "title": "Backend Engineer Roadmap",
+    "milestones": [
+        {
+            "id": f"m{i}",
+            "title": title,
+            "description": f"{title}: study, practice and ship a small project.",
+            "resources": [{"name": f"{title} guide", "url": f"https://example.com/{i}"}],
+        }
+        for i, title in enumerate(
+            ["Python Foundations", "HTTP & APIs", "Databases & SQL", "System Design Basics", "Testing & CI", "Capstone"],
+            start=1,
+        )
+    ],
+    "timeline": [{"week": w, "focus": f"Week {w} focus"} for w in range(1, 13)],
+    "resources": [{"name": "Roadmap.sh", "url": "https://roadmap.sh/backend"}],
+    "check_ins": [{"week": 4, "goal": "Ship first API"}, {"week": 8, "goal": "Deploy with DB"}, {"week": 12, "goal": "Capstone review"}],
+}
+
+app = FastAPI(title="stub-llm")
+app.state.latency_ms = 0.0
+app.state.calls = 0
+app.state.chunk_chars = 16
+app.state.faults = {"error_rate": 0.0, "error_status": 503, "hang_rate": 0.0, "slow_rate": 0.0, "slow_ms": 0.0}
+app.state.injected = {"errors": 0, "hangs": 0, "slow": 0}
+
+
+async def _inject_fault() -> Optional[JSONResponse]:
+    """Apply the configured faults to one request: an error response to return, a hang, or
+    extra latency (None means answer normally)."""
+    faults = app.state.faults
+    roll = random.random()
+    if roll < faults["error_rate"]:
+        app.state.injected["errors"] += 1
+        return JSONResponse({"error": {"message": "injected fault", "type": "server_error"}}, status_code=int(faults["error_status"]))
+    roll -= faults["error_rate"]
+    if roll < faults["hang_rate"]:
+        app.state.injected["hangs"] += 1
+        await asyncio.sleep(3600)
+    roll -= faults["hang_rate"]
+    if roll < faults["slow_rate"]:
+        app.state.injected["slow"] += 1
+        await asyncio.sleep(faults["slow_ms"] / 1000.0)
+    return None
+
+
+def _stub_patch(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Answer a patch-mode revision prompt: one buffer week and a note on the first milestone."""
+    try:
+        # the plan JSON is the last line of the user message
+        plan = json.loads(body["messages"][-1]["content"].rsplit("\n", 1)[-1])["plan"]
+    except (KeyError, IndexError, ValueError):
+        plan = STUB_PLAN
+    weeks = [t.get("week", 0) for t in plan.get("timeline") or []]
+    ops: List[Dict[str, Any]] = [
+        {"op": "add", "target": "timeline", "value": {"week": max(weeks, default=0) + 1, "focus": "Buffer week for review"}},
+    ]
+    if plan.get("milestones"):
+        first = plan["milestones"][0]
+        ops.append({"op": "modify", "target": "milestones", "key": first["id"],
+                    "value": {"description": (first.get("description") or "") + " (revised)"}})
+    return {"ops": ops}
+
+
+def _usage(body: Dict[str, Any], content: str) -> Dict[str, int]:
+    prompt_chars = sum(len(m.get("content") or "") for m in body.get("messages", []))
+    return {
+        "prompt_tokens": prompt_chars // 4,
+        "completion_tokens": len(content) // 4,
+        "total_tokens": (prompt_chars + len(content)) // 4,
+    }
+
+
+def _stream_chunks(completion_id: str, model: str, content: str, usage: Optional[Dict[str, int]] = None):
+    """OpenAI-style `chat.completion.chunk` SSE frames for `content`, plus a final usage-only
+    chunk when `usage` is given (`stream_options.include_usage`)."""
+    size = max(1, app.state.chunk_chars)
+    pieces = [content[i:i + size] for i in range(0, len(content), size)]
+    delay = app.state.latency_ms / 1000.0 / max(1, len(pieces))
+
+    def frame(delta: Optional[Dict[str, Any]], finish_reason=None, **extra) -> str:
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [] if delta is None else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            **extra,
+        }
+        return f"data: {json.dumps(chunk)}\n\n"
+
+    async def body():
+        yield frame({"role": "assistant", "content": ""})
+        for piece in pieces:
+            if delay:
+                await asyncio.sleep(delay)
+            yield frame({"content": piece})
+        yield frame({}, "stop")
+        if usage is not None:
+            yield frame(None, usage=usage)
+        yield "data: [DONE]\n\n"
+
+    return body()
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    app.state.calls += 1
+    fault = await _inject_fault()
+    if fault is not None:
+        return fault
+    system = next((m.get("content") or "" for m in body.get("messages", []) if m.get("role") == "system"), "")
+    content = json.dumps(_stub_patch(body) if '{"ops"' in system else STUB_PLAN)
+    if body.get("stream"):
+        return StreamingResponse(
+            _stream_chunks(
+                f"chatcmpl-stub-{app.state.calls}", body.get("model", "stub"), content,
+                _usage(body, content) if (body.get("stream_options") or {}).get("include_usage") else None,
+            ),
+            media_type="text/event-stream",
+        )
+    if app.state.latency_ms:
+        await asyncio.sleep(app.state.latency_ms / 1000.0)
+    return {
+        "id": f"chatcmpl-stub-{app.state.calls}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [
+            {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+        ],
+        "usage": _usage(body, content),
+    }
+
+
+@app.get("/stats")
+async def stats():
+    return {"calls": app.state.calls, "faults": app.state.faults, "injected": app.state.injected}
+
+
+@app.post("/faults")
+async def set_faults(request: Request):
+    changes = await request.json()
+    unknown = set(changes) - set(app.state.faults)
+    if unknown:
+        return JSONResponse({"error": f"unknown faults: {sorted(unknown)}"}, status_code=400)
+    app.state.faults.update({k: float(v) for k, v in changes.items()})
+    return app.state.faults
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="artificial delay per completion")
+    parser.add_argument("--chunk-chars", type=int, default=16, help="characters per streamed delta")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="share of requests that never answer")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of requests delayed by --slow-ms")
+    parser.add_argument("--slow-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    app.state.faults.update(error_rate=args.error_rate, error_status=args.error_status, hang_rate=args.hang_rate,
+                            slow_rate=args.slow_rate, slow_ms=args.slow_ms)
+    app.state.latency_ms = args.latency_ms
+    app.state.chunk_chars = args.chunk_chars
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
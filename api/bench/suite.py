@@ -0,0 +1,331 @@
+"""Reproducible mixed-workload run over every API endpoint, with per-endpoint latency.
+
+Applies migrations, seeds `--users` users (profiles, `--versions` roadmaps each, feedback on
+every other version), starts the LLM stub and the API against it, then drives a weighted mix
+of all endpoints from `--concurrency` clients for `--duration` seconds:
+
+    DB_HOST=127.0.0.1 python -m bench.suite --users 10000 --duration 60 --out run.json
+
+The report has throughput, error counts and p50/p95/p99 per endpoint (route template) and
+overall, plus the configuration and git revision it ran with. Each client draws operations and
+users from a generator seeded with `--seed`, so runs replay the same mix. Compare runs with:
+
+    python -m bench.suite --baseline before.json --out after.json   # run, then diff
+    python -m bench.suite --diff before.json after.json              # diff two saved reports
+
+`--mix name=weight` overrides one operation's weight (0 disables it); names are the keys of
+MIX. The stub is configured with `--llm-latency-ms`, `--llm-error-rate` and
+`--llm-chunk-chars` (stream delta size).
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter, deque
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+from sqlalchemy import text
+
+from app.core.database import engine
+from .seed import seed_bulk
+from ._common import auth_headers, emit, percentiles, start_api, start_stub, wait_ready
+
+DOMAINS = ["career", "academics", "personal"]
+SIGNALS = ["too_fast", "too_easy", "missing_topic", "change_goal", "other"]
+TARGETS = ["Backend Engineer", "Frontend Developer", "Data Scientist", "DevOps Engineer", "Product Manager"]
+STYLES = ["balanced", "hands-on", "fast", "thorough"]
+
+# operation -> (route template, default weight): read-heavy, with every endpoint represented
+MIX: Dict[str, Tuple[str, float]] = {
+    "get_roadmap": ("GET /roadmap/{roadmap_id}", 30),
+    "history": ("GET /roadmap/{user_id}/{domain}/history", 20),
+    "upsert_profile": ("POST /profile:upsert", 10),
+    "generate": ("POST /roadmap:generate", 8),
+    "revise": ("POST /roadmap:revise", 6),
+    "generate_stream": ("POST /roadmap:generate/stream", 3),
+    "revise_stream": ("POST /roadmap:revise/stream", 3),
+    "submit_generate_job": ("POST /jobs/roadmap:generate", 3),
+    "submit_revise_job": ("POST /jobs/roadmap:revise", 2),
+    "get_job": ("GET /jobs/{job_id}", 5),
+    "job_stats": ("GET /jobs:stats", 1),
+    "cohort": ("POST /cohort:onboard", 1),
+    "health": ("GET /health", 3),
+    "llm_stats": ("GET /llm/stats", 2),
+    "metrics": ("GET /metrics", 3),
+}
+
+
+class Workload:
+    """Request builders for each MIX operation over the seeded ids."""
+
+    def __init__(self, client: httpx.AsyncClient, users: List[Dict[str, Any]], cohort_size: int):
+        self.client = client
+        self.users = users
+        self.cohort_size = cohort_size
+        self.run = uuid.uuid4().hex[:8]
+        # submitted job ids, polled by get_job
+        self.jobs: deque = deque(maxlen=1000)
+
+    def _profile(self, rng: random.Random) -> Dict[str, Any]:
+        return {"hours_per_week": rng.randint(2, 20), "style": rng.choice(STYLES),
+                "target_role": rng.choice(TARGETS), "experience_level": rng.choice(["beginner", "intermediate"])}
+
+    def _feedback(self, rng: random.Random) -> Dict[str, Any]:
+        return {"signal_type": rng.choice(SIGNALS), "notes": "bench suite"}
+
+    async def _stream(self, path: str, body: Dict[str, Any]) -> httpx.Response:
+        async with self.client.stream("POST", path, json=body) as r:
+            async for _ in r.aiter_bytes():
+                pass
+        return r
+
+    async def call(self, op: str, rng: random.Random) -> httpx.Response:
+        user = rng.choice(self.users)
+        if op == "get_roadmap":
+            return await self.client.get(f"/roadmap/{user['roadmap_id']}")
+        if op == "history":
+            return await self.client.get(f"/roadmap/{user['user_id']}/career/history",
+                                         params={"limit": 10, "plans": "summary"})
+        if op == "upsert_profile":
+            return await self.client.post("/profile:upsert", json={
+                "name": user["name"], "email": user["email"], "domain": "career", "data": self._profile(rng)})
+        if op == "generate":
+            return await self.client.post("/roadmap:generate", json={"user_id": user["user_id"], "domain": "career"})
+        if op == "revise":
+            return await self.client.post("/roadmap:revise", json={
+                "roadmap_id": user["roadmap_id"], "feedback": self._feedback(rng)})
+        if op == "generate_stream":
+            return await self._stream("/roadmap:generate/stream", {"user_id": user["user_id"], "domain": "career"})
+        if op == "revise_stream":
+            return await self._stream("/roadmap:revise/stream", {
+                "roadmap_id": user["roadmap_id"], "feedback": self._feedback(rng)})
+        if op in ("submit_generate_job", "submit_revise_job"):
+            if op == "submit_generate_job":
+                r = await self.client.post("/jobs/roadmap:generate", json={"user_id": user["user_id"], "domain": "career"})
+            else:
+                r = await self.client.post("/jobs/roadmap:revise", json={
+                    "roadmap_id": user["roadmap_id"], "feedback": self._feedback(rng)})
+            if r.status_code == 202:
+                self.jobs.append(r.json()["job_id"])
+            return r
+        if op == "get_job":
+            # before the first submit, poll a job id that may not exist (404 counts as an error)
+            job_id = rng.choice(self.jobs) if self.jobs else 1
+            return await self.client.get(f"/jobs/{job_id}")
+        if op == "job_stats":
+            return await self.client.get("/jobs:stats")
+        if op == "cohort":
+            tag = f"{self.run}-{rng.getrandbits(32):x}"
+            return await self.client.post("/cohort:onboard", json={
+                "domain": rng.choice(DOMAINS),
+                "members": [{"name": f"Suite {tag} {i}", "email": f"bench-suite-{tag}-{i}@example.com",
+                             "data": self._profile(rng)} for i in range(self.cohort_size)],
+            })
+        if op == "health":
+            return await self.client.get("/health")
+        if op == "llm_stats":
+            return await self.client.get("/llm/stats")
+        if op == "metrics":
+            return await self.client.get("/metrics")
+        raise ValueError(f"unknown operation {op!r}")
+
+
+def _seed(users: int, versions: int) -> List[Dict[str, Any]]:
+    """Seed the bulk batch and return each user's id, email and latest roadmap id."""
+    tag = seed_bulk(users, versions, DOMAINS, compact_plan=False)
+    with engine.begin() as conn:
+        rows = conn.execute(
+            text(
+                'SELECT u.id, u.name, u.email, max(r.id) FROM "user" u JOIN roadmap r ON r.user_id = u.id '
+                "WHERE u.email LIKE :pattern AND r.domain = 'career' GROUP BY u.id ORDER BY u.id"
+            ),
+            {"pattern": f"bulk-{tag}-%"},
+        ).all()
+    engine.dispose()
+    return [{"user_id": r[0], "name": r[1], "email": r[2], "roadmap_id": r[3]} for r in rows]
+
+
+def _weights(overrides: List[str]) -> Dict[str, float]:
+    weights = {op: weight for op, (_, weight) in MIX.items()}
+    for item in overrides:
+        op, _, value = item.partition("=")
+        if op not in MIX:
+            raise SystemExit(f"unknown operation {op!r}; one of {', '.join(MIX)}")
+        weights[op] = float(value)
+    return {op: w for op, w in weights.items() if w > 0}
+
+
+def _summary(samples: List[float], errors: Counter, wall: float) -> Dict[str, Any]:
+    return {
+        "errors": dict(errors),
+        "rps": round(len(samples) / wall, 2),
+        **percentiles(samples),
+    }
+
+
+async def _drive(workload: Workload, weights: Dict[str, float], args: argparse.Namespace) -> Dict[str, Any]:
+    ops, op_weights = list(weights), list(weights.values())
+    samples: Dict[str, List[float]] = {op: [] for op in ops}
+    errors: Dict[str, Counter] = {op: Counter() for op in ops}
+    measuring = False
+    stop_at = time.perf_counter() + args.warmup + args.duration
+
+    async def client_loop(n: int) -> None:
+        rng = random.Random(args.seed * 1_000_003 + n)
+        while time.perf_counter() < stop_at:
+            op = rng.choices(ops, weights=op_weights)[0]
+            t0 = time.perf_counter()
+            try:
+                r = await workload.call(op, rng)
+                failed: Optional[str] = None if r.status_code < 400 else str(r.status_code)
+            except httpx.HTTPError as exc:
+                failed = type(exc).__name__
+            elapsed = (time.perf_counter() - t0) * 1000
+            if not measuring:
+                continue
+            if failed:
+                errors[op][failed] += 1
+            else:
+                samples[op].append(elapsed)
+
+    loops = asyncio.gather(*(client_loop(n) for n in range(args.concurrency)))
+    await asyncio.sleep(args.warmup)
+    measuring = True
+    t0 = time.perf_counter()
+    await loops
+    wall = time.perf_counter() - t0
+
+    endpoints = {MIX[op][0]: _summary(samples[op], errors[op], wall) for op in ops}
+    everything = [s for op in ops for s in samples[op]]
+    overall = _summary(everything, sum(errors.values(), Counter()), wall)
+    return {"endpoints": endpoints, "overall": overall}
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def diff(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-endpoint change from `before` to `after`: rps and latency ratios (after / before)."""
+    def ratios(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for key in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+            if a.get(key) and b.get(key) is not None:
+                out[key] = {"before": a[key], "after": b[key], "ratio": round(b[key] / a[key], 3)}
+        out["errors"] = {"before": sum(a.get("errors", {}).values()), "after": sum(b.get("errors", {}).values())}
+        return out
+
+    routes = [r for r in after["endpoints"] if r in before["endpoints"]]
+    return {
+        "overall": ratios(before["overall"], after["overall"]),
+        "endpoints": {r: ratios(before["endpoints"][r], after["endpoints"][r]) for r in routes},
+        "only_before": sorted(set(before["endpoints"]) - set(after["endpoints"])),
+        "only_after": sorted(set(after["endpoints"]) - set(before["endpoints"])),
+        "revisions": [before.get("config", {}).get("git"), after.get("config", {}).get("git")],
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    weights = _weights(args.mix)
+    subprocess.run([sys.executable, "-m", "app.core.migrations"], stdout=sys.stderr, check=True)
+    t0 = time.perf_counter()
+    users = _seed(args.users, args.versions)
+    seed_s = time.perf_counter() - t0
+
+    stub = start_stub(args.stub_port, "--latency-ms", str(args.llm_latency_ms),
+                      "--error-rate", str(args.llm_error_rate), "--chunk-chars", str(args.llm_chunk_chars))
+    api = None
+    try:
+        stub_base = f"http://127.0.0.1:{args.stub_port}"
+        await wait_ready(stub_base, path="/stats")
+        env = {
+            "OPENAI_API_KEY": "sk-bench", "OPENAI_BASE_URL": f"{stub_base}/v1",
+            "JOB_WORKERS": str(args.job_workers),
+        }
+        api = start_api(args.port, env, "--workers", str(args.workers))
+        base = f"http://127.0.0.1:{args.port}"
+        await wait_ready(base)
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base, headers=auth_headers(), limits=limits, timeout=120) as client:
+            result = await _drive(Workload(client, users, args.cohort_size), weights, args)
+        async with httpx.AsyncClient(base_url=stub_base) as client:
+            stub_stats = (await client.get("/stats")).json()
+    finally:
+        for proc in (api, stub):
+            if proc is not None:
+                proc.terminate()
+                proc.wait(timeout=30)
+
+    report = {
+        "benchmark": "suite",
+        "config": {
+            "git": _git_revision(),
+            "cpus": os.cpu_count(),
+            "seed": args.seed,
+            "users": args.users,
+            "roadmaps": args.users * args.versions * len(DOMAINS),
+            "seed_s": round(seed_s, 1),
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "workers": args.workers,
+            "job_workers": args.job_workers,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_error_rate": args.llm_error_rate,
+            "llm_chunk_chars": args.llm_chunk_chars,
+            "mix": weights,
+        },
+        **result,
+        "stub": stub_stats,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["diff"] = diff(json.load(f), report)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000, help="seeded users (each with a profile)")
+    parser.add_argument("--versions", type=int, default=5, help="seeded roadmap versions per user and domain")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--warmup", type=float, default=5, help="seconds of load before measuring")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--mix", action="append", default=[], metavar="OP=WEIGHT")
+    parser.add_argument("--cohort-size", type=int, default=5, help="members per /cohort:onboard request")
+    parser.add_argument("--port", type=int, default=8100, help="port for the spawned API")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--job-workers", type=int, default=2, help="JOB_WORKERS per API worker")
+    parser.add_argument("--stub-port", type=int, default=9200)
+    parser.add_argument("--llm-latency-ms", type=float, default=500)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-chunk-chars", type=int, default=16)
+    parser.add_argument("--out", help="also write the report to this file")
+    parser.add_argument("--baseline", help="saved report to diff this run against")
+    parser.add_argument("--diff", nargs=2, metavar=("BEFORE", "AFTER"), help="only diff two saved reports")
+    args = parser.parse_args()
+
+    if args.diff:
+        with open(args.diff[0]) as a, open(args.diff[1]) as b:
+            emit(diff(json.load(a), json.load(b)))
+        return
+    report = asyncio.run(run(args))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    emit(report)
+
+
+if __name__ == "__main__":
+    main()
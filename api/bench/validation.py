@@ -0,0 +1,111 @@
+"""Plan validation cost: the old repeated model round trips vs single-pass validation (offline).
+
+Builds synthetic LLM answers with `--milestones` milestones (each with `--resources`
+resources and a URL per resource) and times the validation work of each flow, per plan:
+
+    python -m bench.validation --milestones 50 200 500
+
+- generate: `json.loads` + validate/dump in the provider, validate/dump again before storing,
+  vs `validate_plan_json` once (the stored plan is already marked)
+- revise: three validate/dump passes (LLM output, after restoring pruned fields, before
+  storing) vs one
+- local: the local engine's memoized plan validated on every call vs validated once per build
+"""
+from typing import Any, Callable, Dict, List
+import argparse
+import json
+import time
+
+import orjson
+
+from app.llm.budget import restore_pruned
+from app.llm.planner import build_plan
+from app.llm.schema import RoadmapPlan, ensure_valid, validate_plan_json
+from ._common import emit
+
+
+def _plan(milestones: int, resources: int) -> Dict[str, Any]:
+    return {
+        "domain": "career",
+        "title": "Synthetic Plan",
+        "milestones": [
+            {
+                "id": f"m{i}",
+                "title": f"Milestone {i}",
+                "description": f"Work through topic {i} and ship a small project that uses it.",
+                "resources": [{"name": f"Resource {i}.{j}", "url": f"https://example.com/topics/{i}/{j}"}
+                              for j in range(resources)],
+            }
+            for i in range(1, milestones + 1)
+        ],
+        "timeline": [{"week": w, "focus": f"Milestone {w}"} for w in range(1, milestones + 1)],
+        "resources": [{"name": "Docs", "url": "https://docs.example.com"}],
+        "check_ins": [{"week": w, "goal": f"Finish milestone {w}"} for w in range(1, milestones + 1, 4)],
+        "constraints": {"hours_per_week": 8},
+    }
+
+
+def _legacy(data: Any) -> Dict[str, Any]:
+    return RoadmapPlan.model_validate(data).model_dump(mode="json")
+
+
+def _time(fn: Callable[[], Any], min_seconds: float) -> float:
+    """Mean milliseconds per call over at least `min_seconds`."""
+    n, elapsed = 0, 0.0
+    start = time.perf_counter()
+    while elapsed < min_seconds:
+        fn()
+        n += 1
+        elapsed = time.perf_counter() - start
+    return round(elapsed / n * 1000, 3)
+
+
+def _case(milestones: int, resources: int, min_seconds: float) -> Dict[str, Any]:
+    raw = orjson.dumps(_plan(milestones, resources)).decode()
+    original = _legacy(json.loads(raw))
+
+    def generate_old() -> None:
+        _legacy(_legacy(json.loads(raw)))
+
+    def generate_new() -> None:
+        ensure_valid(validate_plan_json(raw))
+
+    def revise_old() -> None:
+        revised = _legacy(json.loads(raw))
+        _legacy(_legacy(restore_pruned(original, original, revised)))
+
+    def revise_new() -> None:
+        ensure_valid(ensure_valid(restore_pruned(original, original, validate_plan_json(raw))))
+
+    flows = {"generate": (generate_old, generate_new), "revise": (revise_old, revise_new)}
+    out: Dict[str, Any] = {"milestones": milestones, "resources": milestones * resources + 1,
+                           "json_bytes": len(raw)}
+    for name, (old, new) in flows.items():
+        old_ms, new_ms = _time(old, min_seconds), _time(new, min_seconds)
+        out[name] = {"old_ms": old_ms, "new_ms": new_ms, "speedup": round(old_ms / new_ms, 2)}
+    return out
+
+
+def _local(min_seconds: float) -> Dict[str, Any]:
+    profile = {"hours_per_week": 6, "style": "balanced", "target_role": "Backend Engineer"}
+    old_ms = _time(lambda: _legacy(build_plan(profile, "career")), min_seconds)
+    new_ms = _time(lambda: ensure_valid(build_plan(profile, "career")), min_seconds)
+    return {"old_ms": old_ms, "new_ms": new_ms, "speedup": round(old_ms / new_ms, 2)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--milestones", type=int, nargs="*", default=[10, 50, 200, 500])
+    parser.add_argument("--resources", type=int, default=3, help="resources per milestone")
+    parser.add_argument("--seconds", type=float, default=1.0, help="minimum timing per measurement")
+    args = parser.parse_args()
+    cases: List[Dict[str, Any]] = [_case(m, args.resources, args.seconds) for m in args.milestones]
+    emit({
+        "benchmark": "validation",
+        "cases": cases,
+        "local_engine": _local(args.seconds),
+    })
+
+
+if __name__ == "__main__":
+    main()
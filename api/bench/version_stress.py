@@ -0,0 +1,109 @@
+"""Concurrency stress check for roadmap version allocation.
+
+Fires `--requests` parallel generate/revise calls for one fresh user and domain, then
+reads the full history and checks that versions are exactly 1..N with no duplicates
+and N equals the number of successful writes. Exits non-zero on any violation.
+
+    python -m bench.version_stress --requests 400 --concurrency 200
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+
+import httpx
+
+from ._common import BASE, auth_headers, emit
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base, headers=auth_headers(), limits=limits, timeout=300) as client:
+        r = await client.post("/profile:upsert", json={
+            "name": "Stress", "email": f"stress-{uuid.uuid4().hex[:8]}@example.com",
+            "domain": args.domain, "data": {"hours_per_week": 6},
+        })
+        r.raise_for_status()
+        user_id = r.json()["user_id"]
+        r = await client.post("/roadmap:generate", json={"user_id": user_id, "domain": args.domain})
+        r.raise_for_status()
+        roadmap_ids: List[int] = [r.json()["roadmap_id"]]
+
+        sem = asyncio.Semaphore(args.concurrency)
+        rng = random.Random(args.seed)
+        ok = {"generate": 1, "revise": 0}
+        errors: List[str] = []
+
+        async def one(i: int) -> None:
+            async with sem:
+                if rng.random() < args.revise_ratio:
+                    kind = "revise"
+                    body = {"roadmap_id": rng.choice(roadmap_ids), "feedback": {"signal_type": "too_fast"}}
+                    rsp = await client.post("/roadmap:revise", json=body)
+                else:
+                    kind = "generate"
+                    rsp = await client.post("/roadmap:generate", json={"user_id": user_id, "domain": args.domain})
+                if rsp.status_code == 200:
+                    ok[kind] += 1
+                    roadmap_ids.append(rsp.json()["roadmap_id"])
+                else:
+                    errors.append(f"{kind} {rsp.status_code}: {rsp.text[:200]}")
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        wall = time.perf_counter() - t0
+
+        versions: List[int] = []
+        after = 0
+        while after is not None:
+            r = await client.get(
+                f"/roadmap/{user_id}/{args.domain}/history",
+                params={"after_version": after, "limit": 1000, "plans": "none"},
+            )
+            r.raise_for_status()
+            page = r.json()
+            versions.extend(v["version"] for v in page["versions"])
+            after = page["next_after_version"]
+
+    written = ok["generate"] + ok["revise"]
+    problems = []
+    if len(set(versions)) != len(versions):
+        problems.append("duplicate versions")
+    if sorted(versions) != list(range(1, len(versions) + 1)):
+        problems.append("versions are not dense 1..N")
+    if len(versions) != written:
+        problems.append(f"{len(versions)} versions stored for {written} successful writes")
+    return {
+        "benchmark": "version_stress",
+        "user_id": user_id,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "succeeded": ok,
+        "errors": errors[:10],
+        "error_count": len(errors),
+        "stored_versions": len(versions),
+        "max_version": max(versions) if versions else 0,
+        "wall_s": round(wall, 2),
+        "ok": not problems and not errors,
+        "problems": problems,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base", default=BASE)
+    parser.add_argument("--domain", default="career")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--revise-ratio", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=1)
+    report = asyncio.run(run(parser.parse_args()))
+    emit(report)
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,20 @@
-
 set -euo pipefail
-exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
+
+# SERVER_MODE=dev (default): one process with --reload, for the compose dev stack.
+# SERVER_MODE=prod: apply migrations once, then WEB_CONCURRENCY workers (default: one per
+# core) on uvloop + httptools, no file watcher and no access log; on SIGTERM in-flight
+# requests get GRACEFUL_TIMEOUT seconds to finish.
+if [ "${SERVER_MODE:-dev}" = "prod" ]; then
+  python -m app.core.migrations
+  # workers write metrics to files here and /metrics merges them; clear the last run's files
+  export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/lifemap-metrics}"
+  mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+  find "$PROMETHEUS_MULTIPROC_DIR" -name '*.db' -delete
+  exec uvicorn app.main:app --host 0.0.0.0 --port "${PORT:-8000}" \
+    --workers "${WEB_CONCURRENCY:-$(nproc)}" \
+    --loop uvloop --http httptools \
+    --no-access-log \
+    --timeout-graceful-shutdown "${GRACEFUL_TIMEOUT:-30}"
+fi
+
+exec uvicorn app.main:app --host 0.0.0.0 --port "${PORT:-8000}" --reload